@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 # standard libraries
+import collections
 import copy
 import gettext
 import math
@@ -44,12 +45,95 @@ class Frame:
         self.data_count = 0
         self.start_time = time.perf_counter()
         self.scan_data: typing.Optional[typing.List[_NDArray]] = None
+        # the most recently generated row for each channel, used when a read ends partway through a row.
+        self.scan_rows: typing.Dict[int, typing.Tuple[int, _NDArray]] = dict()
+
+
+class SequenceBuffer:
+    """Buffer completed frames in sequence mode.
+
+    The buffer accepts up to the count of frames passed to reset. If max_bytes is set, the buffered frames are limited
+    to that many bytes and the overflow policy determines what happens to a frame that does not fit. A single frame
+    larger than max_bytes is accepted when the buffer is empty.
+    """
+
+    def __init__(self) -> None:
+        self.__condition = threading.Condition()
+        self.__frames: collections.deque[typing.Tuple[typing.List[_DataElementType], int]] = collections.deque()
+        self.__remaining_count = 0
+        self.__max_bytes: typing.Optional[int] = None
+        self.__overflow_policy = scan_base.SequenceBufferOverflowPolicy.BLOCK
+        self.__statistics = scan_base.SequenceBufferStatistics()
+
+    def reset(self, count: int) -> None:
+        with self.__condition:
+            self.__frames.clear()
+            self.__remaining_count = count
+            self.__statistics = scan_base.SequenceBufferStatistics()
+            self.__condition.notify_all()
+
+    def set_limits(self, max_bytes: typing.Optional[int], overflow_policy: scan_base.SequenceBufferOverflowPolicy) -> None:
+        with self.__condition:
+            self.__max_bytes = max_bytes
+            self.__overflow_policy = overflow_policy
+
+    @property
+    def count(self) -> int:
+        return len(self.__frames)
+
+    @property
+    def statistics(self) -> scan_base.SequenceBufferStatistics:
+        with self.__condition:
+            return copy.copy(self.__statistics)
+
+    def append(self, data_elements: typing.List[_DataElementType], cancel_event: threading.Event) -> None:
+        """Append the frame if the buffer is still accepting frames, applying the overflow policy if it is full."""
+        byte_count = sum(data_element["data"].nbytes for data_element in data_elements)
+        with self.__condition:
+            if self.__remaining_count <= 0:
+                return
+            statistics = self.__statistics
+            max_bytes = self.__max_bytes
+            if max_bytes is not None and self.__frames and statistics.byte_count + byte_count > max_bytes:
+                if self.__overflow_policy == scan_base.SequenceBufferOverflowPolicy.BLOCK:
+                    start_time = time.perf_counter()
+                    while self.__frames and statistics.byte_count + byte_count > max_bytes and not cancel_event.is_set():
+                        self.__condition.wait(0.05)
+                    statistics.blocked_time += time.perf_counter() - start_time
+                    if cancel_event.is_set():
+                        return
+                elif self.__overflow_policy == scan_base.SequenceBufferOverflowPolicy.DROP_OLDEST:
+                    while self.__frames and statistics.byte_count + byte_count > max_bytes:
+                        statistics.byte_count -= self.__frames.popleft()[1]
+                        statistics.dropped_count += 1
+                        # acquire another frame in place of the dropped one.
+                        self.__remaining_count += 1
+                else:
+                    statistics.dropped_count += 1
+                    statistics.overflow_error = True
+                    return
+            self.__frames.append((data_elements, byte_count))
+            self.__remaining_count -= 1
+            statistics.byte_count += byte_count
+            statistics.max_byte_count = max(statistics.max_byte_count, statistics.byte_count)
+            statistics.frame_count = len(self.__frames)
+
+    def pop(self) -> typing.List[_DataElementType]:
+        with self.__condition:
+            data_elements, byte_count = self.__frames.popleft()
+            self.__statistics.byte_count -= byte_count
+            self.__statistics.frame_count = len(self.__frames)
+            self.__condition.notify_all()
+            return data_elements
 
 
 class ScanDataGeneratorLike(typing.Protocol):
     def generate_scan_data(self, instrument: InstrumentDevice.Instrument, scan_frame_parameters: ScanFrameParameters) -> numpy.typing.NDArray[numpy.float32]:
         ...
 
+    # generators may also implement generate_scan_data_rows(instrument, scan_frame_parameters, row_start, row_stop)
+    # to generate only the rows from row_start to row_stop of the frame.
+
 
 class ScanSimulatorLike(typing.Protocol):
     scan_shape_pixels: Geometry.IntSize
@@ -76,6 +160,10 @@ class ScanSimulatorLike(typing.Protocol):
 
     def generate_scan_data(self, instrument: InstrumentDevice.Instrument, scan_frame_parameters: ScanFrameParameters) -> numpy.typing.NDArray[numpy.float32]: ...
 
+    # simulators may also implement generate_scan_data_rows(instrument, scan_frame_parameters, row_start, row_stop)
+    # to generate only the rows from row_start to row_stop of the frame. the device then generates rows as they are
+    # scanned; otherwise it generates the entire frame on the first read.
+
 
 class ScanFrameParameters(scan_base.ScanFrameParameters):
     def __init__(self, *args: typing.Any, **kwargs: typing.Any) -> None:
@@ -146,15 +234,54 @@ class Device(scan_base.ScanDevice):
         self.__is_scanning = False
         self.__flyback_pixels = 2
         self.on_device_state_changed = None
+        self.on_data_available: typing.Optional[typing.Callable[[], None]] = None
         self.__frame_parameters = ScanFrameParameters()
         self.flyback_pixels = 2
-        self.__buffer: typing.List[typing.List[typing.Dict[str, typing.Any]]] = list()
-        self.__view_buffer_size = 20
-        self.__sequence_buffer_size = 0
+        self.__view_buffer: collections.deque[typing.List[_DataElementType]] = collections.deque(maxlen=20)
+        self.__sequence_buffer = SequenceBuffer()
         self.__scan_simulator = scan_simulator
+        self.__cancel_event = threading.Event()
+        # a single thread, started with the first frame, waits for the end of each frame.
+        self.__frame_deadline_condition = threading.Condition()
+        self.__frame_deadline: typing.Optional[float] = None
+        self.__frame_deadline_thread: typing.Optional[threading.Thread] = None
+        self.__is_closed = False
 
     def close(self) -> None:
-        pass
+        with self.__frame_deadline_condition:
+            self.__is_closed = True
+            self.__frame_deadline = None
+            self.__frame_deadline_condition.notify_all()
+            frame_deadline_thread = self.__frame_deadline_thread
+            self.__frame_deadline_thread = None
+        if frame_deadline_thread:
+            frame_deadline_thread.join()
+
+    def __set_frame_deadline(self, frame_deadline: typing.Optional[float]) -> None:
+        with self.__frame_deadline_condition:
+            if not self.__is_closed:
+                self.__frame_deadline = frame_deadline
+                if frame_deadline is not None and not self.__frame_deadline_thread:
+                    self.__frame_deadline_thread = threading.Thread(target=self.__frame_deadline_loop, daemon=True)
+                    self.__frame_deadline_thread.start()
+                self.__frame_deadline_condition.notify_all()
+
+    def __frame_deadline_loop(self) -> None:
+        while True:
+            with self.__frame_deadline_condition:
+                while not self.__is_closed and (self.__frame_deadline is None or self.__frame_deadline > time.perf_counter()):
+                    self.__frame_deadline_condition.wait(self.__frame_deadline - time.perf_counter() if self.__frame_deadline is not None else None)
+                if self.__is_closed:
+                    return
+                self.__frame_deadline = None
+            self.__frame_time_elapsed()
+
+    def __frame_time_elapsed(self) -> None:
+        # notify the scan acquisition task that the frame is complete so that it is read without waiting for the
+        # remainder of the poll period.
+        on_data_available = getattr(self, "on_data_available", None)
+        if self.__is_scanning and callable(on_data_available):
+            on_data_available()
 
     def __get_channels(self) -> typing.List[Channel]:
         return [Channel(0, "HAADF", True), Channel(1, "MAADF", False), Channel(2, "X1", False), Channel(3, "X2", False)]
@@ -228,6 +355,19 @@ class Device(scan_base.ScanDevice):
     # note: channel typing is just for ease of tests. it can be more strict in the future.
     def get_scan_data(self, frame_parameters: scan_base.ScanFrameParameters, channel: typing.Union[int, Channel]) -> _NDArray:
         """Get the simulated data from the sample simulator"""
+        return self.__scan_simulator.generate_scan_data(self.__instrument, self.__get_simulator_frame_parameters(frame_parameters))
+
+    def get_scan_data_rows(self, frame_parameters: scan_base.ScanFrameParameters, channel: typing.Union[int, Channel], row_start: int, row_stop: int) -> _NDArray:
+        """Get rows of the simulated data from the sample simulator.
+
+        If the simulator cannot generate individual rows, the entire frame is generated and the rows returned from it.
+        """
+        generate_scan_data_rows = getattr(self.__scan_simulator, "generate_scan_data_rows", None)
+        if callable(generate_scan_data_rows):
+            return typing.cast(_NDArray, generate_scan_data_rows(self.__instrument, self.__get_simulator_frame_parameters(frame_parameters), row_start, row_stop))
+        return self.get_scan_data(frame_parameters, channel)[row_start:row_stop]
+
+    def __get_simulator_frame_parameters(self, frame_parameters: scan_base.ScanFrameParameters) -> ScanFrameParameters:
         size = Geometry.IntSize.make(frame_parameters.subscan_pixel_size if frame_parameters.subscan_pixel_size else frame_parameters.pixel_size)
         fov_size_nm = Geometry.FloatSize.make(frame_parameters.fov_size_nm) if frame_parameters.fov_size_nm else Geometry.FloatSize(frame_parameters.fov_nm, frame_parameters.fov_nm)
         # If we are doing a subscan calculate the actually used fov
@@ -247,8 +387,24 @@ class Device(scan_base.ScanDevice):
         if frame_parameters.subscan_rotation:
             total_rotation -= frame_parameters.subscan_rotation
         # NOTE: the real hardware uses the max of width and height for fov. same here.
-        scan_frame_parameters = ScanFrameParameters(size=size, pixel_time_us=frame_parameters.pixel_time_us, fov_nm=max(used_fov_size_nm.width, used_fov_size_nm.height), center_nm=center_nm, rotation_rad=total_rotation)
-        return self.__scan_simulator.generate_scan_data(self.__instrument, scan_frame_parameters)
+        return ScanFrameParameters(size=size, pixel_time_us=frame_parameters.pixel_time_us, fov_nm=max(used_fov_size_nm.width, used_fov_size_nm.height), center_nm=center_nm, rotation_rad=total_rotation)
+
+    def __get_frame_rows(self, frame: Frame, channel_index: int, row_start: int, row_stop: int) -> _NDArray:
+        # return the rows of simulated data for the channel, generating only rows not already generated.
+        channel = frame.channels[channel_index]
+        if not callable(getattr(self.__scan_simulator, "generate_scan_data_rows", None)):
+            # simulators without row generation produce the entire frame once.
+            if frame.scan_data is None:
+                frame.scan_data = [self.get_scan_data(frame.frame_parameters, c) for c in frame.channels]
+            return frame.scan_data[channel_index][row_start:row_stop]
+        cached_row = frame.scan_rows.get(channel_index)
+        if cached_row is not None and cached_row[0] == row_start:
+            new_rows = self.get_scan_data_rows(frame.frame_parameters, channel, row_start + 1, row_stop) if row_stop > row_start + 1 else None
+            rows = numpy.concatenate([cached_row[1][numpy.newaxis, ...], new_rows]) if new_rows is not None else cached_row[1][numpy.newaxis, ...]
+        else:
+            rows = self.get_scan_data_rows(frame.frame_parameters, channel, row_start, row_stop)
+        frame.scan_rows[channel_index] = (row_stop - 1, rows[-1])
+        return rows
 
     def read_partial(self, frame_number: typing.Optional[int], pixels_to_skip: int) -> typing.Tuple[typing.Sequence[typing.Dict[str, typing.Any]], bool, bool, typing.Tuple[typing.Tuple[int, int], typing.Tuple[int, int]], typing.Optional[int], int]:
         """Read or continue reading a frame.
@@ -280,12 +436,6 @@ class Device(scan_base.ScanDevice):
         total_pixels = size.height * size.width
         time_slice = 0.005  # 5 ms
 
-        if current_frame.scan_data is None:
-            scan_data = list()
-            for channel in current_frame.channels:
-                scan_data.append(self.get_scan_data(current_frame.frame_parameters, channel))
-            current_frame.scan_data = scan_data
-
         is_synchronized_scan = frame_parameters.external_clock_mode != 0
 
         target_count = 0
@@ -295,20 +445,27 @@ class Device(scan_base.ScanDevice):
             time.sleep(time_slice)
             target_count = self.__scan_simulator.current_pixel_flat + 1
         else:
+            pixel_time = frame_parameters.pixel_time_us / 1E6
             while self.__is_scanning and target_count <= current_frame.data_count:
-                pixels_remaining = min(total_pixels - current_frame.data_count, int(time_slice * 1e6 / frame_parameters.pixel_time_us) + 1)
-                pixel_wait = min(pixels_remaining * frame_parameters.pixel_time_us / 1E6, time_slice)
-                time.sleep(pixel_wait)
-                target_count = min(int((time.perf_counter() - current_frame.start_time) / (frame_parameters.pixel_time_us / 1E6)), total_pixels)
+                # data is reported in rows, so wait until the next row is complete. cancel wakes the wait.
+                next_count = min((current_frame.data_count // size.width + 1) * size.width, total_pixels)
+                pixel_wait = current_frame.start_time + next_count * pixel_time - time.perf_counter()
+                if pixel_wait > 0.0:
+                    self.__cancel_event.wait(pixel_wait)
+                target_count = min(int((time.perf_counter() - current_frame.start_time) / pixel_time), total_pixels)
             if (new_pixels := target_count - self.__scan_simulator.current_pixel_flat) > 0:
                 self.__scan_simulator._advance_pixel(new_pixels)
 
         if self.__is_scanning and target_count > current_frame.data_count:
+            # generate only the rows spanning the new pixels.
+            row_start = current_frame.data_count // size.width
+            row_stop = (target_count + size.width - 1) // size.width
+            pixel_offset = row_start * size.width
             for channel_index, channel in enumerate(current_frame.channels):
                 assert channel.data is not None
-                scan_data_flat = current_frame.scan_data[channel_index].reshape((total_pixels,))
+                scan_rows_flat = self.__get_frame_rows(current_frame, channel_index, row_start, row_stop).reshape(-1)
                 channel_data_flat = channel.data.reshape((total_pixels,))
-                channel_data_flat[current_frame.data_count:target_count] = scan_data_flat[current_frame.data_count:target_count]
+                channel_data_flat[current_frame.data_count:target_count] = scan_rows_flat[current_frame.data_count - pixel_offset:target_count - pixel_offset]
             current_frame.data_count = target_count
             current_frame.complete = current_frame.data_count >= total_pixels
         elif not self.__is_scanning:
@@ -343,16 +500,17 @@ class Device(scan_base.ScanDevice):
         bad_frame = False
 
         if complete:
-            if len(self.__buffer) > 0 and len(self.__buffer[-1]) != len(data_elements):
-                self.__buffer = list()
-            self.__buffer.append(data_elements)
-            # all new frames go to the end of the buffer list
-            # the buffer up to buffer_size is the recording buffer
-            # the buffer past the buffer_size is the view buffer
-            # the buffer elements past the buffer size can be removed during viewing
-            while len(self.__buffer) > self.__sequence_buffer_size + self.__view_buffer_size:
-                del self.__buffer[self.__sequence_buffer_size]
+            if len(self.__view_buffer) > 0 and len(self.__view_buffer[-1]) != len(data_elements):
+                self.__view_buffer.clear()
+            # all new frames go to the end of the view buffer, which keeps the most recent frames. frames also go to
+            # the sequence buffer until it has received the sequence count.
+            self.__view_buffer.append(data_elements)
+            self.__sequence_buffer.append(data_elements, self.__cancel_event)
             self.__is_scanning = False
+            # the next frame starts on the next read, so it is available to be read immediately.
+            on_data_available = getattr(self, "on_data_available", None)
+            if callable(on_data_available):
+                on_data_available()
 
         return data_elements, complete, bad_frame, sub_area, frame_number, pixels_to_skip
 
@@ -371,6 +529,11 @@ class Device(scan_base.ScanDevice):
         """
         self.__frame_parameters = ScanFrameParameters(frame_parameters.as_dict())
 
+    def set_subscan_geometry(self, frame_parameters: scan_base.ScanFrameParameters) -> None:
+        """Called when only the subscan position, size, or rotation changes, for instance while dragging a subscan."""
+        for parameter_name in scan_base.SUBSCAN_GEOMETRY_PARAMETER_NAMES:
+            self.__frame_parameters.set_parameter(parameter_name, frame_parameters.get_parameter(parameter_name))
+
     def set_scan_context_probe_position(self, scan_context: stem_controller.ScanContext, probe_position: typing.Optional[Geometry.FloatPoint]) -> None:
         self.__instrument._set_scan_context_probe_position(scan_context, probe_position)
 
@@ -381,7 +544,7 @@ class Device(scan_base.ScanDevice):
     def start_frame(self, is_continuous: bool) -> int:
         """Start acquiring. Return the frame number."""
         if not self.__is_scanning:
-            self.__buffer = list()
+            self.__view_buffer.clear()
             self.__start_next_frame()
         return self.__frame_number
 
@@ -399,12 +562,21 @@ class Device(scan_base.ScanDevice):
             self.__scan_simulator.pixel_size_nm = Geometry.FloatSize(frame_parameters.fov_size_nm.height / size.height,
                                                                      frame_parameters.fov_size_nm.width / size.width)
         self.__scan_simulator.external_clock = self.__frame_parameters.external_clock_mode != 0
+        self.__cancel_event.clear()
         self.__is_scanning = True
         self.__flyback_pixels = self.calculate_flyback_pixels(frame_parameters)
+        if frame_parameters.external_clock_mode == 0:
+            # the frame is complete after its scan time; a synchronized scan is paced by the camera instead.
+            frame_time = size.height * size.width * frame_parameters.pixel_time_us / 1E6
+            self.__set_frame_deadline(self.__frame.start_time + frame_time)
+        else:
+            self.__set_frame_deadline(None)
 
     def cancel(self) -> None:
         """Cancel acquisition (immediate)."""
         self.__is_scanning = False
+        self.__cancel_event.set()
+        self.__set_frame_deadline(None)
 
     def stop(self) -> None:
         """Stop acquiring."""
@@ -426,23 +598,26 @@ class Device(scan_base.ScanDevice):
         return (scan_width + flyback_pixels) * camera_exposure_ms / 1000 * 1.5
 
     def set_sequence_buffer_size(self, buffer_size: int) -> None:
-        self.__sequence_buffer_size = buffer_size
-        self.__buffer = list()
+        self.__sequence_buffer.reset(buffer_size)
+
+    def set_sequence_buffer_limits(self, max_bytes: typing.Optional[int], overflow_policy: scan_base.SequenceBufferOverflowPolicy) -> None:
+        self.__sequence_buffer.set_limits(max_bytes, overflow_policy)
 
     def get_sequence_buffer_count(self) -> int:
-        return len(self.__buffer)
+        return self.__sequence_buffer.count
+
+    def get_sequence_buffer_statistics(self) -> scan_base.SequenceBufferStatistics:
+        return self.__sequence_buffer.statistics
 
     def pop_sequence_buffer_data(self) -> typing.List[typing.Dict[str, typing.Any]]:
-        self.__sequence_buffer_size -= 1
-        return self.__buffer.pop(0)
+        return self.__sequence_buffer.pop()
 
     def get_buffer_data(self, start: int, count: int) -> typing.List[typing.List[typing.Dict[str, typing.Any]]]:
-        # print(f"get {start=} {count=} {len(self.__buffer)=}")
-        # time.sleep(0.1)
+        buffer = list(self.__view_buffer)
         if start < 0:
-            return self.__buffer[start: start+count if count < -start else None]
+            return buffer[start: start+count if count < -start else None]
         else:
-            return self.__buffer[start: start+count]
+            return buffer[start: start+count]
 
     def calculate_flyback_pixels(self, frame_parameters: scan_base.ScanFrameParameters) -> int:
         return 2
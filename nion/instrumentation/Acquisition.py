@@ -2194,6 +2194,161 @@ class MaskedSumOperator(DataStreamOperator):
         return [ChannelData(channel_data.channel, summed_xdata)]
 
 
+class DatumReductionOperator(DataStreamOperator):
+    """Base class for operators reducing the datum dimensions of each frame.
+
+    Subclasses implement `reduce_data` and `reduce_calibrations`. Both operate on the trailing datum dimensions only
+    so that the reduction can be applied to a whole block of frames at once, for instance by a camera device stream
+    on partial data before it is copied into the destination.
+
+    Integer data is accumulated as int64 (or float64 for uint64) so that sums of camera counts do not overflow.
+    """
+
+    @staticmethod
+    def reduce_dtype(dtype: numpy.typing.DTypeLike) -> numpy.dtype[typing.Any]:
+        """Return the dtype of the reduced data for data of dtype."""
+        dtype = numpy.dtype(dtype)
+        if dtype.kind in "biu":
+            return numpy.promote_types(dtype, numpy.int64)
+        return dtype
+
+    def reduce_data(self, data: _NDArray, datum_dimension_count: int) -> _NDArray:
+        """Return the data reduced over the trailing datum dimensions. Leading dimensions are preserved."""
+        raise NotImplementedError()
+
+    def reduce_calibrations(self, datum_shape: ShapeType, datum_calibrations: typing.Sequence[Calibration.Calibration]) -> typing.Tuple[ShapeType, typing.Sequence[Calibration.Calibration]]:
+        """Return the reduced datum shape and calibrations."""
+        raise NotImplementedError()
+
+    def reduce_data_metadata(self, data_metadata: DataAndMetadata.DataMetadata) -> DataAndMetadata.DataMetadata:
+        data_descriptor = data_metadata.data_descriptor
+        datum_dimension_count = data_descriptor.datum_dimension_count
+        navigation_count = len(data_metadata.data_shape) - datum_dimension_count
+        dimensional_calibrations = list(data_metadata.dimensional_calibrations)
+        datum_shape, datum_calibrations = self.reduce_calibrations(tuple(data_metadata.data_shape[navigation_count:]), dimensional_calibrations[navigation_count:])
+        data_dtype = data_metadata.data_dtype
+        assert data_dtype is not None
+        return DataAndMetadata.DataMetadata(
+            data_shape=tuple(data_metadata.data_shape[:navigation_count]) + tuple(datum_shape), data_dtype=self.reduce_dtype(data_dtype),
+            intensity_calibration=data_metadata.intensity_calibration,
+            dimensional_calibrations=dimensional_calibrations[:navigation_count] + list(datum_calibrations),
+            metadata=data_metadata.metadata,
+            timestamp=data_metadata.timestamp,
+            data_descriptor=DataAndMetadata.DataDescriptor(data_descriptor.is_sequence, data_descriptor.collection_dimension_count, len(datum_shape)),
+            timezone=data_metadata.timezone,
+            timezone_offset=data_metadata.timezone_offset
+        )
+
+    def transform_data_stream_info(self, channel: Channel, data_stream_info: DataStreamInfo) -> DataStreamInfo:
+        return DataStreamInfo(self.reduce_data_metadata(data_stream_info.data_metadata), data_stream_info.duration)
+
+    def _process(self, channel_data: ChannelData) -> typing.Sequence[ChannelData]:
+        data_and_metadata = channel_data.data_and_metadata
+        data = data_and_metadata.data
+        assert data is not None
+        data_metadata = self.reduce_data_metadata(data_and_metadata.data_metadata)
+        reduced_data = self.reduce_data(data, data_and_metadata.datum_dimension_count)
+        reduced_xdata = DataAndMetadata.new_data_and_metadata(reduced_data,
+                                                              intensity_calibration=data_metadata.intensity_calibration,
+                                                              dimensional_calibrations=data_metadata.dimensional_calibrations,
+                                                              data_descriptor=data_metadata.data_descriptor,
+                                                              metadata=data_and_metadata.metadata,
+                                                              timestamp=data_and_metadata.timestamp,
+                                                              timezone=data_and_metadata.timezone,
+                                                              timezone_offset=data_and_metadata.timezone_offset)
+        return [ChannelData(channel_data.channel, reduced_xdata)]
+
+
+class BinningOperator(DatumReductionOperator):
+    """Bin each frame in software by summing blocks of pixels.
+
+    The binning is a sequence of factors, one per datum dimension. Pixels that do not fill a whole bin at the end of a
+    dimension are dropped.
+    """
+
+    def __init__(self, binning: typing.Sequence[int]) -> None:
+        super().__init__()
+        assert all(b >= 1 for b in binning)
+        self.__binning = tuple(binning)
+
+    def __str__(self) -> str:
+        return f"binning {self.__binning}"
+
+    def __deepcopy__(self, memo: typing.Dict[typing.Any, typing.Any]) -> BinningOperator:
+        return BinningOperator(self.__binning)
+
+    @property
+    def binning(self) -> typing.Tuple[int, ...]:
+        return self.__binning
+
+    def reduce_data(self, data: _NDArray, datum_dimension_count: int) -> _NDArray:
+        assert datum_dimension_count == len(self.__binning)
+        navigation_shape = data.shape[:len(data.shape) - datum_dimension_count]
+        datum_shape = data.shape[len(navigation_shape):]
+        binned_shape = tuple(n // b for n, b in zip(datum_shape, self.__binning))
+        # crop to a whole number of bins, then sum over an extra axis per datum dimension.
+        cropped_data = data[(Ellipsis,) + tuple(slice(0, n * b) for n, b in zip(binned_shape, self.__binning))]
+        split_shape = tuple(v for n, b in zip(binned_shape, self.__binning) for v in (n, b))
+        bin_axes = tuple(len(navigation_shape) + 2 * i + 1 for i in range(datum_dimension_count))
+        return numpy.sum(cropped_data.reshape(navigation_shape + split_shape), axis=bin_axes, dtype=self.reduce_dtype(data.dtype))
+
+    def reduce_calibrations(self, datum_shape: ShapeType, datum_calibrations: typing.Sequence[Calibration.Calibration]) -> typing.Tuple[ShapeType, typing.Sequence[Calibration.Calibration]]:
+        assert len(datum_shape) == len(self.__binning)
+        binned_shape = tuple(n // b for n, b in zip(datum_shape, self.__binning))
+        binned_calibrations = [Calibration.Calibration(c.offset, c.scale * b, c.units) for c, b in zip(datum_calibrations, self.__binning)]
+        return binned_shape, binned_calibrations
+
+
+class ProjectionOperator(DatumReductionOperator):
+    """Crop each frame to a region of interest and sum along an axis.
+
+    The region is a sequence of (start, stop) intervals, one per datum dimension, with None meaning the full extent.
+    The axis is the datum dimension to sum over. For instance, a region ((100, 200),) with axis 0 sums an energy window
+    of a spectrum; a region ((40, 60), None) with axis 0 projects a band of a 2D frame onto a spectrum.
+    """
+
+    def __init__(self, region: typing.Sequence[typing.Optional[typing.Tuple[int, int]]], axis: int) -> None:
+        super().__init__()
+        assert 0 <= axis < len(region)
+        self.__region = tuple(region)
+        self.__axis = axis
+
+    def __str__(self) -> str:
+        return f"projection {self.__region} axis {self.__axis}"
+
+    def __deepcopy__(self, memo: typing.Dict[typing.Any, typing.Any]) -> ProjectionOperator:
+        return ProjectionOperator(self.__region, self.__axis)
+
+    @property
+    def region(self) -> typing.Tuple[typing.Optional[typing.Tuple[int, int]], ...]:
+        return self.__region
+
+    @property
+    def axis(self) -> int:
+        return self.__axis
+
+    def __get_slices(self, datum_shape: ShapeType) -> typing.Tuple[slice, ...]:
+        return tuple(slice(*r) if r is not None else slice(0, n) for r, n in zip(self.__region, datum_shape))
+
+    def reduce_data(self, data: _NDArray, datum_dimension_count: int) -> _NDArray:
+        assert datum_dimension_count == len(self.__region)
+        datum_shape = data.shape[len(data.shape) - datum_dimension_count:]
+        cropped_data = data[(Ellipsis,) + self.__get_slices(datum_shape)]
+        return numpy.sum(cropped_data, axis=self.__axis - datum_dimension_count, dtype=self.reduce_dtype(data.dtype))
+
+    def reduce_calibrations(self, datum_shape: ShapeType, datum_calibrations: typing.Sequence[Calibration.Calibration]) -> typing.Tuple[ShapeType, typing.Sequence[Calibration.Calibration]]:
+        assert len(datum_shape) == len(self.__region)
+        slices = self.__get_slices(datum_shape)
+        reduced_shape = list[int]()
+        reduced_calibrations = list[Calibration.Calibration]()
+        for i, (s, c) in enumerate(zip(slices, datum_calibrations)):
+            if i != self.__axis:
+                start, stop, _ = s.indices(datum_shape[i])
+                reduced_shape.append(max(stop - start, 0))
+                reduced_calibrations.append(Calibration.Calibration(c.offset + start * c.scale, c.scale, c.units))
+        return tuple(reduced_shape), reduced_calibrations
+
+
 class MoveAxisDataStreamOperator(DataStreamOperator):
     def __init__(self, channel: typing.Optional[Channel] = None) -> None:
         super().__init__()
@@ -2249,6 +2404,71 @@ class MoveAxisDataStreamOperator(DataStreamOperator):
             return [channel_data]
 
 
+class ChannelSplitOperator(DataStreamOperator):
+    """Split data with the channels stacked along the last datum dimension into separate channels.
+
+    This allows a data stream to send the data for several channels in a single packet and split it into the
+    individual channels only when the data is framed.
+    """
+
+    def __init__(self, channels: typing.Sequence[Channel]) -> None:
+        super().__init__()
+        self.__channels = tuple(channels)
+
+    def __str__(self) -> str:
+        return f"channel-split ({len(self.__channels)})"
+
+    def __deepcopy__(self, memo: typing.Dict[typing.Any, typing.Any]) -> ChannelSplitOperator:
+        return ChannelSplitOperator(self.__channels)
+
+    def get_channels(self, input_channels: typing.Sequence[Channel]) -> typing.Sequence[Channel]:
+        return self.__channels
+
+    def __get_split_data_descriptor(self, data_descriptor: DataAndMetadata.DataDescriptor) -> DataAndMetadata.DataDescriptor:
+        # removing the channel dimension from scalar datums turns the collection dimensions into datum dimensions.
+        assert data_descriptor.datum_dimension_count > 0
+        if data_descriptor.datum_dimension_count > 1:
+            return DataAndMetadata.DataDescriptor(data_descriptor.is_sequence, data_descriptor.collection_dimension_count, data_descriptor.datum_dimension_count - 1)
+        return DataAndMetadata.DataDescriptor(data_descriptor.is_sequence, 0, data_descriptor.collection_dimension_count)
+
+    def transform_data_stream_info(self, channel: Channel, data_stream_info: DataStreamInfo) -> DataStreamInfo:
+        data_metadata = data_stream_info.data_metadata
+        assert data_metadata.data_shape[-1] == len(self.__channels)
+        data_dtype = data_metadata.data_dtype
+        assert data_dtype is not None
+        data_metadata = DataAndMetadata.DataMetadata(
+            data_shape=data_metadata.data_shape[:-1], data_dtype=data_dtype,
+            intensity_calibration=data_metadata.intensity_calibration,
+            dimensional_calibrations=list(data_metadata.dimensional_calibrations)[:-1],
+            metadata=data_metadata.metadata,
+            timestamp=data_metadata.timestamp,
+            data_descriptor=self.__get_split_data_descriptor(data_metadata.data_descriptor),
+            timezone=data_metadata.timezone,
+            timezone_offset=data_metadata.timezone_offset
+        )
+        return DataStreamInfo(data_metadata, data_stream_info.duration)
+
+    def _process(self, channel_data: ChannelData) -> typing.Sequence[ChannelData]:
+        data_and_metadata = channel_data.data_and_metadata
+        data = data_and_metadata.data
+        assert data is not None
+        assert data.shape[-1] == len(self.__channels)
+        data_descriptor = self.__get_split_data_descriptor(data_and_metadata.data_descriptor)
+        dimensional_calibrations = list(data_and_metadata.dimensional_calibrations)[:-1]
+        channel_data_list = list()
+        for channel_index, channel in enumerate(self.__channels):
+            split_xdata = DataAndMetadata.new_data_and_metadata(data[..., channel_index],
+                                                                intensity_calibration=data_and_metadata.intensity_calibration,
+                                                                dimensional_calibrations=dimensional_calibrations,
+                                                                data_descriptor=data_descriptor,
+                                                                metadata=data_and_metadata.metadata,
+                                                                timestamp=data_and_metadata.timestamp,
+                                                                timezone=data_and_metadata.timezone,
+                                                                timezone_offset=data_and_metadata.timezone_offset)
+            channel_data_list.append(ChannelData(channel, split_xdata))
+        return channel_data_list
+
+
 class ContainerDataStream(DataStream):
     """An abstract class to contain another data stream and facilitate decoration in subclasses."""
     def __init__(self, data_stream: DataStream) -> None:
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 # system imports
 import asyncio
+import collections
 import copy
 import datetime
 import functools
@@ -9,13 +10,17 @@ import gettext
 import math
 import numpy
 import numpy.typing
+import scipy.fft
+import scipy.ndimage
 import threading
+import time
 import typing
 import weakref
 
 # local libraries
 from nion.data import Calibration
 from nion.data import DataAndMetadata
+from nion.data import TemplateMatching
 from nion.data import xdata_1_0 as xd
 from nion.instrumentation import Acquisition
 from nion.instrumentation import AcquisitionPreferences
@@ -24,7 +29,6 @@ from nion.utils import DateTime
 from nion.utils import Event
 from nion.utils import Geometry
 from nion.utils import Registry
-from nion.utils import ThreadPool
 
 if typing.TYPE_CHECKING:
     from nion.swift.model import DocumentModel
@@ -82,6 +86,220 @@ class DriftLogger:
         self.__event_loop.call_soon_threadsafe(functools.partial(self.__update_drift_log_data_item, delta_nm_data))
 
 
+class _DriftHistory:
+    """History of drift measurements.
+
+    Each measurement is a column of delta height (nm), delta width (nm), delta magnitude (nm), and delta time (s). The
+    storage doubles in size when it is full, so appending is amortized constant time. If max_length is specified, only
+    the most recent max_length measurements are kept. The count and total time include discarded measurements.
+    """
+
+    def __init__(self, max_length: typing.Optional[int] = None) -> None:
+        assert max_length is None or max_length > 0
+        self.__max_length = max_length
+        self.__data: numpy.typing.NDArray[numpy.float64] = numpy.zeros((4, 16), float)
+        self.__start = 0
+        self.__stop = 0
+        self.__count = 0
+        self.__total_time = 0.0
+
+    @property
+    def max_length(self) -> typing.Optional[int]:
+        return self.__max_length
+
+    @property
+    def data(self) -> numpy.typing.NDArray[numpy.float64]:
+        """Return a view of the kept measurements."""
+        return self.__data[:, self.__start:self.__stop]
+
+    @property
+    def length(self) -> int:
+        return self.__stop - self.__start
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def total_time(self) -> float:
+        return self.__total_time
+
+    def append(self, delta_height: float, delta_width: float, delta_magnitude: float, delta_time: float) -> None:
+        if self.__max_length is not None and self.length == self.__max_length:
+            self.__start += 1
+        capacity = self.__data.shape[-1]
+        if self.__stop == capacity:
+            length = self.length
+            if length <= capacity // 2:
+                # the window has moved away from the start of the storage; move it back.
+                self.__data[:, :length] = self.__data[:, self.__start:self.__stop]
+            else:
+                data: numpy.typing.NDArray[numpy.float64] = numpy.zeros((4, capacity * 2), float)
+                data[:, :length] = self.__data[:, self.__start:self.__stop]
+                self.__data = data
+            self.__start = 0
+            self.__stop = length
+        self.__data[:, self.__stop] = (delta_height, delta_width, delta_magnitude, delta_time)
+        self.__stop += 1
+        self.__count += 1
+        self.__total_time += delta_time
+
+
+def _bin_data(data: _NDArray, binning: int) -> _NDArray:
+    """Return 2d data averaged over binning x binning blocks, dropping rows and columns that don't fill a block."""
+    if binning > 1:
+        height = data.shape[0] // binning
+        width = data.shape[1] // binning
+        data = data[:height * binning, :width * binning].reshape(height, binning, width, binning).mean(axis=(1, 3))
+    return data
+
+
+def _get_wrapped_slices(start: int, length: int, size: int) -> typing.List[typing.Tuple[slice, slice]]:
+    """Return the (source, destination) slices that copy length items starting at start, wrapping around size."""
+    start %= size
+    if start + length <= size:
+        return [(slice(start, start + length), slice(0, length))]
+    return [(slice(start, size), slice(0, size - start)), (slice(0, start + length - size), slice(size - start, length))]
+
+
+class _NormalizedCorrelation:
+    """Normalized cross-correlation of templates with a fixed image.
+
+    Gives the same result as TemplateMatching.match_template, but the Fourier transform and the local variance of the
+    image are computed once per template shape rather than once per template. Values can also be computed at single
+    positions without computing the whole correlation.
+    """
+
+    def __init__(self, image: _NDArray) -> None:
+        self.__image = image.astype(numpy.float64)
+        self.__template_shape: typing.Optional[typing.Tuple[int, ...]] = None
+        self.__fft_image: typing.Optional[_NDArray] = None
+        self.__image_variance: typing.Optional[_NDArray] = None
+        self.__max_image_variance = 0.0
+
+    @property
+    def shape(self) -> typing.Tuple[int, ...]:
+        return typing.cast(typing.Tuple[int, ...], self.__image.shape)
+
+    def __prepare(self, template_shape: typing.Tuple[int, ...]) -> typing.Tuple[_NDArray, _NDArray]:
+        # the local variance of the image depends on the template shape; it is computed again only if it changes.
+        assert numpy.less_equal(template_shape, self.__image.shape).all()
+        if template_shape != self.__template_shape or self.__fft_image is None or self.__image_variance is None:
+            image = self.__image
+            fft_image = scipy.fft.fft2(image)
+            fft_image_squared_means = scipy.ndimage.fourier_uniform(scipy.fft.fft2(image ** 2), template_shape)
+            image_means_squared = (scipy.fft.ifft2(scipy.ndimage.fourier_uniform(fft_image, template_shape)).real) ** 2
+            self.__image_variance = scipy.fft.ifft2(fft_image_squared_means).real - image_means_squared
+            self.__max_image_variance = float(numpy.amax(self.__image_variance))
+            self.__fft_image = fft_image
+            self.__template_shape = template_shape
+        return self.__fft_image, self.__image_variance
+
+    def correlate(self, template: _NDArray) -> _NDArray:
+        """Return the normalized cross-correlation of the template with the image, as TemplateMatching.match_template."""
+        image = self.__image
+        template = template.astype(numpy.float64)
+        fft_image, image_variance = self.__prepare(template.shape)
+        # only normalizing the template is equivalent to normalizing both, as in TemplateMatching.normalized_corr.
+        normalized_template = template - numpy.mean(template)
+        fft_corr = fft_image * scipy.fft.fft2(normalized_template[::-1, ::-1], s=image.shape)
+        corr = numpy.roll(scipy.fft.ifft2(fft_corr).real, shift=_NormalizedCorrelation.__get_shift(template.shape), axis=(0, 1))
+        denom = image_variance * template.size * numpy.sum(normalized_template ** 2)
+        denom[denom < 0] = numpy.amax(denom)
+        ccorr = corr / numpy.sqrt(denom)
+        ccorr[ccorr > 1.1] = 0
+        return typing.cast(_NDArray, ccorr)
+
+    def correlate_around(self, template: _NDArray, position: typing.Tuple[int, int]) -> _NDArray:
+        """Return the 3x3 values of correlate(template) centered on position, computed without the Fourier transform.
+
+        The position must be at least one pixel from the edges of the image.
+        """
+        image = self.__image
+        template = template.astype(numpy.float64)
+        _, image_variance = self.__prepare(template.shape)
+        normalized_template = template - numpy.mean(template)
+        template_norm = template.size * numpy.sum(normalized_template ** 2)
+        shift = _NormalizedCorrelation.__get_shift(template.shape)
+        ccorr = numpy.empty((3, 3))
+        for i in range(3):
+            for j in range(3):
+                y, x = position[0] + i - 1, position[1] + j - 1
+                # the correlation at (y, x) correlates the template with the image window starting at these indexes,
+                # wrapping around the edges of the image. sum the contiguous blocks of the window to avoid copies.
+                top = y - shift[0] - (template.shape[0] - 1)
+                left = x - shift[1] - (template.shape[1] - 1)
+                corr = 0.0
+                for image_rows, template_rows in _get_wrapped_slices(top, template.shape[0], image.shape[0]):
+                    for image_columns, template_columns in _get_wrapped_slices(left, template.shape[1], image.shape[1]):
+                        corr += float(numpy.einsum("ij,ij->", image[image_rows, image_columns], normalized_template[template_rows, template_columns]))
+                denom = image_variance[y, x] * template_norm
+                if denom < 0:
+                    denom = self.__max_image_variance * template_norm
+                ccorr[i, j] = corr / numpy.sqrt(denom)
+        ccorr[ccorr > 1.1] = 0
+        return ccorr
+
+    @staticmethod
+    def __get_shift(template_shape: typing.Tuple[int, ...]) -> typing.Tuple[int, int]:
+        # the correlation is shifted back by half the template size.
+        return int(-1 * (template_shape[0] - 1) / 2), int(-1 * (template_shape[1] - 1) / 2)
+
+
+class _RegistrationReference:
+    """Reference image for drift registration.
+
+    Registering an image gives the same result as xd.register_template with the reference as the image and the new
+    image as the template, but the Fourier transform and local variance of the reference are only computed once, so
+    each registration transforms only the new image.
+
+    If binning is greater than 1, the offset is first found on images binned by that factor. It is then refined at full
+    resolution by computing the correlation only around the peak, moving to the highest neighbor until the peak is
+    found, and fitting the subpixel position there. So binning costs little precision for images of the same shape.
+    Images of different shapes are registered at full resolution.
+    """
+
+    def __init__(self, xdata: DataAndMetadata.DataAndMetadata, binning: int = 1) -> None:
+        data = xdata.data
+        assert data is not None and data.ndim == 2
+        self.__binning = max(binning, 1)
+        self.__correlation = _NormalizedCorrelation(data)
+        self.__binned_correlation = _NormalizedCorrelation(_bin_data(data, self.__binning)) if self.__binning > 1 else None
+
+    def register(self, xdata: DataAndMetadata.DataAndMetadata) -> typing.Tuple[float, typing.Tuple[float, ...]]:
+        """Return the quality and the offset in pixels of xdata relative to the reference."""
+        data = xdata.data
+        assert data is not None and data.ndim == 2
+        shape = self.__correlation.shape
+        if self.__binned_correlation and data.shape == shape:
+            return self.__register_binned(self.__binned_correlation, data)
+        error, ccoeff, max_pos = TemplateMatching.find_ccorr_max(self.__correlation.correlate(data))
+        if not error and ccoeff is not None and max_pos is not None:
+            return float(ccoeff), tuple(max_pos[i] - shape[i] // 2 for i in range(len(shape)))
+        return 0.0, (0.0, ) * len(shape)
+
+    def __register_binned(self, binned_correlation: _NormalizedCorrelation, data: _NDArray) -> typing.Tuple[float, typing.Tuple[float, ...]]:
+        shape = self.__correlation.shape
+        binned_shape = binned_correlation.shape
+        error, ccoeff, max_pos = TemplateMatching.find_ccorr_max(binned_correlation.correlate(_bin_data(data, self.__binning)))
+        if error or ccoeff is None or max_pos is None:
+            return 0.0, (0.0, ) * len(shape)
+        # scale the binned peak to full resolution, then move to the highest neighbor until the peak is found.
+        position = [round((max_pos[i] - binned_shape[i] // 2) * self.__binning) + shape[i] // 2 for i in range(len(shape))]
+        for step in range(2 * self.__binning + 1):
+            if not all(1 <= position[i] <= shape[i] - 2 for i in range(len(shape))):
+                return 0.0, (0.0, ) * len(shape)
+            ccorr = self.__correlation.correlate_around(data, (position[0], position[1]))
+            peak = tuple(int(p) for p in numpy.unravel_index(numpy.argmax(ccorr), ccorr.shape))
+            if peak == (1, 1):
+                error, ccoeff, max_pos = TemplateMatching.find_ccorr_max(ccorr)
+                if not error and ccoeff is not None and max_pos is not None:
+                    return float(ccoeff), tuple(position[i] - 1 + max_pos[i] - shape[i] // 2 for i in range(len(shape)))
+                break
+            position = [position[i] + peak[i] - 1 for i in range(len(shape))]
+        return 0.0, (0.0, ) * len(shape)
+
+
 class DriftTracker:
     """Track drift state.
 
@@ -94,34 +312,60 @@ class DriftTracker:
 
     An extension to this class would be to separate the drift algorithm into its own class and allow it to be
     configured.
-    """
-    def __init__(self) -> None:
-        # dispatcher is used to calculate drift offsets on a thread
-        self.__dispatcher = ThreadPool.SingleItemDispatcher()
 
+    If max_history_length is specified, only the most recent measurements are kept in the drift data frame. The total
+    drift and elapsed time still include all measurements.
+
+    The Fourier transform of the first image is computed once and reused for each measurement. If registration_binning
+    is greater than 1, the drift is found on images binned by that factor and refined at full resolution around it.
+
+    Images submitted without waiting are measured on a dedicated worker thread. If a newer image is submitted before
+    the worker picks up the pending one, the pending image is superseded and counted in skipped_measurement_count.
+    """
+    def __init__(self, *, max_history_length: typing.Optional[int] = None, registration_binning: int = 1) -> None:
         # the lock controls access to the fields below
         self.__lock = threading.RLock()
 
-        #  The current data item is used for the delta calculation only.
+        # the registration lock serializes registrations, which run outside of the lock.
+        self.__registration_lock = threading.Lock()
+
+        # the measurement condition guards the pending image handed to the measurement thread.
+        self.__measurement_condition = threading.Condition(self.__lock)
+        self.__pending_xdata: typing.Optional[DataAndMetadata.DataAndMetadata] = None
+        self.__is_measuring = False
+        self.__is_closing = False
+        self.__measurement_thread: typing.Optional[threading.Thread] = None
+        self.__skipped_measurement_count = 0
+        self.__last_measurement_time: typing.Optional[float] = None
+
+        #  The first data item is the reference for the delta calculation.
         self.__first_xdata: typing.Optional[DataAndMetadata.DataAndMetadata] = None
-        self.__current_xdata: typing.Optional[DataAndMetadata.DataAndMetadata] = None
         self.__rotation = 0.0
+        self.__registration_binning = registration_binning
+        self.__registration_reference: typing.Optional[_RegistrationReference] = None
 
-        self.__drift_data_frame: numpy.typing.NDArray[numpy.float64] = numpy.zeros((4, 0), float)
+        self.__drift_history = _DriftHistory(max_history_length)
 
         self.__total_delta_nm = Geometry.FloatSize()
 
         self.drift_changed_event = Event.Event()
 
     def close(self) -> None:
-        self.__dispatcher.close()
-        self.__dispatcher = typing.cast(typing.Any, None)
+        with self.__measurement_condition:
+            self.__is_closing = True
+            self.__measurement_condition.notify_all()
+            measurement_thread = self.__measurement_thread
+            self.__measurement_thread = None
+        if measurement_thread:
+            measurement_thread.join()
 
     def reset(self) -> None:
         with self.__lock:
             self.__first_xdata = None
-            self.__current_xdata = None
-            self.__drift_data_frame = numpy.zeros((4, 0), float)
+            self.__pending_xdata = None
+            self.__last_measurement_time = None
+            self.__registration_reference = None
+            self.__drift_history = _DriftHistory(self.__drift_history.max_length)
             self.__rotation = 0.0
             self.__total_delta_nm = Geometry.FloatSize()
 
@@ -133,7 +377,7 @@ class DriftTracker:
     @property
     def measurement_count(self) -> int:
         with self.__lock:
-            return typing.cast(int, self.__drift_data_frame.shape[-1])
+            return self.__drift_history.count
 
     @property
     def total_delta_nm(self) -> Geometry.FloatSize:
@@ -142,24 +386,37 @@ class DriftTracker:
     @property
     def drift_data_frame(self) -> _NDArray:
         with self.__lock:
-            return numpy.copy(self.__drift_data_frame)  # type: ignore
+            return numpy.copy(self.__drift_history.data)
 
     @property
     def last_delta_nm(self) -> Geometry.FloatSize:
         with self.__lock:
-            if self.measurement_count > 0:
-                width = self.__drift_data_frame[1][-1]
-                height = self.__drift_data_frame[0][-1]
+            if self.__drift_history.length > 0:
+                drift_data_frame = self.__drift_history.data
+                width = drift_data_frame[1][-1]
+                height = drift_data_frame[0][-1]
             else:
                 width = 0.0
                 height = 0.0
             return Geometry.FloatSize(height=height, width=width)
 
+    @property
+    def skipped_measurement_count(self) -> int:
+        """Return the number of submitted images superseded by a newer image before being measured."""
+        with self.__lock:
+            return self.__skipped_measurement_count
+
+    @property
+    def last_measurement_time(self) -> typing.Optional[float]:
+        """Return the time (as from time.time) at which the most recent measurement completed."""
+        with self.__lock:
+            return self.__last_measurement_time
+
     @property
     def _last_entry_utc_time(self) -> datetime.datetime:
         if self.__first_xdata:
             # self.__first_xdata.timestamp is utc datetime, so just use 'fromtimestamp' to get utc POSIX timestamp
-            return datetime.datetime.fromtimestamp(self.__first_xdata.timestamp.timestamp() + numpy.sum(self.__drift_data_frame[3]))
+            return datetime.datetime.fromtimestamp(self.__first_xdata.timestamp.timestamp() + self.__drift_history.total_time)
         else:
             return DateTime.utcnow()
 
@@ -168,13 +425,14 @@ class DriftTracker:
         n = 3 if n is None else n
         assert n > 0
         with self.__lock:
-            if self.measurement_count > 0:
+            if self.__drift_history.length > 0:
                 assert self.__first_xdata
-                n = min(n, self.measurement_count)
-                offset_v = typing.cast(float, numpy.sum(self.__drift_data_frame[0][-n:]))
-                offset_h = typing.cast(float, numpy.sum(self.__drift_data_frame[1][-n:]))
+                n = min(n, self.__drift_history.length)
+                drift_data_frame = self.__drift_history.data
+                offset_v = typing.cast(float, numpy.sum(drift_data_frame[0][-n:]))
+                offset_h = typing.cast(float, numpy.sum(drift_data_frame[1][-n:]))
                 recent_offset = Geometry.FloatSize(h=offset_v, w=offset_h)
-                recent_time = typing.cast(float, numpy.sum(self.__drift_data_frame[3][-n:]))
+                recent_time = typing.cast(float, numpy.sum(drift_data_frame[3][-n:]))
                 return recent_offset / recent_time
             return Geometry.FloatSize()
 
@@ -182,9 +440,9 @@ class DriftTracker:
         """Predict total drift (nm) at utc_time."""
         with self.__lock:
             future_delta_nm = Geometry.FloatSize()
-            if self.__drift_data_frame.shape[-1] > 0:
+            if self.__drift_history.count > 0:
                 assert self.__first_xdata
-                last_entry_timestamp = self.__first_xdata.timestamp.timestamp() + numpy.sum(self.__drift_data_frame[3])
+                last_entry_timestamp = self.__first_xdata.timestamp.timestamp() + self.__drift_history.total_time
                 delta_timestamp = utc_time.timestamp() - last_entry_timestamp
                 future_delta_nm = delta_timestamp * self.get_drift_rate(n=n)
             return self.__total_delta_nm + future_delta_nm
@@ -192,53 +450,115 @@ class DriftTracker:
     def __append_drift(self, delta_nm: Geometry.FloatSize, delta_time: float) -> None:
         offset_nm_xy = math.sqrt(pow(delta_nm.height, 2) + pow(delta_nm.width, 2))
         with self.__lock:
-            self.__drift_data_frame = numpy.hstack(
-                [self.__drift_data_frame, numpy.array([delta_nm.height, delta_nm.width, offset_nm_xy, delta_time]).reshape(4, 1)])
+            self.__drift_history.append(delta_nm.height, delta_nm.width, offset_nm_xy, delta_time)
+
+    def __get_delta_time(self, first_xdata: DataAndMetadata.DataAndMetadata, current_xdata: DataAndMetadata.DataAndMetadata) -> float:
+        # the time between the last measurement and the current image. call with the lock held.
+        return (current_xdata.timestamp - first_xdata.timestamp).total_seconds() - self.__drift_history.total_time
 
-    def __calculate(self) -> None:
+    def __calculate(self, current_xdata: DataAndMetadata.DataAndMetadata) -> None:
+        # take the inputs under the lock, but register outside of it so that submitting images and reading the drift
+        # are not blocked during registration. then lock again to record the measurement.
         with self.__lock:
             first_xdata = self.__first_xdata
-            current_xdata = self.__current_xdata
             rotation = self.__rotation
-
-            if first_xdata and current_xdata:
+            registration_reference = self.__registration_reference
+            # an image older than the last measurement (superseded while being measured) is skipped.
+            if first_xdata and self.__get_delta_time(first_xdata, current_xdata) <= 0.0:
+                self.__skipped_measurement_count += 1
+                first_xdata = None
+
+        if not first_xdata:
+            return
+
+        # the registration lock only keeps registrations from running at the same time on the cached reference.
+        with self.__registration_lock:
+            if first_xdata.is_data_2d and current_xdata.is_data_2d:
+                if not registration_reference:
+                    registration_reference = _RegistrationReference(first_xdata, self.__registration_binning)
+                quality, raw_offset = registration_reference.register(current_xdata)
+            else:
                 quality, raw_offset = xd.register_template(first_xdata, current_xdata)
-                delta_time = (current_xdata.timestamp - first_xdata.timestamp).total_seconds() - numpy.sum(self.__drift_data_frame[3])
-                assert delta_time > 0.0
-                offset = Geometry.FloatPoint.make(typing.cast(typing.Tuple[float, float], raw_offset))
-                delta_nm = Geometry.FloatSize(
-                    h=current_xdata.dimensional_calibrations[0].convert_to_calibrated_size(offset.y),
-                    w=current_xdata.dimensional_calibrations[1].convert_to_calibrated_size(offset.x))
-                # calculate adjustment (center_nm). if center_nm positive, data shifts up/left.
-                # rotate back into context reference frame
-                delta_nm = delta_nm.rotate(-rotation)
-                # print(f"measured {delta_nm}")
-                self.__append_drift(delta_nm, delta_time)
-                # add the difference from the last time, but negative since center_nm positive shifts up/left
-                self.__total_delta_nm = self.__total_delta_nm + delta_nm
-
-        # this call is not under lock - so recheck the condition upon which we fire the event.
-        if first_xdata and current_xdata:
-            self.drift_changed_event.fire(delta_nm, delta_time)
+        offset = Geometry.FloatPoint.make(typing.cast(typing.Tuple[float, float], raw_offset))
+        delta_nm = Geometry.FloatSize(
+            h=current_xdata.dimensional_calibrations[0].convert_to_calibrated_size(offset.y),
+            w=current_xdata.dimensional_calibrations[1].convert_to_calibrated_size(offset.x))
+        # calculate adjustment (center_nm). if center_nm positive, data shifts up/left.
+        # rotate back into context reference frame
+        delta_nm = delta_nm.rotate(-rotation)
+        # print(f"measured {delta_nm}")
+
+        with self.__lock:
+            # the tracker may have been reset during registration.
+            if self.__first_xdata is not first_xdata:
+                return
+            # another image may have been measured during registration.
+            delta_time = self.__get_delta_time(first_xdata, current_xdata)
+            if delta_time <= 0.0:
+                self.__skipped_measurement_count += 1
+                return
+            if registration_reference and not self.__registration_reference:
+                self.__registration_reference = registration_reference
+            self.__append_drift(delta_nm, delta_time)
+            # add the difference from the last time, but negative since center_nm positive shifts up/left
+            self.__total_delta_nm = self.__total_delta_nm + delta_nm
+            self.__last_measurement_time = time.time()
+
+        # this call is not under lock.
+        self.drift_changed_event.fire(delta_nm, delta_time)
+
+    def __measure_loop(self) -> None:
+        # measure pending images on the dedicated measurement thread until closed.
+        while True:
+            with self.__measurement_condition:
+                self.__measurement_condition.wait_for(lambda: self.__pending_xdata is not None or self.__is_closing)
+                if self.__is_closing:
+                    return
+                current_xdata = self.__pending_xdata
+                assert current_xdata
+                self.__pending_xdata = None
+                self.__is_measuring = True
+            try:
+                self.__calculate(current_xdata)
+            finally:
+                with self.__measurement_condition:
+                    self.__is_measuring = False
+                    self.__measurement_condition.notify_all()
+
+    def wait_for_pending_measurement(self, timeout: typing.Optional[float] = None) -> bool:
+        """Wait until all submitted images have been measured or skipped. Return False on timeout."""
+        with self.__measurement_condition:
+            return self.__measurement_condition.wait_for(lambda: self.__pending_xdata is None and not self.__is_measuring, timeout)
 
     def submit_image(self, xdata: DataAndMetadata.DataAndMetadata, rotation: float, *, wait: bool = False) -> None:
         # set first data if it hasn't been set or if rotation has changed.
         # otherwise, set current data and be ready to measure.
+        # the copy and the measurement are made outside of the lock so that reading the drift is not blocked.
+        current_xdata = copy.deepcopy(xdata)
+        is_measured_now = False
         with self.__lock:
             global _next_image_index
             _next_image_index += 1
             # useful for debugging.
             # numpy.save(f"/Users/cmeyer/Desktop/n{_next_image_index}.npy", xdata.data)
             if self.__first_xdata and math.isclose(self.__rotation, rotation):
-                self.__current_xdata = copy.deepcopy(xdata)
+                if self.__pending_xdata is not None:
+                    self.__skipped_measurement_count += 1
+                    self.__pending_xdata = None
+                if wait:
+                    is_measured_now = True
+                else:
+                    self.__pending_xdata = current_xdata
+                    if not self.__measurement_thread:
+                        self.__measurement_thread = threading.Thread(target=self.__measure_loop, name="drift_measurement", daemon=True)
+                        self.__measurement_thread.start()
+                    self.__measurement_condition.notify_all()
             else:
                 self.reset()
-                self.__first_xdata = copy.deepcopy(xdata)
+                self.__first_xdata = current_xdata
                 self.__rotation = rotation
-            if wait:
-                self.__calculate()
-            else:
-                self.__dispatcher.dispatch(self.__calculate)
+        if is_measured_now:
+            self.__calculate(current_xdata)
 
 
 # used for debugging
@@ -249,6 +569,11 @@ class DriftCorrectionBehavior:
     """Drift correction behavior for updating drift at beginning of each synchronized scan section.
 
     Take a drift scan from the drift region and send it to the drift compensator.
+
+    If measure_asynchronously is True, the drift scan is measured on the drift tracker's measurement thread and the
+    section uses the most recent completed measurement, extrapolated to the current time. The age of the measurement
+    applied at each section boundary is recorded in measurement_latencies, which keeps only the most recent
+    max_measurement_latencies values so that long acquisitions do not grow it without bound.
     """
 
     def __init__(self,
@@ -259,7 +584,9 @@ class DriftCorrectionBehavior:
                  drift_channel_id: typing.Optional[str],
                  drift_region: typing.Optional[Geometry.FloatRect],
                  drift_rotation: float,
-                 *, use_prediction: bool = True) -> None:
+                 *, use_prediction: bool = True,
+                 measure_asynchronously: bool = False,
+                 max_measurement_latencies: int = 256) -> None:
         # init with the frame parameters from the synchronized grab
         self.__drift_tracker = drift_tracker
         self.__scan_hardware_source = scan_hardware_source
@@ -270,6 +597,8 @@ class DriftCorrectionBehavior:
         self.__drift_rotation = drift_rotation
         self.__drift_scan_interval_index = 0
         self.__use_prediction = use_prediction
+        self.__measure_asynchronously = measure_asynchronously
+        self.__measurement_latencies: typing.Deque[float] = collections.deque(maxlen=max_measurement_latencies)
         # here we convert those frame parameters to the context
         self.__scan_frame_parameters.subscan_pixel_size = None
         self.__scan_frame_parameters.subscan_fractional_size = None
@@ -284,6 +613,11 @@ class DriftCorrectionBehavior:
             return Acquisition.Channel(self.__scan_hardware_source.hardware_source_id, str(drift_channel_index), "drift")
         return Acquisition.Channel(self.__scan_hardware_source.hardware_source_id, "drift")
 
+    @property
+    def measurement_latencies(self) -> typing.Sequence[float]:
+        """Return the seconds between completing each recent applied measurement and applying it, in asynchronous mode."""
+        return list(self.__measurement_latencies)
+
     def prepare_section(self, drift_xdata_list: typing.List[DataAndMetadata.DataAndMetadata], *, utc_time: typing.Optional[datetime.datetime] = None) -> None:
         # if this is called, it means some form of drift-sub-area drift correction has been enabled. if the scan
         # interval is 0, it means every n lines; so do the drift correction here since each section wil have its own
@@ -332,8 +666,13 @@ class DriftCorrectionBehavior:
                     xdatas = self.__scan_hardware_source.record_immediate(frame_parameters)
                     xdata0 = xdatas[0]
                     if xdata0:
-                        self.__drift_tracker.submit_image(xdata0, drift_rotation, wait=True)
+                        self.__drift_tracker.submit_image(xdata0, drift_rotation, wait=not self.__measure_asynchronously)
                         drift_xdata_list.append(xdata0)
+                    if self.__measure_asynchronously:
+                        # the section is about to be prepared using the most recent completed measurement.
+                        last_measurement_time = self.__drift_tracker.last_measurement_time
+                        if last_measurement_time is not None:
+                            self.__measurement_latencies.append(time.time() - last_measurement_time)
         self.__drift_scan_interval_index += 1
 
 
@@ -387,7 +726,8 @@ class DriftCorrectionDataStreamFunctor(Acquisition.DataStreamFunctor):
                  scan_frame_parameters: scan_base.ScanFrameParameters, drift_tracker: DriftTracker,
                  drift_interval_scans: int, drift_channel_id: typing.Optional[str],
                  drift_region: typing.Optional[Geometry.FloatRect],
-                 drift_rotation: float, *, use_prediction: bool = True) -> None:
+                 drift_rotation: float, *, use_prediction: bool = True,
+                 measure_asynchronously: bool = False) -> None:
         self.scan_hardware_source = scan_hardware_source
         self.scan_frame_parameters = scan_frame_parameters
         self.__drift_tracker = drift_tracker
@@ -396,6 +736,7 @@ class DriftCorrectionDataStreamFunctor(Acquisition.DataStreamFunctor):
         self.__drift_region = drift_region
         self.__drift_rotation = drift_rotation
         self.__use_prediction = use_prediction
+        self.__measure_asynchronously = measure_asynchronously
         # for testing
         self._drift_correction_data_stream: typing.Optional[DriftCorrectionDataStream] = None
 
@@ -408,7 +749,8 @@ class DriftCorrectionDataStreamFunctor(Acquisition.DataStreamFunctor):
                                                             self.__drift_channel_id,
                                                             self.__drift_region,
                                                             self.__drift_rotation,
-                                                            use_prediction=self.__use_prediction)
+                                                            use_prediction=self.__use_prediction,
+                                                            measure_asynchronously=self.__measure_asynchronously)
         self._drift_correction_data_stream = DriftCorrectionDataStream(drift_correction_behavior, data_stream)
         return self._drift_correction_data_stream
 
@@ -13,6 +13,8 @@ from __future__ import annotations
 
 # system imports
 import abc
+import collections
+import concurrent.futures
 import contextlib
 import copy
 import dataclasses
@@ -23,6 +25,7 @@ import logging
 import math
 import threading
 import time
+import types
 import typing
 import uuid
 import weakref
@@ -34,6 +37,7 @@ import numpy
 from nion.data import Calibration
 from nion.data import Core
 from nion.data import DataAndMetadata
+from nion.data import Image
 from nion.instrumentation import ListListener
 from nion.swift.model import Activity
 from nion.swift.model import DataItem
@@ -352,6 +356,35 @@ class HardwareSourceManager(metaclass=Utility.Singleton):
             hardware_source.abort_playing()
 
 
+class FrameRatePolicy(enum.Enum):
+    """How often a hardware source publishes frames while viewing.
+
+    UNLIMITED publishes every frame. MAX_FPS publishes at most the frame rate passed with the policy. MATCH_DISPLAY
+    publishes at most DISPLAY_FRAME_RATE, the rate at which live displays refresh. Recording is never limited.
+    """
+    UNLIMITED = 0
+    MAX_FPS = 1
+    MATCH_DISPLAY = 2
+
+
+# the rate at which live data displays refresh, used by the match display frame rate policy.
+DISPLAY_FRAME_RATE = 30.0
+
+
+@dataclasses.dataclass
+class FrameRateStatistics:
+    """Frame rate statistics of a view task since it started.
+
+    acquired_count is the number of complete frames acquired; published_count and skipped_count are the number of
+    those frames passed on to the data channels or skipped by the frame rate policy. average_processing_time is the
+    average time in seconds spent passing a published frame, including its partial updates, to the data channels.
+    """
+    acquired_count: int = 0
+    published_count: int = 0
+    skipped_count: int = 0
+    average_processing_time: float = 0.0
+
+
 class AcquisitionTask:
     """Basic acquisition task carries out acquisition repeatedly during an acquisition loop, keeping track of state.
 
@@ -365,9 +398,15 @@ class AcquisitionTask:
     In addition the caller can query the state of acquisition using the following method:
         is_finished: whether acquisition has finished or not
 
+    The caller can limit the frame rate of a continuous task by setting maximum_frame_rate. Complete frames arriving
+    faster than the limit are skipped; partial frames can't be skipped, so they are read less often instead. The
+    frame_rate_statistics property counts acquired, published, and skipped frames.
+
     Finally, the caller can listen to the following events:
         data_elements_changed_event(data_elements, is_continuous, view_id, is_complete, is_stopping):
             fired when data elements change. the state of acquisition is passed too.
+        state_changed_event():
+            fired from the execute thread when is_started, is_finished, or is_error change.
 
     Subclasses can override these methods to implement the acquisition:
         _start_acquisition: called once at the beginning of this task
@@ -390,6 +429,12 @@ class AcquisitionTask:
         self.__is_continuous = continuous
         self.__last_acquire_time = 0.0
         self.__minimum_period = 1 / 1000.0
+        self.__maximum_frame_rate: typing.Optional[float] = None
+        self.__has_sub_areas = False
+        self.__last_publish_time = 0.0
+        self.__processing_time = 0.0
+        self.__frame_rate_statistics = FrameRateStatistics()
+        self.__wake_event = threading.Event()
         self.__frame_index = 0
         self.__view_id = str(uuid.uuid4()) if not continuous else None
         self._test_acquire_exception: typing.Optional[typing.Callable[[Exception], None]] = None
@@ -399,17 +444,20 @@ class AcquisitionTask:
         self.stop_event = Event.Event()
         self.abort_event = Event.Event()
         self.data_elements_changed_event = Event.Event()
+        self.state_changed_event = Event.Event()
         self.finished_callback_fn: typing.Optional[_FinishedCallbackType] = None
         self.activity: typing.Optional[Activity.Activity] = None
 
     def __mark_as_finished(self) -> None:
         self.__finished = True
         self.data_elements_changed_event.fire(list(), self.__view_id, False, self.__is_stopping, None)
+        self.state_changed_event.fire()
 
     def __mark_as_error(self, e: Exception) -> None:
         self.__finished = True
         self.__failed = True
         self.data_elements_changed_event.fire(list(), self.__view_id, False, self.__is_stopping, e)
+        self.state_changed_event.fire()
 
     def __safe_stop_acquisition(self) -> None:
         try:
@@ -435,6 +483,7 @@ class AcquisitionTask:
                 self.__mark_as_error(e)
                 raise
             self.__started = True
+            self.state_changed_event.fire()
             # logging.debug("%s started", self)
         if self.__is_suspended:
             try:
@@ -486,11 +535,24 @@ class AcquisitionTask:
     def is_error(self) -> bool:
         return self.__failed
 
+    @property
+    def maximum_frame_rate(self) -> typing.Optional[float]:
+        return self.__maximum_frame_rate
+
+    @maximum_frame_rate.setter
+    def maximum_frame_rate(self, value: typing.Optional[float]) -> None:
+        self.__maximum_frame_rate = value
+
+    @property
+    def frame_rate_statistics(self) -> FrameRateStatistics:
+        return copy.copy(self.__frame_rate_statistics)
+
     # called from the hardware source
     # note: abort, suspend and execute are always called from the same thread, ensuring that
     # one can't be executing when the other is called.
     def abort(self) -> None:
         self.__aborted = True
+        self.__wake_event.set()
         self._request_abort_acquisition()
         self.abort_event.fire()
 
@@ -510,8 +572,14 @@ class AcquisitionTask:
     def __execute_acquire_data_elements(self) -> bool:
         # with Utility.trace(): # (min_elapsed=0.0005, discard="anaconda"):
         # impose maximum frame rate so that acquire_data_elements can't starve main thread
+        maximum_frame_rate = self.__maximum_frame_rate if self.__is_continuous else None
+        minimum_period = self.__minimum_period
+        if maximum_frame_rate and self.__has_sub_areas:
+            # partial frames can't be skipped, so read them less often to limit the frame rate.
+            minimum_period = max(minimum_period, 1.0 / maximum_frame_rate)
         elapsed = time.time() - self.__last_acquire_time
-        time.sleep(max(0.0, self.__minimum_period - elapsed))
+        # abort wakes the task early.
+        self.__wake_event.wait(max(0.0, minimum_period - elapsed))
 
         if callable(self._test_acquire_hook):
             self._test_acquire_hook()
@@ -538,10 +606,29 @@ class AcquisitionTask:
                 complete = False
                 break
 
+        self.__has_sub_areas = any(data_element.get("sub_area") is not None for data_element in data_elements)
+
+        frame_rate_statistics = self.__frame_rate_statistics
+
+        if complete:
+            frame_rate_statistics.acquired_count += 1
+            # skip complete frames arriving faster than the maximum frame rate. the last frame when stopping is
+            # always published since it finishes the task.
+            if maximum_frame_rate and not self.__has_sub_areas and not self.__is_stopping:
+                if time.time() - self.__last_publish_time < 1.0 / maximum_frame_rate:
+                    frame_rate_statistics.skipped_count += 1
+                    self.__frame_index += 1
+                    return complete
+
         # notify that data elements have changed. at this point data_elements may contain data stored in low level code.
+        start_time = time.perf_counter()
         self.data_elements_changed_event.fire(data_elements, self.__view_id, complete, self.__is_stopping, None)
+        self.__processing_time += time.perf_counter() - start_time
 
         if complete:
+            self.__last_publish_time = time.time()
+            frame_rate_statistics.published_count += 1
+            frame_rate_statistics.average_processing_time = self.__processing_time / frame_rate_statistics.published_count
             self.__frame_index += 1
 
         return complete
@@ -622,6 +709,19 @@ class DataChannelEventArgs:
     name: typing.Optional[str]
     data_channel_state: str
     state: typing.Optional[str]
+    _data_channel: typing.Optional[DataChannel] = dataclasses.field(default=None, repr=False, compare=False)
+
+    def get_data_and_metadata_snapshot(self) -> typing.Optional[DataAndMetadata.DataAndMetadata]:
+        """Return the data and metadata of the data channel such that it is not changed by later updates.
+
+        Call from a data channel updated listener to get a snapshot of the data passed to the listener.
+        """
+        return self._data_channel.get_data_and_metadata_snapshot() if self._data_channel else None
+
+    @property
+    def is_data_owned(self) -> bool:
+        """Return whether the data passed to the listener is owned by the data channel, so a snapshot shares it."""
+        return self._data_channel.is_data_owned if self._data_channel else False
 
 
 class DataChannel:
@@ -648,12 +748,20 @@ class DataChannel:
     listen to them for start/updated/stop events. Setting data on this object will trigger a data_channel_updated_event
     which will set pending data on the data item and eventually call set_data_and_metadata on the data item from the
     main thread.
+
+    The channel keeps data it owns in a private buffer and publishes it as a read-only view in a new data and metadata
+    object. With a persistent buffer, the channel keeps the buffer for as long as the shape and type of the data are
+    unchanged and each update copies the new data into it, so an update makes a single copy and no new buffers. Clients
+    that keep the data beyond the next update should use get_data_and_metadata_snapshot.
+
+    A snapshot of data owned by the channel shares the buffer; the channel then copies the buffer on its next write.
+    Data owned by the producer may still change, so a snapshot of it is a copy.
     """
 
     def __init__(self, hardware_source_id: str, channel_id: typing.Optional[str] = None,
                  channel_index: typing.Optional[int] = None, name: typing.Optional[str] = None,
                  src_channel_index: typing.Optional[int] = None, processor: typing.Optional[SumProcessor] = None,
-                 variant: typing.Optional[str] = None, is_context: bool = False) -> None:
+                 variant: typing.Optional[str] = None, is_context: bool = False, is_persistent_buffer: bool = False) -> None:
         self.__hardware_source_id = hardware_source_id
         self.__channel_index = channel_index
         self.__channel_id = channel_id
@@ -668,6 +776,12 @@ class DataChannel:
         self.__sub_area: typing.Optional[Geometry.IntRect] = None
         self.__dest_sub_area: typing.Optional[Geometry.IntRect] = None
         self.__data_and_metadata: typing.Optional[DataAndMetadata.DataAndMetadata] = None
+        self.__is_persistent_buffer = is_persistent_buffer
+        self.__lock = threading.RLock()
+        self.__buffer: typing.Optional[_NDArray] = None  # the data written by partial updates, if any
+        self.__is_buffer_owned = False  # whether the buffer is owned by this data channel rather than by the producer
+        self.__is_buffer_shared = False  # whether the buffer must be copied before it is written
+        self.__snapshot: typing.Optional[DataAndMetadata.DataAndMetadata] = None
         self.is_dirty = False
         self.__is_error = False
         self.data_channel_updated_event = Event.Event()
@@ -680,7 +794,7 @@ class DataChannel:
             data_channel_state = self.state
         else:
             data_channel_state = "error" if self.is_error else "stopped"
-        return DataChannelEventArgs(self.channel_id, self.data_channel_id, self.name, data_channel_state, self.state)
+        return DataChannelEventArgs(self.channel_id, self.data_channel_id, self.name, data_channel_state, self.state, self)
 
     @property
     def channel_index(self) -> typing.Optional[int]:
@@ -732,10 +846,40 @@ class DataChannel:
     def is_context(self) -> bool:
         return self.__is_context
 
+    @property
+    def is_persistent_buffer(self) -> bool:
+        return self.__is_persistent_buffer
+
+    @is_persistent_buffer.setter
+    def is_persistent_buffer(self, value: bool) -> None:
+        self.__is_persistent_buffer = value
+
     @property
     def data_and_metadata(self) -> typing.Optional[DataAndMetadata.DataAndMetadata]:
         return self.__data_and_metadata
 
+    @property
+    def is_data_owned(self) -> bool:
+        with self.__lock:
+            return self.__is_buffer_owned
+
+    def get_data_and_metadata_snapshot(self) -> typing.Optional[DataAndMetadata.DataAndMetadata]:
+        """Return the data and metadata such that it is not changed by later updates.
+
+        Data owned by the channel is shared and the channel copies it on its next write. Data owned by the producer is
+        copied. The snapshot is made at most once per update and shared by all clients requesting it.
+
+        Thread safe.
+        """
+        with self.__lock:
+            if self.__snapshot is None and self.__data_and_metadata:
+                if self.__is_buffer_owned:
+                    self.__snapshot = self.__data_and_metadata
+                    self.__is_buffer_shared = True
+                else:
+                    self.__snapshot = copy.deepcopy(self.__data_and_metadata)
+            return self.__snapshot
+
     @property
     def is_error(self) -> bool:
         return self.__is_error
@@ -750,8 +894,12 @@ class DataChannel:
     def is_started(self) -> bool:
         return self.__start_count > 0
 
-    def update(self, data_and_metadata: DataAndMetadata.DataAndMetadata, state: str, data_shape: typing.Optional[DataAndMetadata.ShapeType], dest_sub_area: typing.Optional[Geometry.IntRectTuple], sub_area: typing.Optional[Geometry.IntRectTuple], view_id: typing.Optional[str]) -> None:
-        """Called from hardware source when new data arrives."""
+    def update(self, data_and_metadata: DataAndMetadata.DataAndMetadata, state: str, data_shape: typing.Optional[DataAndMetadata.ShapeType], dest_sub_area: typing.Optional[Geometry.IntRectTuple], sub_area: typing.Optional[Geometry.IntRectTuple], view_id: typing.Optional[str], *, is_in_place: bool = False) -> None:
+        """Called from hardware source when new data arrives.
+
+        If is_in_place is True, the data is a full size buffer owned by the producer and already updated in place. It
+        is used directly instead of being copied and is never written by later updates.
+        """
         old_state = self.__state
         self.__state = state
         self.__data_shape = data_shape or data_and_metadata.data_shape
@@ -786,30 +934,78 @@ class DataChannel:
         data = data_and_metadata.data
         assert data is not None
         data_shape = data_shape or data.shape
-        master_data = self.__data_and_metadata.data if self.__data_and_metadata else None
-        if master_data is None or (master_data.shape != data_shape and data.shape != data_shape):
-            master_data = numpy.zeros(data_shape, data.dtype)
-        data_matches = master_data is not None and data_shape == master_data.shape and data.dtype == master_data.dtype
-        if data_matches and sub_area_r and dest_sub_area_r:
-            src_rect = sub_area_r
-            dst_rect = dest_sub_area_r
-            if (dst_rect.top > 0 or dst_rect.left > 0 or dst_rect.bottom < master_data.shape[0] or dst_rect.right < master_data.shape[1])\
-                    or (src_rect.top > 0 or src_rect.left > 0 or src_rect.bottom < data.shape[0] or src_rect.right < data.shape[1]):
-                master_data[dst_rect.slice] = data[src_rect.slice]
+        with self.__lock:
+            buffer = self.__buffer
+            is_buffer_owned = self.__is_buffer_owned
+            is_buffer_shared = self.__is_buffer_shared
+            is_partial = False
+            if is_in_place:
+                # the producer owns the data and has already updated it, so use it without a copy.
+                assert data.shape == data_shape
+                buffer = None
+                is_buffer_owned = False
+            elif self.__is_persistent_buffer:
+                if buffer is None or not is_buffer_owned or buffer.shape != data_shape or buffer.dtype != data.dtype:
+                    # the buffer is only allocated when the shape or type of the data changes.
+                    buffer = numpy.zeros(data_shape, data.dtype)
+                    is_buffer_owned = True
+                    is_buffer_shared = False
+                is_partial = sub_area_r is not None and dest_sub_area_r is not None
             else:
-                master_data = numpy.copy(data)  # type: ignore
-        else:
-            assert data.shape == data_shape
-            master_data = data  # numpy.copy(data). assume data does not need a copy.
-        assert master_data is not None
+                if buffer is None or (buffer.shape != data_shape and data.shape != data_shape):
+                    buffer = numpy.zeros(data_shape, data.dtype)
+                    is_buffer_owned = True
+                    is_buffer_shared = False
+                data_matches = data_shape == buffer.shape and data.dtype == buffer.dtype
+                if data_matches and sub_area_r and dest_sub_area_r:
+                    src_rect = sub_area_r
+                    dst_rect = dest_sub_area_r
+                    if (dst_rect.top > 0 or dst_rect.left > 0 or dst_rect.bottom < buffer.shape[0] or dst_rect.right < buffer.shape[1])\
+                            or (src_rect.top > 0 or src_rect.left > 0 or src_rect.bottom < data.shape[0] or src_rect.right < data.shape[1]):
+                        is_partial = True
+                    else:
+                        buffer = numpy.copy(data)
+                        is_buffer_owned = True
+                        is_buffer_shared = False
+                else:
+                    assert data.shape == data_shape
+                    # assume data does not need a copy. the producer owns it, so it is copied before it is written.
+                    buffer = data
+                    is_buffer_owned = False
+                    is_buffer_shared = True
+            if buffer is not None and (is_partial or self.__is_persistent_buffer):
+                if is_buffer_shared:
+                    # a snapshot or the producer holds the buffer; copy on write.
+                    buffer = numpy.copy(buffer) if is_partial else numpy.empty_like(buffer)
+                    is_buffer_owned = True
+                    is_buffer_shared = False
+                if is_partial:
+                    assert sub_area_r and dest_sub_area_r
+                    buffer[dest_sub_area_r.slice] = data[sub_area_r.slice]
+                else:
+                    assert data.shape == data_shape
+                    buffer[...] = data
+
+            if buffer is None:
+                master_data = data
+            elif is_buffer_owned:
+                # publish a read-only view so that only this data channel writes the buffer.
+                master_data = buffer.view()
+                master_data.flags.writeable = False
+            else:
+                master_data = buffer
 
-        data_descriptor = data_and_metadata.data_descriptor
-        intensity_calibration = data_and_metadata.intensity_calibration if data_and_metadata else None
-        dimensional_calibrations = data_and_metadata.dimensional_calibrations if data_and_metadata else None
-        timestamp = data_and_metadata.timestamp
-        new_extended_data = DataAndMetadata.new_data_and_metadata(master_data, intensity_calibration=intensity_calibration, dimensional_calibrations=dimensional_calibrations, metadata=metadata, timestamp=timestamp, data_descriptor=data_descriptor)
+            data_descriptor = data_and_metadata.data_descriptor
+            intensity_calibration = data_and_metadata.intensity_calibration if data_and_metadata else None
+            dimensional_calibrations = data_and_metadata.dimensional_calibrations if data_and_metadata else None
+            timestamp = data_and_metadata.timestamp
+            new_extended_data = DataAndMetadata.new_data_and_metadata(master_data, intensity_calibration=intensity_calibration, dimensional_calibrations=dimensional_calibrations, metadata=metadata, timestamp=timestamp, data_descriptor=data_descriptor)
 
-        self.__data_and_metadata = new_extended_data
+            self.__data_and_metadata = new_extended_data
+            self.__buffer = buffer
+            self.__is_buffer_owned = is_buffer_owned
+            self.__is_buffer_shared = is_buffer_shared
+            self.__snapshot = None
 
         self.data_channel_updated_event.fire(new_extended_data)
         self.is_dirty = True
@@ -898,6 +1094,8 @@ class HardwareSource(typing.Protocol):
     def stop_recording(self, sync_timeout: typing.Optional[float] = None) -> None: ...
     def get_next_xdatas_to_finish(self, timeout: typing.Optional[float] = None) -> typing.Sequence[typing.Optional[DataAndMetadata.DataAndMetadata]]: ...
     def get_next_xdatas_to_start(self, timeout: typing.Optional[float] = None) -> typing.Sequence[typing.Optional[DataAndMetadata.DataAndMetadata]]: ...
+    def set_frame_rate_policy(self, frame_rate_policy: FrameRatePolicy, max_fps: typing.Optional[float] = None) -> None: ...
+    def get_frame_rate_statistics(self) -> FrameRateStatistics: ...
     def get_current_frame_parameters(self) -> FrameParameters: ...
     def set_current_frame_parameters(self, frame_parameters: FrameParameters) -> None: ...
 
@@ -963,6 +1161,7 @@ class HardwareSource(typing.Protocol):
     def data_channels_updated(self) -> None: ...
     def set_record_frame_parameters(self, frame_parameters: FrameParameters) -> None: ...
     def get_record_frame_parameters(self) -> FrameParameters: ...
+    def submit_record_task(self, fn: typing.Callable[[], None]) -> concurrent.futures.Future[None]: ...
 
 
 @dataclasses.dataclass
@@ -994,6 +1193,7 @@ class DataChannelManager:
 
         self.__data_channel_list_model = ListModel.ListModel[DataChannel]()
         self.__is_started = False
+        self.__is_persistent_buffer = False
 
         self.data_channel_start_event = Event.Event()
         self.data_channel_stop_event = Event.Event()
@@ -1026,13 +1226,18 @@ class DataChannelManager:
         )
 
     def add_data_channel(self, hardware_source_id: str, channel_id: typing.Optional[str], channel_index: typing.Optional[int], name: typing.Optional[str], *, variant: typing.Optional[str] = None, is_context: bool = False) -> None:
-        data_channel = DataChannel(hardware_source_id, channel_id, channel_index, name, variant=variant, is_context=is_context)
+        data_channel = DataChannel(hardware_source_id, channel_id, channel_index, name, variant=variant, is_context=is_context, is_persistent_buffer=self.__is_persistent_buffer)
         self.__data_channel_list_model.append_item(data_channel)
 
     def add_channel_processor(self, hardware_source_id: str, channel_index: int, processor: SumProcessor) -> None:
-        data_channel = DataChannel(hardware_source_id, processor.processor_id, None, None, channel_index, processor)
+        data_channel = DataChannel(hardware_source_id, processor.processor_id, None, None, channel_index, processor, is_persistent_buffer=self.__is_persistent_buffer)
         self.__data_channel_list_model.append_item(data_channel)
 
+    def set_persistent_buffers(self, is_persistent_buffer: bool) -> None:
+        self.__is_persistent_buffer = is_persistent_buffer
+        for data_channel in self.__data_channel_list_model.items:
+            data_channel.is_persistent_buffer = is_persistent_buffer
+
     def remove_data_channel_with_variant(self, variant: str) -> None:
         data_channel = next(filter(lambda dc: dc.variant == variant, self.__data_channel_list_model.items), None)
         assert data_channel
@@ -1064,7 +1269,7 @@ class DataChannelManager:
                 for data_channel in self.__data_channel_list_model.items:
                     if data_channel.channel_id == channel_id:
                         channel_index = data_channel.channel_index or 0
-                data_channel = DataChannel(self.__hardware_source_id, channel_id, channel_index, channel_name, variant=channel_variant)
+                data_channel = DataChannel(self.__hardware_source_id, channel_id, channel_index, channel_name, variant=channel_variant, is_persistent_buffer=self.__is_persistent_buffer)
                 self.__data_channel_list_model.append_item(data_channel)
                 if self.__is_started:
                     data_channel.start()
@@ -1077,8 +1282,9 @@ class DataChannelManager:
                 data_shape = data_element.get("data_shape")
                 dest_sub_area = data_element.get("dest_sub_area")
                 sub_area = data_element.get("sub_area")
-                # data_channel.update will make a copy of the data_and_metadata
-                data_channel.update(data_and_metadata, channel_state, data_shape, dest_sub_area, sub_area, view_id)
+                is_in_place = data_element.get("in_place", False)
+                # data_channel.update will make a copy of the data_and_metadata unless it is updated in place
+                data_channel.update(data_and_metadata, channel_state, data_shape, dest_sub_area, sub_area, view_id, is_in_place=is_in_place)
                 data_channels.append(data_channel)
                 xdatas.append(data_channel.data_and_metadata)
         # update channel buffers with processors
@@ -1090,9 +1296,13 @@ class DataChannelManager:
                     src_data_and_metadata = src_data_channel.data_and_metadata
                     data_channel_processor = data_channel.processor
                     if not is_error:
-                        if data_channel_processor and src_data_and_metadata and src_data_channel.is_dirty and src_data_channel.state == "complete":
-                            processed_data_and_metadata = data_channel_processor.process(src_data_and_metadata)
-                            data_channel.update(processed_data_and_metadata, "complete", None, None, None, view_id)
+                        if data_channel_processor and src_data_and_metadata and src_data_channel.is_dirty:
+                            if src_data_channel.state == "complete":
+                                processed_data_and_metadata = data_channel_processor.process(src_data_and_metadata, sub_area=src_data_channel.dest_sub_area)
+                                data_channel.update(processed_data_and_metadata, "complete", None, None, None, view_id)
+                            else:
+                                # sum partial frames as they arrive so completing the frame only sums the new rows.
+                                data_channel_processor.update(src_data_and_metadata, src_data_channel.dest_sub_area)
                     else:
                         assert data_channel.data_and_metadata
                         data_channel.update(data_channel.data_and_metadata, "error", None, None, None, view_id)
@@ -1136,6 +1346,12 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
         self.__is_aborted = False
         self.abort_event = Event.Event()
         self.__view_abort_event_listener: Event.EventListener | None = None
+        self.__frame_rate_policy = FrameRatePolicy.UNLIMITED
+        self.__maximum_frame_rate: typing.Optional[float] = None
+        self.__last_frame_rate_statistics = FrameRateStatistics()
+        # record tasks run on a worker pool owned by this hardware source, created when first needed.
+        self.__record_executor: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.__record_executor_lock = threading.Lock()
         self.__record_abort_event_listener: Event.EventListener | None = None
         self.acquisition_state_changed_event = Event.Event()
         self.data_channel_updated_event = Event.Event()
@@ -1144,10 +1360,13 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
         self.data_channel_state_changed_event = Event.Event()
         self.__break_for_closing = False
         self.__acquire_thread_trigger = threading.Event()
+        # notified whenever the task list or the started/finished state of a task changes.
+        self.__task_state_condition = threading.Condition()
         self.__tasks: typing.Dict[str, AcquisitionTask] = dict()
         self.__data_elements_changed_event_listeners: typing.Dict[str, Event.EventListener] = dict()
         self.__start_event_listeners: typing.Dict[str, Event.EventListener] = dict()
         self.__stop_event_listeners: typing.Dict[str, Event.EventListener] = dict()
+        self.__state_changed_event_listeners: typing.Dict[str, Event.EventListener] = dict()
         self.__acquire_thread: typing.Optional[threading.Thread] = threading.Thread(target=self.__acquire_thread_loop)
         self.__acquire_thread.daemon = True
         self.__acquire_thread.start()
@@ -1164,6 +1383,10 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
 
     def close(self) -> None:
         self.close_thread()
+        with self.__record_executor_lock:
+            if self.__record_executor:
+                self.__record_executor.shutdown(wait=False)
+                self.__record_executor = None
         self.__data_channel_list_listener = typing.cast(typing.Any, None)
 
     @property
@@ -1240,6 +1463,8 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
                         logging.debug("{} Error: {}".format(task_id.capitalize(), e))
                         traceback.print_exc()
                 if task.is_finished:
+                    if task_id == 'view':
+                        self.__last_frame_rate_statistics = task.frame_rate_statistics
                     activity = self.__tasks[task_id].activity
                     if activity:
                         Activity.activity_finished(activity)
@@ -1251,6 +1476,9 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
                     del self.__start_event_listeners[task_id]
                     self.__stop_event_listeners[task_id].close()
                     del self.__stop_event_listeners[task_id]
+                    self.__state_changed_event_listeners[task_id].close()
+                    del self.__state_changed_event_listeners[task_id]
+                    self.__notify_task_state_changed()
                     self.acquisition_state_changed_event.fire(False)
                 self.__acquire_thread_trigger.set()
             if break_for_closing:
@@ -1325,6 +1553,9 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
         the 'sub_area' will be used to determine source sub-area if applicable. data can be returned in partial
         chunks from top to bottom with a constant width.
 
+        the 'in_place' flag indicates the data is a full size buffer owned by the producer and updated in place. the
+        data channel will use it directly instead of copying it.
+
         beyond these three items, the data element will be converted to xdata using convert_data_element_to_data_and_metadata.
         thread safe
         """
@@ -1353,6 +1584,22 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
         self.__data_channel_manager.stop()
         self.data_channels_updated()
 
+    def __notify_task_state_changed(self) -> None:
+        with self.__task_state_condition:
+            self.__task_state_condition.notify_all()
+
+    def _wait_for_task_state(self, predicate: typing.Callable[[], bool], timeout: typing.Optional[float]) -> None:
+        """Wait until predicate, which examines the task list or task state, returns True.
+
+        The predicate is re-evaluated each time the acquisition thread changes the task list or the started/finished
+        state of a task. The timeout is in seconds and is asserted, matching the original polling loops. Pass None to
+        wait indefinitely.
+        """
+        with self.__task_state_condition:
+            # wait outside of the assert so that the wait is not removed when assertions are disabled.
+            is_done = self.__task_state_condition.wait_for(predicate, float(timeout) if timeout is not None else None)
+        assert is_done
+
     # return whether task is running
     def is_task_running(self, task_id: str) -> bool:
         return task_id in self.__tasks
@@ -1366,10 +1613,11 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
         self.__data_elements_changed_event_listeners[task_id] = task.data_elements_changed_event.listen(functools.partial(self.__data_elements_changed, task))
         self.__start_event_listeners[task_id] = task.start_event.listen(self.__start)
         self.__stop_event_listeners[task_id] = task.stop_event.listen(self.__stop)
+        self.__state_changed_event_listeners[task_id] = task.state_changed_event.listen(self.__notify_task_state_changed)
         task.activity = Activity.Activity(self.hardware_source_id + "_" + task_id, f"{self.display_name} ({task_id})")
         Activity.append_activity(task.activity)
         self.__tasks[task_id] = task
-        # TODO: sync the thread start by waiting for an event on the task which gets set when the acquire thread starts executing the task
+        self.__notify_task_state_changed()
         self.__acquire_thread_trigger.set()
         self.acquisition_state_changed_event.fire(True)
 
@@ -1399,6 +1647,7 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
             view_task = self._create_acquisition_view_task()
             view_task._test_start_hook = self._test_start_hook
             view_task._test_acquire_hook = self._test_acquire_hook
+            view_task.maximum_frame_rate = self.__maximum_frame_rate
 
             def handle_abort_event() -> None:
                 self.__is_aborted = True
@@ -1410,10 +1659,7 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
             self._view_task_updated(view_task)
             self.start_task('view', view_task)
         if "sync_timeout" in kwargs:
-            start = time.time()
-            while not self.is_playing:
-                time.sleep(0.01)  # 10 msec
-                assert time.time() - start < float(kwargs["sync_timeout"])
+            self._wait_for_task_state(lambda: self.is_playing, kwargs["sync_timeout"])
 
     # call this to stop acquisition immediately
     # not thread safe
@@ -1423,10 +1669,7 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
             self._view_task_updated(None)
         self.__view_abort_event_listener = None
         if sync_timeout is not None:
-            start = time.time()
-            while self.is_playing or self.is_task_running('view') or self.is_task_running('record'):
-                time.sleep(0.01)  # 10 msec
-                assert time.time() - start < float(sync_timeout)
+            self._wait_for_task_state(lambda: not (self.is_playing or self.is_task_running('view') or self.is_task_running('record')), sync_timeout)
 
     # call this to stop acquisition gracefully
     # not thread safe
@@ -1436,10 +1679,34 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
             self._view_task_updated(None)
         self.__view_abort_event_listener = None
         if sync_timeout is not None:
-            start = time.time()
-            while self.is_playing:
-                time.sleep(0.01)  # 10 msec
-                assert time.time() - start < float(sync_timeout)
+            self._wait_for_task_state(lambda: not self.is_playing, sync_timeout)
+
+    @property
+    def frame_rate_policy(self) -> FrameRatePolicy:
+        return self.__frame_rate_policy
+
+    def set_frame_rate_policy(self, frame_rate_policy: FrameRatePolicy, max_fps: typing.Optional[float] = None) -> None:
+        """Set how often frames are published while viewing.
+
+        The MAX_FPS policy requires a positive max_fps. The policy applies to the running view and to later views.
+        """
+        maximum_frame_rate: typing.Optional[float] = None
+        if frame_rate_policy == FrameRatePolicy.MAX_FPS:
+            if not max_fps or max_fps <= 0.0:
+                raise ValueError("The MAX_FPS frame rate policy requires a positive max_fps.")
+            maximum_frame_rate = float(max_fps)
+        elif frame_rate_policy == FrameRatePolicy.MATCH_DISPLAY:
+            maximum_frame_rate = DISPLAY_FRAME_RATE
+        self.__frame_rate_policy = frame_rate_policy
+        self.__maximum_frame_rate = maximum_frame_rate
+        view_task = self.__tasks.get('view')
+        if view_task:
+            view_task.maximum_frame_rate = maximum_frame_rate
+
+    def get_frame_rate_statistics(self) -> FrameRateStatistics:
+        """Return the frame rate statistics of the running view, or of the last view if not playing."""
+        view_task = self.__tasks.get('view')
+        return view_task.frame_rate_statistics if view_task else copy.copy(self.__last_frame_rate_statistics)
 
     # return whether acquisition is running. this is an approximate state and should not be used for synchronization
     # requiring a high degree of accuracy. instead, use the task itself to watch is_started and is_finished.
@@ -1484,10 +1751,9 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
 
         self.start_task('record', record_task)
         if sync_timeout is not None:
-            start = time.time()
-            while not record_task.is_started:
-                time.sleep(0.01)  # 10 msec
-                assert time.time() - start < float(sync_timeout)
+            self._wait_for_task_state(lambda: record_task.is_started, sync_timeout)
+
+        wait_for_task_state = self._wait_for_task_state
 
         class RecordingTaskImpl(RecordingTask):
             def __init__(self, hardware_source: HardwareSource, record_task: AcquisitionTask, new_data_event: threading.Event, new_xdatas: typing.List[typing.Optional[DataAndMetadata.DataAndMetadata]]) -> None:
@@ -1509,19 +1775,11 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
                 return self.__record_task.is_error
 
             def wait_started(self, *, timeout: typing.Optional[float] = None) -> bool:
-                start = time.time()
-                while not self.is_started and not self.is_error:
-                    time.sleep(0.01)
-                    if timeout is not None:
-                        assert time.time() - start < float(timeout)
+                wait_for_task_state(lambda: self.is_started or self.is_error, timeout)
                 return self.is_started and not self.is_error
 
             def wait_finished(self, *, timeout: typing.Optional[float] = None) -> None:
-                start = time.time()
-                while not self.is_finished:
-                    time.sleep(0.01)  # 10 msec
-                    if timeout is not None:
-                        assert time.time() - start < float(timeout)
+                wait_for_task_state(lambda: self.is_finished, timeout)
 
             def grab_xdatas(self, *, timeout: typing.Optional[float] = None) -> typing.Sequence[typing.Optional[DataAndMetadata.DataAndMetadata]]:
                 def abort() -> None:
@@ -1548,10 +1806,7 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
             self.abort_task('record')
             self._record_task_updated(None)
         if sync_timeout is not None:
-            start = time.time()
-            while self.is_recording:
-                time.sleep(0.01)  # 10 msec
-                assert time.time() - start < float(sync_timeout)
+            self._wait_for_task_state(lambda: not self.is_recording, sync_timeout)
 
     # call this to stop acquisition gracefully
     # not thread safe
@@ -1560,10 +1815,17 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
             self.stop_task('record')
             self._record_task_updated(None)
         if sync_timeout is not None:
-            start = time.time()
-            while self.is_recording:
-                time.sleep(0.01)  # 10 msec
-                assert time.time() - start < float(sync_timeout)
+            self._wait_for_task_state(lambda: not self.is_recording, sync_timeout)
+
+    def submit_record_task(self, fn: typing.Callable[[], None]) -> concurrent.futures.Future[None]:
+        """Run fn on the record worker pool of this hardware source.
+
+        The worker threads are reused between record tasks so that each task does not start a new thread.
+        """
+        with self.__record_executor_lock:
+            if not self.__record_executor:
+                self.__record_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"{self.hardware_source_id}_record")
+            return self.__record_executor.submit(fn)
 
     def get_next_xdatas_to_finish(self, timeout: typing.Optional[float] = None) -> typing.Sequence[typing.Optional[DataAndMetadata.DataAndMetadata]]:
         new_data_event = threading.Event()
@@ -1630,6 +1892,14 @@ class ConcreteHardwareSource(Observable.Observable, HardwareSource):
     def add_channel_processor(self, channel_index: int, processor: SumProcessor) -> None:
         self.__data_channel_manager.add_channel_processor(self.hardware_source_id, channel_index, processor)
 
+    def set_persistent_data_channel_buffers(self, is_persistent_buffer: bool) -> None:
+        """Set whether the data channels update a persistent buffer in place instead of making new data each update.
+
+        Use persistent buffers for live acquisition at high frame rates. Clients receiving the data must request a
+        snapshot from the data channel if they keep the data beyond the next update.
+        """
+        self.__data_channel_manager.set_persistent_buffers(is_persistent_buffer)
+
     def remove_data_channel_with_variant(self, variant: str) -> None:
         self.__data_channel_manager.remove_data_channel_with_variant(variant)
 
@@ -1730,10 +2000,22 @@ class DelegateAcquisitionTask(AcquisitionTask):
 
 
 class SumProcessor(Observable.Observable):
+    """Sum frames along the first axis.
+
+    Partially updated frames are summed incrementally. Call update with the rows changed by each partial update and
+    process with the rows changed by the final update; rows sent again by consecutive updates replace their earlier
+    values. The frame is summed in full if the changed rows can't be tracked, for instance if the shape of the data
+    changes or an update skips rows.
+    """
+
     def __init__(self, processor_id: typing.Optional[str] = None, label: typing.Optional[str] = None) -> None:
         super().__init__()
         self.__processor_id = processor_id or "summed"
         self.__label = label or _("Summed")
+        self.__summed_data: typing.Optional[_NDArray] = None
+        self.__summed_bottom = 0
+        self.__last_rows: typing.Optional[_NDArray] = None
+        self.__last_rows_top = 0
 
     @property
     def label(self) -> str:
@@ -1743,9 +2025,60 @@ class SumProcessor(Observable.Observable):
     def processor_id(self) -> str:
         return self.__processor_id
 
-    def process(self, data_and_metadata: DataAndMetadata.DataAndMetadata) -> DataAndMetadata.DataAndMetadata:
+    def __reset(self) -> None:
+        self.__summed_data = None
+        self.__summed_bottom = 0
+        self.__last_rows = None
+        self.__last_rows_top = 0
+
+    def update(self, data_and_metadata: DataAndMetadata.DataAndMetadata, sub_area: typing.Optional[Geometry.IntRect]) -> None:
+        """Add the rows in sub_area of a partially updated frame to the running sum."""
+        data = data_and_metadata.data
+        if data is None or sub_area is None or len(data.shape) < 2 or Image.is_shape_and_dtype_rgb_type(data.shape, data.dtype) or sub_area.left > 0 or sub_area.right < data.shape[1]:
+            self.__reset()
+            return
+        summed_data = self.__summed_data
+        if summed_data is not None and summed_data.shape != data.shape[1:]:
+            summed_data = None
+        last_rows = self.__last_rows
+        top = sub_area.top
+        bottom = sub_area.bottom
+        rows = data[top:bottom]
+        if top == 0:
+            # the first rows of a frame restart the sum.
+            summed_data = numpy.sum(rows, axis=0)
+        elif summed_data is not None and top == self.__summed_bottom:
+            summed_data += numpy.sum(rows, axis=0)
+        elif summed_data is not None and last_rows is not None and self.__last_rows_top <= top < self.__summed_bottom == self.__last_rows_top + last_rows.shape[0]:
+            # rows of the last update are sent again, so replace them.
+            summed_data -= numpy.sum(last_rows[top - self.__last_rows_top:], axis=0)
+            summed_data += numpy.sum(rows, axis=0)
+        else:
+            self.__reset()
+            return
+        self.__summed_data = summed_data
+        self.__summed_bottom = bottom
+        self.__last_rows = numpy.copy(rows)
+        self.__last_rows_top = top
+
+    def process(self, data_and_metadata: DataAndMetadata.DataAndMetadata, *, sub_area: typing.Optional[Geometry.IntRect] = None) -> DataAndMetadata.DataAndMetadata:
+        """Return the sum of the frame along the first axis.
+
+        Pass the rows changed since the last update as sub_area to complete an incrementally summed frame.
+        """
         if len(data_and_metadata.data_shape) > 1:
-            summed = Core.function_sum(data_and_metadata, 0)
+            summed_data: typing.Optional[_NDArray] = None
+            if sub_area is not None:
+                self.update(data_and_metadata, sub_area)
+                if self.__summed_data is not None and self.__summed_bottom == data_and_metadata.data_shape[0]:
+                    summed_data = self.__summed_data
+            self.__reset()
+            if summed_data is not None:
+                summed = DataAndMetadata.new_data_and_metadata(summed_data,
+                                                               intensity_calibration=data_and_metadata.intensity_calibration,
+                                                               dimensional_calibrations=list(data_and_metadata.dimensional_calibrations)[1:])
+            else:
+                summed = Core.function_sum(data_and_metadata, 0)
             assert summed
             summed._set_metadata(data_and_metadata.metadata)
             return summed
@@ -1836,7 +2169,7 @@ def record_thread(
 
 
 class RecordTask:
-    """Run acquisition in a thread and record the result."""
+    """Run acquisition on the record worker pool of the hardware source and record the result."""
 
     def __init__(self, hardware_source: HardwareSource, acquisition_parameters: AcquisitionParameters) -> None:
         self.__hardware_source = hardware_source
@@ -1847,23 +2180,31 @@ class RecordTask:
         # for the acquisition.
         self.__recording_started_or_error_event = threading.Event()
         self.__is_error_ref = [False]
-        self.__thread = threading.Thread(target=record_thread, args=(self.__hardware_source, acquisition_parameters, self.__recording_started_or_error_event, self.__is_error_ref, self.__data_and_metadata_list))
-        self.__thread.start()
+        self.__future = self.__hardware_source.submit_record_task(functools.partial(record_thread, self.__hardware_source, acquisition_parameters, self.__recording_started_or_error_event, self.__is_error_ref, self.__data_and_metadata_list))
+        self.__future.add_done_callback(RecordTask.__log_exception)
         self.__recording_started_or_error_event.wait()
 
-        def finalize(thread: threading.Thread, hardware_source: HardwareSource) -> None:
-            if thread.is_alive():
+        def finalize(future: concurrent.futures.Future[None], hardware_source: HardwareSource) -> None:
+            if not future.done():
                 hardware_source.abort_recording()
-                thread.join()
+                concurrent.futures.wait([future])
 
-        weakref.finalize(self, finalize, self.__thread, self.__hardware_source)
+        weakref.finalize(self, finalize, self.__future, self.__hardware_source)
+
+    @staticmethod
+    def __log_exception(future: concurrent.futures.Future[None]) -> None:
+        # log the error as the thread did before, since the caller may never call grab.
+        exception = future.exception() if not future.cancelled() else None
+        if exception:
+            logging.warning(f"Error recording: {exception}", exc_info=exception)
 
     @property
     def is_finished(self) -> bool:
-        return not self.__thread.is_alive()
+        return self.__future.done()
 
     def grab(self) -> typing.Sequence[typing.Optional[DataAndMetadata.DataAndMetadata]]:
-        self.__thread.join()
+        """Wait for the recording to finish and return its data. Raise the error if the recording failed."""
+        self.__future.result()
         if self.__is_error_ref[0]:
             raise RuntimeError("Could not start " + str(self.__hardware_source.hardware_source_id))
         return self.__data_and_metadata_list
@@ -1879,7 +2220,7 @@ def get_data_generator_by_id(hardware_source_id: str, sync: bool = True) -> typi
 
         :param bool sync: whether to wait for current frame to finish then collect next frame
 
-        NOTE: a new ndarray is created for each call.
+        NOTE: a new ndarray is created for each call. Use get_leased_data_generator_by_id to avoid the copy.
     """
     hardware_source = HardwareSourceManager().get_hardware_source_for_hardware_source_id(hardware_source_id)
     def get_last_data() -> typing.Optional[_NDArray]:
@@ -1893,6 +2234,185 @@ def get_data_generator_by_id(hardware_source_id: str, sync: bool = True) -> typi
     yield get_last_data
 
 
+class FrameLease:
+    """A read-only frame leased from a leased data generator.
+
+    The frame data is a read-only view of a data channel snapshot or of a buffer in the ring of the leased data
+    generator and is valid until the lease is released, when any buffer returns to the ring. Call keep to get a copy of
+    the frame that remains valid after the lease is released. The lease is a context manager and is released on exit.
+    """
+
+    def __init__(self, data_and_metadata: DataAndMetadata.DataAndMetadata, release_fn: typing.Callable[[FrameLease], None]) -> None:
+        self.__data_and_metadata: typing.Optional[DataAndMetadata.DataAndMetadata] = data_and_metadata
+        self.__release_fn = release_fn
+
+    def __enter__(self) -> FrameLease:
+        return self
+
+    def __exit__(self, exception_type: typing.Optional[typing.Type[BaseException]],
+                 value: typing.Optional[BaseException], traceback: typing.Optional[types.TracebackType]) -> typing.Optional[bool]:
+        self.release()
+        return None
+
+    @property
+    def is_released(self) -> bool:
+        return self.__data_and_metadata is None
+
+    @property
+    def data_and_metadata(self) -> DataAndMetadata.DataAndMetadata:
+        if self.__data_and_metadata is None:
+            raise RuntimeError("The frame lease has been released.")
+        return self.__data_and_metadata
+
+    @property
+    def data(self) -> _NDArray:
+        data = self.data_and_metadata.data
+        assert data is not None
+        return data
+
+    def keep(self) -> DataAndMetadata.DataAndMetadata:
+        """Return a copy of the frame that remains valid after the lease is released."""
+        return copy.deepcopy(self.data_and_metadata)
+
+    def release(self) -> None:
+        """Release the frame. The frame must not be used after it is released."""
+        if self.__data_and_metadata is not None:
+            self.__data_and_metadata = None
+            self.__release_fn(self)
+
+
+class _FrameRing:
+    """A ring of preallocated buffers for leased frames.
+
+    Frames which are not changed later, such as data channel snapshots of data owned by the data channel, are leased
+    without copying. Other frames are copied into a free buffer and shared as a read-only view until their lease is
+    released. The buffers are allocated for the shape and type of the first copied frame and reallocated only when the
+    shape or type changes. At most ring_size leases are held at once and a buffer is never reused while it is leased.
+    """
+
+    def __init__(self, ring_size: int) -> None:
+        self.__lock = threading.RLock()
+        self.__buffers: typing.List[typing.Optional[_NDArray]] = [None] * max(ring_size, 1)
+        self.__free_indexes: typing.Deque[int] = collections.deque(range(len(self.__buffers)))
+        self.__lease_indexes: typing.Dict[FrameLease, typing.Optional[int]] = dict()
+        self.__leases: typing.Deque[FrameLease] = collections.deque()
+
+    @property
+    def ring_size(self) -> int:
+        return len(self.__buffers)
+
+    @property
+    def is_exhausted(self) -> bool:
+        with self.__lock:
+            return len(self.__leases) >= len(self.__buffers)
+
+    def lease_shared(self, data_and_metadata: DataAndMetadata.DataAndMetadata) -> FrameLease:
+        """Return a lease on a frame which is not changed later, without copying it."""
+        with self.__lock:
+            self.__check_exhausted()
+            return self.__lease(data_and_metadata, None)
+
+    def lease_copy(self, data_and_metadata: DataAndMetadata.DataAndMetadata) -> FrameLease:
+        """Copy the frame into a free buffer and return a lease on it."""
+        data = data_and_metadata.data
+        assert data is not None
+        with self.__lock:
+            self.__check_exhausted()
+            buffer_index = self.__free_indexes.popleft()
+            buffer = self.__buffers[buffer_index]
+            if buffer is None or buffer.shape != data.shape or buffer.dtype != data.dtype:
+                # allocate all free buffers for the new shape and type so later frames do not allocate.
+                for free_index in (buffer_index, *self.__free_indexes):
+                    self.__buffers[free_index] = numpy.empty(data.shape, data.dtype)
+                buffer = self.__buffers[buffer_index]
+                assert buffer is not None
+            buffer[...] = data
+            leased_data = buffer.view()
+            leased_data.flags.writeable = False
+            return self.__lease(DataAndMetadata.new_data_and_metadata(leased_data,
+                                                                      intensity_calibration=data_and_metadata.intensity_calibration,
+                                                                      dimensional_calibrations=data_and_metadata.dimensional_calibrations,
+                                                                      metadata=data_and_metadata.metadata,
+                                                                      timestamp=data_and_metadata.timestamp,
+                                                                      data_descriptor=data_and_metadata.data_descriptor),
+                                buffer_index)
+
+    def release_all(self) -> None:
+        with self.__lock:
+            while self.__leases:
+                self.__leases[0].release()
+
+    def __check_exhausted(self) -> None:
+        if self.is_exhausted:
+            raise RuntimeError(f"All {self.ring_size} frame leases are held. Release a lease before leasing another frame.")
+
+    def __lease(self, data_and_metadata: DataAndMetadata.DataAndMetadata, buffer_index: typing.Optional[int]) -> FrameLease:
+        lease = FrameLease(data_and_metadata, self.__release)
+        self.__lease_indexes[lease] = buffer_index
+        self.__leases.append(lease)
+        return lease
+
+    def __release(self, lease: FrameLease) -> None:
+        with self.__lock:
+            if lease in self.__lease_indexes:
+                buffer_index = self.__lease_indexes.pop(lease)
+                self.__leases.remove(lease)
+                if buffer_index is not None:
+                    self.__free_indexes.append(buffer_index)
+
+
+@contextlib.contextmanager
+def get_leased_data_generator_by_id(hardware_source_id: str, ring_size: int = 4) -> typing.Iterator[typing.Callable[[], typing.Optional[FrameLease]]]:
+    """
+        Return a generator for leased frames.
+
+        :param int ring_size: the number of buffers in the ring, which is the maximum number of leases held at once
+
+        Each call waits for the next frame to finish and leases the first enabled channel of the frame. When the data
+        channel owns the frame data, the lease shares the data channel snapshot, which the data channel copies only if
+        it writes the data again while the snapshot is held. Otherwise the producer may change the data later, so it is
+        copied into a free buffer of a preallocated ring, which costs one copy and no allocation. The lease is read-only
+        and valid until it is released; call keep to hold a frame beyond its lease. A call raises RuntimeError when
+        ring_size leases are held. Leases still held are released when the generator exits.
+    """
+    hardware_source = HardwareSourceManager().get_hardware_source_for_hardware_source_id(hardware_source_id)
+    if not hardware_source:
+        yield lambda: None
+        return
+    channel_id = next((hardware_source.get_channel_id(channel_index) for channel_index in range(hardware_source.get_channel_count()) if hardware_source.get_channel_enabled(channel_index)), None)
+    frame_ring = _FrameRing(ring_size)
+    condition = threading.Condition()
+    is_waiting = threading.Event()
+    next_leases: typing.List[FrameLease] = list()
+
+    def data_channel_updated(data_channel_event_args: DataChannelEventArgs, data_and_metadata: DataAndMetadata.DataAndMetadata) -> None:
+        # lease the frame as it arrives, on the acquisition thread, since the data may change with the next update.
+        if is_waiting.is_set() and data_channel_event_args.state == "complete" and data_channel_event_args.channel_id == channel_id:
+            with condition:
+                if is_waiting.is_set() and not next_leases and not frame_ring.is_exhausted:
+                    snapshot = data_channel_event_args.get_data_and_metadata_snapshot() if data_channel_event_args.is_data_owned else None
+                    next_leases.append(frame_ring.lease_shared(snapshot) if snapshot else frame_ring.lease_copy(data_and_metadata))
+                    condition.notify_all()
+
+    def get_next_lease() -> typing.Optional[FrameLease]:
+        with condition:
+            if frame_ring.is_exhausted:
+                raise RuntimeError(f"All {frame_ring.ring_size} frame leases are held. Release a lease before getting the next frame.")
+            is_waiting.set()
+            try:
+                if not condition.wait_for(lambda: bool(next_leases), 10.0):
+                    raise Exception("Could not grab next.")
+                return next_leases.pop()
+            finally:
+                is_waiting.clear()
+
+    with contextlib.closing(hardware_source.data_channel_updated_event.listen(data_channel_updated)):
+        try:
+            yield get_next_lease
+        finally:
+            frame_ring.release_all()
+
+
 class ViewTaskBuffer:
     """A fixed size buffer for a list of hardware source data channels.
 
@@ -1900,6 +2420,10 @@ class ViewTaskBuffer:
     a full frame of data, then stores it if it matches criteria (for instance every
     n seconds). Clients can retrieve earliest or latest data.
 
+    The buffer holds data channel snapshots, which share data owned by the data channels as read-only views rather
+    than copying it. It keeps at most buffer_size frames and, if max_bytes is specified, evicts the earliest frames to keep their total size within max_bytes. The
+    latest frame is always kept.
+
     Possible uses: record every frame, record every nth frame, record frame periodically,
       frame averaging, spectrum imaging.
     """
@@ -1909,13 +2433,15 @@ class ViewTaskBuffer:
         STARTED = 1
         PAUSED = 2
 
-    def __init__(self, hardware_source: HardwareSource, buffer_size: int = 16) -> None:
+    def __init__(self, hardware_source: HardwareSource, buffer_size: int = 16, *, max_bytes: typing.Optional[int] = None) -> None:
         self.__hardware_source = hardware_source
         self.__state_lock = threading.RLock()
         self.__state = ViewTaskBuffer.State.IDLE
         self.__buffer_size = buffer_size
+        self.__max_bytes = max_bytes
         self.__buffer_lock = threading.RLock()
-        self.__buffer: typing.List[typing.List[DataAndMetadata.DataAndMetadata]] = list()
+        self.__buffer: typing.Deque[typing.List[DataAndMetadata.DataAndMetadata]] = collections.deque()
+        self.__buffer_bytes = 0
         self.__done_events: typing.List[threading.Event] = list()
         self.__enabled_channel_ids: typing.Set[typing.Optional[str]] = set()
         self.__latest: typing.Dict[typing.Optional[str], DataAndMetadata.DataAndMetadata] = dict()
@@ -1932,21 +2458,43 @@ class ViewTaskBuffer:
         if self.__state == ViewTaskBuffer.State.STARTED:
             if data_channel_event_args.state == "complete":
                 with self.__buffer_lock:
-                    self.__latest[data_channel_event_args.channel_id] = data_and_metadata
+                    # take the snapshot as the frame arrives; the data channel copies its data on its next write.
+                    snapshot = data_channel_event_args.get_data_and_metadata_snapshot()
+                    self.__latest[data_channel_event_args.channel_id] = snapshot if snapshot is not None else copy.deepcopy(data_and_metadata)
                     if set(self.__latest.keys()).issuperset(self.__enabled_channel_ids):
                         data_and_metadata_list = list()
                         for channel_index in range(self.__hardware_source.get_channel_count()):
                             channel_id = self.__hardware_source.get_channel_id(channel_index)
                             if channel_id in self.__latest:
-                                data_and_metadata_list.append(copy.deepcopy(self.__latest[channel_id]))
+                                data_and_metadata_list.append(self.__latest[channel_id])
                         self.__buffer.append(data_and_metadata_list)
+                        self.__buffer_bytes += ViewTaskBuffer.__get_frame_bytes(data_and_metadata_list)
                         self.__latest = dict()
-                        if len(self.__buffer) > self.__buffer_size:
-                            self.__buffer.pop(0)
+                        while len(self.__buffer) > 1 and (len(self.__buffer) > self.__buffer_size or (self.__max_bytes is not None and self.__buffer_bytes > self.__max_bytes)):
+                            self.__pop_earliest()
                         for done_event in self.__done_events:
                             done_event.set()
                         self.__done_events = list()
 
+    @staticmethod
+    def __get_frame_bytes(data_and_metadata_list: typing.Sequence[DataAndMetadata.DataAndMetadata]) -> int:
+        return sum(data_and_metadata.data.nbytes for data_and_metadata in data_and_metadata_list if data_and_metadata.data is not None)
+
+    def __pop_earliest(self) -> typing.List[DataAndMetadata.DataAndMetadata]:
+        data_and_metadata_list = self.__buffer.popleft()
+        self.__buffer_bytes -= ViewTaskBuffer.__get_frame_bytes(data_and_metadata_list)
+        return data_and_metadata_list
+
+    def __clear(self) -> None:
+        self.__buffer.clear()
+        self.__buffer_bytes = 0
+
+    @property
+    def buffer_bytes(self) -> int:
+        """Return the total size of the data in the buffer."""
+        with self.__buffer_lock:
+            return self.__buffer_bytes
+
     def grab_latest(self, timeout: typing.Optional[float] = None) -> typing.Sequence[DataAndMetadata.DataAndMetadata]:
         """Grab the most recent data from the buffer, blocking until one is available. Clear earlier data."""
         timeout = timeout if timeout is not None else 10.0
@@ -1960,7 +2508,7 @@ class ViewTaskBuffer:
                 if not done:
                     raise Exception("Could not grab latest.")
             result = self.__buffer[-1]
-            self.__buffer = list()
+            self.__clear()
             return result
 
     def grab_earliest(self, timeout: typing.Optional[float] = None) -> typing.Sequence[DataAndMetadata.DataAndMetadata]:
@@ -1975,12 +2523,12 @@ class ViewTaskBuffer:
                 self.__buffer_lock.acquire()
                 if not done:
                     raise Exception("Could not grab latest.")
-            return self.__buffer.pop(0)
+            return self.__pop_earliest()
 
     def grab_next(self, timeout: typing.Optional[float] = None) -> typing.Sequence[DataAndMetadata.DataAndMetadata]:
         """Grab the next data to finish from the buffer, blocking until one is available."""
         with self.__buffer_lock:
-            self.__buffer = list()
+            self.__clear()
         return self.grab_latest(timeout)
 
     def grab_following(self, timeout: typing.Optional[float] = None) -> typing.Sequence[DataAndMetadata.DataAndMetadata]:
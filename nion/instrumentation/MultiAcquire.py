@@ -839,14 +839,23 @@ class MultiAcquireController:
 
     def __calculate_total_acquisition_time(self, spectrum_parameters: MultiEELSParametersList, settings: MultiEELSSettings,
                                            scan_parameters: typing.Optional[scan_base.ScanFrameParameters] = None,
-                                           include_shift_delay: bool = False) -> float:
+                                           include_shift_delay: bool = False,
+                                           include_camera_overhead: bool = False) -> float:
         total_time = 0.0
         if scan_parameters is not None:
             scan_size = scan_parameters.pixel_size
         else:
             scan_size = Geometry.IntSize(1, 1)
+        camera = self.camera if include_camera_overhead else None
+        camera_frame_parameters = camera.get_current_frame_parameters() if camera else None
         for parameters in spectrum_parameters.parameters:
-            total_time += scan_size[1] * scan_size[0] * parameters.frames * parameters.exposure_ms
+            frame_count = scan_size[1] * scan_size[0] * parameters.frames
+            if camera and camera_frame_parameters:
+                # use the camera overhead model, which adds the overhead learned from previous acquisitions.
+                camera_frame_parameters.exposure_ms = parameters.exposure_ms
+                total_time += camera.estimate_acquisition_time(camera_frame_parameters, frame_count) * 1000
+            else:
+                total_time += frame_count * parameters.exposure_ms
             if include_shift_delay:
                 if settings.shift_each_sequence_slice:
                     total_time += settings.x_shift_delay * parameters.frames * 1000
@@ -862,8 +871,8 @@ class MultiAcquireController:
 
     def get_total_acquisition_time(self) -> typing.Tuple[float, float]:
         scan_parameters = self.scan_controller.get_current_frame_parameters() if self.scan_controller else None
-        acquisition_time = self.__calculate_total_acquisition_time(self.spectrum_parameters, self.settings, None, True) * 0.001
-        si_acquisition_time = self.__calculate_total_acquisition_time(self.spectrum_parameters, self.settings, scan_parameters, True) * 0.001
+        acquisition_time = self.__calculate_total_acquisition_time(self.spectrum_parameters, self.settings, None, True, True) * 0.001
+        si_acquisition_time = self.__calculate_total_acquisition_time(self.spectrum_parameters, self.settings, scan_parameters, True, True) * 0.001
         if self.settings.auto_dark_subtract:
             # Auto dark subtract has no effect for acquire SI, so correct the total acquisition time
             si_acquisition_time *= 0.5
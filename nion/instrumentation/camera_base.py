@@ -1390,7 +1390,7 @@ class CameraHardwareSource(HardwareSource.HardwareSource, typing.Protocol):
     def acquire_synchronized_prepare(self, data_shape: DataAndMetadata.ShapeType, **kwargs: typing.Any) -> None: ...
     def acquire_synchronized(self, data_shape: DataAndMetadata.ShapeType, **kwargs: typing.Any) -> typing.Sequence[ImportExportManager.DataElementType]: ...
     def acquire_sequence_prepare(self, n: int, **kwargs: typing.Any) -> None: ...
-    def acquire_sequence(self, n: int) -> typing.Sequence[ImportExportManager.DataElementType]: ...
+    def acquire_sequence(self, n: int, *, progress_fn: typing.Optional[typing.Callable[[_NDArray, int], None]] = None) -> typing.Sequence[ImportExportManager.DataElementType]: ...
     def acquire_sequence_begin(self, camera_frame_parameters: CameraFrameParameters, count: int, **kwargs: typing.Any) -> PartialData: ...
     def acquire_sequence_continue(self, *, update_period: float = 1.0) -> PartialData: ...
     def acquire_sequence_end(self) -> None: ...
@@ -1433,7 +1433,12 @@ class CameraHardwareSource(HardwareSource.HardwareSource, typing.Protocol):
     @property
     def modes(self) -> typing.Sequence[str]: raise NotImplementedError()
 
+    @property
+    def overhead_model(self) -> CameraOverheadModel: raise NotImplementedError()
+
     def get_acquire_sequence_metrics(self, frame_parameters: CameraFrameParameters) -> typing.Mapping[str, typing.Any]: ...
+    def estimate_acquisition_time(self, frame_parameters: CameraFrameParameters, frame_count: int, section_count: int = 1) -> float: ...
+    def choose_section_height(self, frame_parameters: CameraFrameParameters, scan_size: Geometry.IntSize, max_overhead_fraction: float = 0.05) -> int: ...
     def make_live_data_element(self, data: _NDArray, properties: typing.Mapping[str, typing.Any], timestamp: datetime.datetime, frame_parameters: CameraFrameParameters, frame_count: int) -> ImportExportManager.DataElementType: ...
     def update_camera_properties(self, acquisition_data: AcquisitionData, frame_parameters: CameraFrameParameters, signal_type: typing.Optional[str] = None) -> None: ...
     def get_camera_calibrations(self, camera_frame_parameters: CameraFrameParameters) -> typing.Tuple[Calibration.Calibration, ...]: ...
@@ -1477,8 +1482,13 @@ class CameraHardwareSource2(HardwareSource.ConcreteHardwareSource, CameraHardwar
         self.__instrument_controller_id = instrument_controller_id
         self.__instrument_controller: typing.Optional[InstrumentController] = None
 
+        # the overhead model is persisted alongside the camera configuration, if any.
+        overhead_config_file = configuration_location / pathlib.Path(typing.cast(typing.Any, camera).camera_id + "_overhead.json") if configuration_location else None
+        self.__overhead_model = CameraOverheadModel(overhead_config_file)
+
         self.__camera = camera
         self.__camera_category = typing.cast(typing.Any, camera).camera_type
+        self.__acquire_sequence_fallback_cancel = threading.Event()
         # signal type falls back to camera category if camera category is "eels" or "ronchigram". this is only for
         # backward compatibility. new camera instances should define signal_type directly.
         self.__signal_type = getattr(camera, "signal_type", self.__camera_category if self.__camera_category in ("eels", "ronchigram") else None)
@@ -1538,6 +1548,7 @@ class CameraHardwareSource2(HardwareSource.ConcreteHardwareSource, CameraHardwar
     def close(self) -> None:
         self.__periodic_logger_fn = None
         super().close()
+        self.__overhead_model.save()
         if self.__settings_changed_event_listener:
             self.__settings_changed_event_listener.close()
             self.__settings_changed_event_listener = None
@@ -1721,40 +1732,47 @@ class CameraHardwareSource2(HardwareSource.ConcreteHardwareSource, CameraHardwar
             return self.acquire_sequence(int(numpy.prod(data_shape)))  # type: ignore
 
     def acquire_sequence_prepare(self, n: int, **kwargs: typing.Any) -> None:
+        # a cancel issued after prepare applies to the next sequence; one issued before applies to an earlier sequence.
+        self.__acquire_sequence_fallback_cancel.clear()
         frame_parameters = self.get_current_frame_parameters()
         self.__camera.set_frame_parameters(frame_parameters)
         acquire_sequence_prepare = getattr(self.__camera, "acquire_sequence_prepare", None)
         if callable(acquire_sequence_prepare):
             acquire_sequence_prepare(n, **kwargs)
 
-    def __acquire_sequence_fallback(self, n: int, frame_parameters: CameraFrameParameters) -> typing.Optional[ImportExportManager.DataElementType]:
+    def __acquire_sequence_fallback(self, n: int, frame_parameters: CameraFrameParameters, progress_fn: typing.Optional[typing.Callable[[_NDArray, int], None]]) -> typing.Optional[ImportExportManager.DataElementType]:
         # if the device does not implement acquire_sequence, fall back to looping acquisition.
+        # the output data is allocated once the first frame shape is known and each frame is written into place.
+        # the progress function, if any, is called after each frame with the data and the count of valid frames.
+        # cancellation is checked between frames; None is returned if the acquisition is canceled.
         processing = frame_parameters.processing
         acquisition_task = LiveCameraAcquisitionTask(self.__get_instrument_controller(), self, True, self.__camera_category, self.__signal_type, frame_parameters)
         acquisition_task._start_acquisition()
         try:
-            properties = None
+            frame_data_element: ImportExportManager.DataElementType = dict()
             data = None
             for index in range(n):
+                if self.__acquire_sequence_fallback_cancel.is_set():
+                    return None
                 frame_data_element = acquisition_task._acquire_data_elements()[0]
                 frame_data = frame_data_element["data"]
+                is_summed = processing == "sum_project" and len(frame_data.shape) > 1
                 if data is None:
-                    if processing == "sum_project" and len(frame_data.shape) > 1:
-                        data = numpy.empty((n,) + frame_data.shape[1:], frame_data.dtype)
-                    else:
-                        data = numpy.empty((n,) + frame_data.shape, frame_data.dtype)
-                if processing == "sum_project" and len(frame_data.shape) > 1:
-                    summed_xdata = Core.function_sum(DataAndMetadata.new_data_and_metadata(frame_data), 0)
-                    assert summed_xdata
-                    data[index] = summed_xdata.data
+                    data = numpy.empty((n,) + (frame_data.shape[1:] if is_summed else frame_data.shape), frame_data.dtype)
+                if is_summed:
+                    data[index] = numpy.sum(frame_data, axis=0)
                 else:
                     data[index] = frame_data
-                properties = copy.deepcopy(frame_data_element["properties"])
-                if processing == "sum_project":
-                    properties["valid_rows"] = 1
-                    spatial_properties = properties.get("spatial_calibrations")
-                    if spatial_properties is not None:
-                        properties["spatial_calibrations"] = spatial_properties[1:]
+                if callable(progress_fn):
+                    progress_fn(data, index + 1)
+            # only the properties of the last frame are used, so copy them once. the live data element stores the
+            # frame properties in the hardware source metadata.
+            properties = copy.deepcopy(frame_data_element.get("metadata", dict()).get("hardware_source", dict()))
+            if processing == "sum_project":
+                properties["valid_rows"] = 1
+                spatial_properties = properties.get("spatial_calibrations")
+                if spatial_properties is not None:
+                    properties["spatial_calibrations"] = spatial_properties[1:]
         finally:
             acquisition_task._stop_acquisition()
         data_element: typing.Dict[str, typing.Any] = dict()
@@ -1763,13 +1781,19 @@ class CameraHardwareSource2(HardwareSource.ConcreteHardwareSource, CameraHardwar
         data_element["hardware_source"] = properties
         return data_element
 
-    def acquire_sequence(self, n: int) -> typing.Sequence[ImportExportManager.DataElementType]:
+    def acquire_sequence(self, n: int, *, progress_fn: typing.Optional[typing.Callable[[_NDArray, int], None]] = None) -> typing.Sequence[ImportExportManager.DataElementType]:
+        # the device acquire_sequence does not report progress, so progress is reported once when it returns.
         frame_parameters = self.get_current_frame_parameters()
         acquire_sequence = getattr(self.__camera, "acquire_sequence", None)
-        if callable(acquire_sequence):
-            data_element = acquire_sequence(n)
-        else:
-            data_element = self.__acquire_sequence_fallback(n, frame_parameters)
+        try:
+            if callable(acquire_sequence):
+                data_element = acquire_sequence(n)
+                if data_element and callable(progress_fn):
+                    progress_fn(data_element["data"], n)
+            else:
+                data_element = self.__acquire_sequence_fallback(n, frame_parameters, progress_fn)
+        finally:
+            self.__acquire_sequence_fallback_cancel.clear()
         if data_element:
             self.__update_data_element_for_sequence(data_element, frame_parameters)
             return [data_element]
@@ -1903,6 +1927,7 @@ class CameraHardwareSource2(HardwareSource.ConcreteHardwareSource, CameraHardwar
             acquire_sequence_end()
 
     def acquire_sequence_cancel(self) -> None:
+        self.__acquire_sequence_fallback_cancel.set()
         acquire_sequence_cancel = getattr(self.__camera, "acquire_sequence_cancel", None)
         if callable(acquire_sequence_cancel):
             acquire_sequence_cancel()
@@ -1913,6 +1938,26 @@ class CameraHardwareSource2(HardwareSource.ConcreteHardwareSource, CameraHardwar
             return typing.cast(typing.Mapping[str, typing.Any], get_acquire_sequence_metrics(frame_parameters))
         return dict()
 
+    @property
+    def overhead_model(self) -> CameraOverheadModel:
+        return self.__overhead_model
+
+    def estimate_acquisition_time(self, frame_parameters: CameraFrameParameters, frame_count: int, section_count: int = 1) -> float:
+        """Return the estimated acquisition time (seconds) of frame_count frames in section_count sections.
+
+        The estimate includes the camera overhead learned from previous acquisitions.
+        """
+        return self.__overhead_model.estimate_acquisition_time(frame_parameters.exposure_ms / 1000, frame_parameters.binning,
+                                                               self.get_expected_dimensions(frame_parameters), frame_count, section_count)
+
+    def choose_section_height(self, frame_parameters: CameraFrameParameters, scan_size: Geometry.IntSize, max_overhead_fraction: float = 0.05) -> int:
+        """Return the smallest section height for a synchronized scan of scan_size keeping the learned section overhead
+        at most max_overhead_fraction of the section time.
+        """
+        return self.__overhead_model.choose_section_height(frame_parameters.exposure_ms / 1000, frame_parameters.binning,
+                                                           self.get_expected_dimensions(frame_parameters), scan_size.width,
+                                                           scan_size.height, max_overhead_fraction)
+
     def __current_frame_parameters_changed(self, frame_parameters: CameraFrameParameters) -> None:
         acquisition_task = self.__acquisition_task
         if isinstance(acquisition_task, LiveCameraAcquisitionTask):
@@ -2082,6 +2127,10 @@ class CameraHardwareSource3(HardwareSource.ConcreteHardwareSource, CameraHardwar
         self.__instrument_controller_id = instrument_controller_id
         self.__instrument_controller: typing.Optional[InstrumentController] = None
 
+        # the overhead model is persisted alongside the camera configuration, if any.
+        overhead_config_file = configuration_location / pathlib.Path(typing.cast(typing.Any, camera).camera_id + "_overhead.json") if configuration_location else None
+        self.__overhead_model = CameraOverheadModel(overhead_config_file)
+
         self.__camera = camera
         self.__camera_category = typing.cast(typing.Any, camera).camera_type
         # signal type falls back to camera category if camera category is "eels" or "ronchigram". this is only for
@@ -2167,6 +2216,7 @@ class CameraHardwareSource3(HardwareSource.ConcreteHardwareSource, CameraHardwar
     def close(self) -> None:
         self.__periodic_logger_fn = None
         super().close()
+        self.__overhead_model.save()
         if self.__settings_changed_event_listener:
             self.__settings_changed_event_listener.close()
             self.__settings_changed_event_listener = None
@@ -2345,11 +2395,13 @@ class CameraHardwareSource3(HardwareSource.ConcreteHardwareSource, CameraHardwar
         # prepare does nothing in camera device 3
         return list()
 
-    def acquire_sequence(self, n: int) -> typing.Sequence[ImportExportManager.DataElementType]:
+    def acquire_sequence(self, n: int, *, progress_fn: typing.Optional[typing.Callable[[_NDArray, int], None]] = None) -> typing.Sequence[ImportExportManager.DataElementType]:
         frame_parameters = self.get_current_frame_parameters()
         partial_data = self.acquire_sequence_begin(frame_parameters, n)
         while not partial_data.is_complete and not partial_data.is_canceled:
             partial_data = self.acquire_sequence_continue()
+            if callable(progress_fn) and partial_data.valid_count is not None:
+                progress_fn(partial_data.xdata.data, partial_data.valid_count)
         self.acquire_sequence_end()
         data_element = {"data": partial_data.xdata.data}
         self.__update_data_element_for_sequence(data_element, frame_parameters)
@@ -2385,6 +2437,7 @@ class CameraHardwareSource3(HardwareSource.ConcreteHardwareSource, CameraHardwar
         if instrument_metadata:
             data_element["metadata"].setdefault("instrument", dict()).update(instrument_metadata)
         update_camera_properties(data_element["metadata"]["hardware_source"], frame_parameters, self.hardware_source_id, self.display_name, data_element.get("signal_type", self.__signal_type))
+        self.__update_calibration_timestamp(data_element["metadata"]["hardware_source"])
         data_element["metadata"]["hardware_source"]["valid_rows"] = data.shape[0]
         data_element["metadata"]["hardware_source"]["frame_index"] = data_element["metadata"]["hardware_source"]["frame_number"]
         data_element["metadata"]["hardware_source"]["integration_count"] = frame_count
@@ -2398,6 +2451,14 @@ class CameraHardwareSource3(HardwareSource.ConcreteHardwareSource, CameraHardwar
         acquisition_data.counts_per_electron = self.get_counts_per_electron()
         STEMController.update_instrument_properties(metadata.setdefault("instrument", dict()), self.__get_instrument_controller(), self.__camera)
         update_camera_properties(metadata.setdefault("hardware_source", dict()), frame_parameters, self.hardware_source_id, self.display_name, signal_type or self.__signal_type)
+        self.__update_calibration_timestamp(metadata["hardware_source"])
+
+    def __update_calibration_timestamp(self, properties: typing.MutableMapping[str, typing.Any]) -> None:
+        # record when the calibrations became valid, if the calibrator caches its calibrations, so that stale
+        # calibrations can be detected.
+        calibration_timestamp = getattr(self.__get_camera_calibrator(), "calibration_timestamp", None)
+        if isinstance(calibration_timestamp, datetime.datetime):
+            properties["calibration_timestamp"] = calibration_timestamp.isoformat()
 
     def get_camera_calibrations(self, camera_frame_parameters: CameraFrameParameters) -> typing.Tuple[Calibration.Calibration, ...]:
         calibrator = self.__get_camera_calibrator()
@@ -2444,6 +2505,26 @@ class CameraHardwareSource3(HardwareSource.ConcreteHardwareSource, CameraHardwar
             return typing.cast(typing.Mapping[str, typing.Any], get_acquire_sequence_metrics(frame_parameters))
         return dict()
 
+    @property
+    def overhead_model(self) -> CameraOverheadModel:
+        return self.__overhead_model
+
+    def estimate_acquisition_time(self, frame_parameters: CameraFrameParameters, frame_count: int, section_count: int = 1) -> float:
+        """Return the estimated acquisition time (seconds) of frame_count frames in section_count sections.
+
+        The estimate includes the camera overhead learned from previous acquisitions.
+        """
+        return self.__overhead_model.estimate_acquisition_time(frame_parameters.exposure_ms / 1000, frame_parameters.binning,
+                                                               self.get_expected_dimensions(frame_parameters), frame_count, section_count)
+
+    def choose_section_height(self, frame_parameters: CameraFrameParameters, scan_size: Geometry.IntSize, max_overhead_fraction: float = 0.05) -> int:
+        """Return the smallest section height for a synchronized scan of scan_size keeping the learned section overhead
+        at most max_overhead_fraction of the section time.
+        """
+        return self.__overhead_model.choose_section_height(frame_parameters.exposure_ms / 1000, frame_parameters.binning,
+                                                           self.get_expected_dimensions(frame_parameters), scan_size.width,
+                                                           scan_size.height, max_overhead_fraction)
+
     def __current_frame_parameters_changed(self, frame_parameters: CameraFrameParameters) -> None:
         acquisition_task = self.__acquisition_task
         if isinstance(acquisition_task, LiveCameraAcquisitionTask):
@@ -2609,23 +2690,54 @@ def crop_and_calibrate(uncropped_xdata: DataAndMetadata.DataAndMetadata, flyback
                        data_calibrations: DataAndMetadata.CalibrationListType,
                        data_intensity_calibration: typing.Optional[Calibration.Calibration],
                        metadata: DataAndMetadata.MetadataType) -> DataAndMetadata.DataAndMetadata:
+    """Return the uncropped data with the flyback pixels removed and with calibrations applied.
+
+    The returned data is a view into the uncropped data whenever the memory layout allows; it is not copied. When
+    cropping flyback pixels, the returned data is not contiguous. Consumers requiring contiguous data should use
+    get_flattened_navigation_data to copy only the portion they need.
+
+    If scan calibrations are not supplied, the collection calibrations of the uncropped data are used with the offset
+    of the fast scan axis adjusted to account for the cropped flyback pixels.
+    """
     data_shape = uncropped_xdata.data_shape
     collection_shape = uncropped_xdata.collection_dimension_shape
-    scan_calibrations = scan_calibrations or uncropped_xdata.collection_dimensional_calibrations
+    if not scan_calibrations:
+        scan_calibrations = list(uncropped_xdata.collection_dimensional_calibrations)
+        if flyback_pixels > 0 and len(scan_calibrations) > 1:
+            x_calibration = scan_calibrations[1]
+            scan_calibrations[1] = Calibration.Calibration(x_calibration.offset + flyback_pixels * x_calibration.scale, x_calibration.scale, x_calibration.units)
     uncropped_data = uncropped_xdata.data
     assert uncropped_data is not None, "Device data was None."
+    # reshaping to the same shape or to an equivalent shape of contiguous data returns a view.
+    data = uncropped_data.reshape(*collection_shape, *data_shape[len(collection_shape):])
     if flyback_pixels > 0:
-        data = uncropped_data.reshape(*collection_shape, *data_shape[len(collection_shape):])[:, flyback_pixels:collection_shape[1], :]
-    else:
-        data = uncropped_data.reshape(*collection_shape, *data_shape[len(collection_shape):])
+        data = data[:, flyback_pixels:collection_shape[1], ...]
     dimensional_calibrations = tuple(scan_calibrations) + tuple(data_calibrations)
+    # note: new_data_and_metadata takes ownership of the data and makes a shallow copy of the metadata.
     return DataAndMetadata.new_data_and_metadata(data, data_intensity_calibration,
                                                  dimensional_calibrations,
-                                                 dict(metadata), None,
+                                                 metadata, None,
                                                  uncropped_xdata.data_descriptor, None,
                                                  None)
 
 
+def get_flattened_navigation_data(data: _NDArray, navigation_shape: DataAndMetadata.ShapeType, start_index: int, stop_index: int) -> typing.Tuple[_NDArray, int]:
+    """Return the data with the navigation dimensions flattened and the flat index corresponding to its first item.
+
+    The data is returned as a view if possible. If the data is not contiguous (for instance when flyback pixels have
+    been cropped), only the rows spanning start_index to stop_index are copied, not the entire data.
+    """
+    datum_shape = tuple(data.shape[len(navigation_shape):])
+    if len(navigation_shape) < 2 or data.flags.c_contiguous:
+        data_count = int(numpy.prod(navigation_shape, dtype=numpy.int64))
+        return data.reshape((data_count,) + datum_shape), 0
+    row_size = int(numpy.prod(navigation_shape[1:], dtype=numpy.int64))
+    row_start = start_index // row_size
+    row_stop = (stop_index + row_size - 1) // row_size
+    row_data = numpy.ascontiguousarray(data[row_start:row_stop])
+    return row_data.reshape(((row_stop - row_start) * row_size,) + datum_shape), row_start * row_size
+
+
 @dataclasses.dataclass
 class CameraDeviceStreamPartialData:
     """Represents the data returned from get_next_data in the CameraDeviceStreamInterface."""
@@ -2654,6 +2766,53 @@ class CameraDeviceStreamInterface(typing.Protocol):
     def continue_data(self, partial_data: typing.Optional[CameraDeviceStreamPartialData]) -> None: ...
 
 
+class CameraDeviceStreamReducer:
+    """Apply a datum reduction operator to the partial data from a camera device stream.
+
+    Only the newly valid frames are reduced on each call and they are written into a buffer sized for the reduced
+    output, so the full resolution frames are never copied.
+    """
+
+    def __init__(self, operator: Acquisition.DatumReductionOperator) -> None:
+        self.__operator = operator
+        self.__buffer: typing.Optional[_NDArray] = None
+        self.__last_index = 0
+
+    def reset(self) -> None:
+        # allocate a new buffer for each section since the previous one may still be referenced downstream.
+        self.__buffer = None
+        self.__last_index = 0
+
+    def reduce(self, xdata: DataAndMetadata.DataAndMetadata, valid_index: int) -> DataAndMetadata.DataAndMetadata:
+        data = xdata.data
+        assert data is not None
+        datum_dimension_count = xdata.datum_dimension_count
+        data_metadata = self.__operator.reduce_data_metadata(xdata.data_metadata)
+        if not xdata.is_navigable:
+            reduced_data = self.__operator.reduce_data(data, datum_dimension_count)
+        else:
+            navigation_shape = tuple(xdata.navigation_dimension_shape)
+            if self.__buffer is None or self.__buffer.shape != tuple(data_metadata.data_shape):
+                self.__buffer = numpy.zeros(data_metadata.data_shape, dtype=data_metadata.data_dtype)
+                self.__last_index = 0
+            if valid_index > self.__last_index:
+                source_data, source_start_index = get_flattened_navigation_data(data, navigation_shape, self.__last_index, valid_index)
+                source_data = source_data[self.__last_index - source_start_index:valid_index - source_start_index]
+                navigation_count = int(numpy.prod(navigation_shape, dtype=numpy.int64))
+                flat_buffer = self.__buffer.reshape((navigation_count,) + tuple(self.__buffer.shape[len(navigation_shape):]))
+                flat_buffer[self.__last_index:valid_index] = self.__operator.reduce_data(source_data, datum_dimension_count)
+                self.__last_index = valid_index
+            reduced_data = self.__buffer
+        return DataAndMetadata.new_data_and_metadata(reduced_data,
+                                                     intensity_calibration=data_metadata.intensity_calibration,
+                                                     dimensional_calibrations=data_metadata.dimensional_calibrations,
+                                                     data_descriptor=data_metadata.data_descriptor,
+                                                     metadata=xdata.metadata,
+                                                     timestamp=xdata.timestamp,
+                                                     timezone=xdata.timezone,
+                                                     timezone_offset=xdata.timezone_offset)
+
+
 class CameraDeviceSynchronizedStreamDelegate(CameraDeviceStreamInterface):
     """An interface using the 'synchronized' style methods of the camera."""
     def __init__(self, camera_hardware_source: CameraHardwareSource, camera_frame_parameters: CameraFrameParameters, flyback_pixels: int = 0, additional_metadata: typing.Optional[DataAndMetadata.MetadataType] = None) -> None:
@@ -2664,6 +2823,7 @@ class CameraDeviceSynchronizedStreamDelegate(CameraDeviceStreamInterface):
         self.__flyback_pixels = flyback_pixels
         self.__partial_data_info = typing.cast(PartialData, None)
         self.__slice: typing.List[slice] = list()
+        self.__reducer: typing.Optional[CameraDeviceStreamReducer] = None
 
     def prepare_stream(self, stream_args: Acquisition.DataStreamArgs, index_stack: Acquisition.IndexDescriptionList, **kwargs: typing.Any) -> int:
         camera_frame_parameters = self.__camera_frame_parameters
@@ -2673,6 +2833,7 @@ class CameraDeviceSynchronizedStreamDelegate(CameraDeviceStreamInterface):
         camera_frame_parameters.active_masks = list()
         # get the operator.
         operator = typing.cast(Acquisition.DataStreamOperator, kwargs.get("operator", Acquisition.NullDataStreamOperator()))
+        self.__reducer = None
         # rebuild the low level processing commands using the operator.
         if isinstance(operator, Acquisition.SumOperator):
             if operator.axis == 0:
@@ -2688,6 +2849,10 @@ class CameraDeviceSynchronizedStreamDelegate(CameraDeviceStreamInterface):
             camera_frame_parameters.processing = "sum_masked"
             camera_frame_parameters.active_masks = [typing.cast(Mask, typing.cast(Acquisition.MaskedSumOperator, o).mask) for o in operator.operators]
             operator.apply()
+        elif isinstance(operator, Acquisition.DatumReductionOperator):
+            # software reduction is applied to the partial data before it is copied into the destination.
+            self.__reducer = CameraDeviceStreamReducer(operator)
+            operator.apply()
         # save original current camera frame parameters. these will be restored in finish stream.
         self.__camera_frame_parameters_original = self.__camera_hardware_source.get_current_frame_parameters()
         self.__camera_hardware_source.set_current_frame_parameters(camera_frame_parameters)
@@ -2697,6 +2862,8 @@ class CameraDeviceSynchronizedStreamDelegate(CameraDeviceStreamInterface):
 
     def start_stream(self, stream_args: Acquisition.DataStreamArgs) -> None:
         self.__slice = list(stream_args.slice)
+        if self.__reducer:
+            self.__reducer.reset()
         collection_shape = (stream_args.slice_rect.height, stream_args.slice_rect.width + self.__flyback_pixels)  # includes flyback pixels
         self.__partial_data_info = self.__camera_hardware_source.acquire_synchronized_begin(self.__camera_frame_parameters, collection_shape)
 
@@ -2745,6 +2912,8 @@ class CameraDeviceSynchronizedStreamDelegate(CameraDeviceStreamInterface):
             cropped_xdata = crop_and_calibrate(uncropped_xdata, self.__flyback_pixels, None, data_calibrations, data_intensity_calibration, metadata)
             # convert the valid count to valid index. valid count includes flyback pixels. valid index does not.
             valid_index = valid_count // (width + self.__flyback_pixels) * width + max(0, valid_count % (width + self.__flyback_pixels) - self.__flyback_pixels)
+            if self.__reducer:
+                cropped_xdata = self.__reducer.reduce(cropped_xdata, valid_index)
             return CameraDeviceStreamPartialData(valid_index, is_complete, cropped_xdata)
         return None
 
@@ -2765,6 +2934,7 @@ class CameraDeviceSequenceStreamDelegate(CameraDeviceStreamInterface):
         self.__additional_metadata = additional_metadata or dict()
         self.__partial_data_info = typing.cast(PartialData, None)
         self.__slice: typing.List[slice] = list()
+        self.__reducer: typing.Optional[CameraDeviceStreamReducer] = None
 
     def prepare_stream(self, stream_args: Acquisition.DataStreamArgs, index_stack: Acquisition.IndexDescriptionList, **kwargs: typing.Any) -> int:
         camera_frame_parameters = self.__camera_frame_parameters
@@ -2774,6 +2944,7 @@ class CameraDeviceSequenceStreamDelegate(CameraDeviceStreamInterface):
         camera_frame_parameters.active_masks = list()
         # get the operator.
         operator = typing.cast(Acquisition.DataStreamOperator, kwargs.get("operator", Acquisition.NullDataStreamOperator()))
+        self.__reducer = None
         # rebuild the low level processing commands using the operator.
         if isinstance(operator, Acquisition.SumOperator):
             if operator.axis == 0:
@@ -2789,6 +2960,10 @@ class CameraDeviceSequenceStreamDelegate(CameraDeviceStreamInterface):
             camera_frame_parameters.processing = "sum_masked"
             camera_frame_parameters.active_masks = [typing.cast(Mask, typing.cast(Acquisition.MaskedSumOperator, o).mask) for o in operator.operators]
             operator.apply()
+        elif isinstance(operator, Acquisition.DatumReductionOperator):
+            # software reduction is applied to the partial data before it is copied into the destination.
+            self.__reducer = CameraDeviceStreamReducer(operator)
+            operator.apply()
         # save original current camera frame parameters. these will be restored in finish stream.
         self.__camera_frame_parameters_original = self.__camera_hardware_source.get_current_frame_parameters()
         self.__camera_hardware_source.set_current_frame_parameters(camera_frame_parameters)
@@ -2797,6 +2972,8 @@ class CameraDeviceSequenceStreamDelegate(CameraDeviceStreamInterface):
 
     def start_stream(self, stream_args: Acquisition.DataStreamArgs) -> None:
         self.__slice = list(stream_args.slice)
+        if self.__reducer:
+            self.__reducer.reset()
         self.__partial_data_info = self.__camera_hardware_source.acquire_sequence_begin(self.__camera_frame_parameters, stream_args.sequence_count)
 
     def finish_stream(self) -> None:
@@ -2835,6 +3012,8 @@ class CameraDeviceSequenceStreamDelegate(CameraDeviceStreamInterface):
             data_calibrations = self.__camera_hardware_source.get_camera_calibrations(self.__camera_frame_parameters)
             data_intensity_calibration = self.__camera_hardware_source.get_camera_intensity_calibration(self.__camera_frame_parameters)
             cropped_xdata = crop_and_calibrate(uncropped_xdata, 0, None, data_calibrations, data_intensity_calibration, metadata)
+            if self.__reducer:
+                cropped_xdata = self.__reducer.reduce(cropped_xdata, valid_count)
             return CameraDeviceStreamPartialData(valid_count, is_complete, cropped_xdata)
         return None
 
@@ -2846,6 +3025,143 @@ class CameraDeviceSequenceStreamDelegate(CameraDeviceStreamInterface):
             self.__partial_data_info = typing.cast(typing.Any, None)
 
 
+@dataclasses.dataclass
+class CameraOverhead:
+    """Represents the estimated overhead of a camera acquisition, in seconds.
+
+    start is the fixed cost of preparing and starting the first section of an acquisition.
+
+    section is the cost of preparing and starting each subsequent section.
+
+    frame is the readout overhead of each frame beyond its exposure time.
+    """
+    start: float
+    section: float
+    frame: float
+
+
+class CameraOverheadModel:
+    """Learn the overhead of camera acquisitions from measurements.
+
+    Measurements are grouped by binning and readout shape. The start and section costs are tracked using an exponential
+    moving average. The frame time is tracked as a weighted linear fit of frame time versus exposure so that the frame
+    overhead can be estimated for exposures not yet measured. Older measurements decay so that the model follows
+    changes in camera behavior.
+
+    If a config file is supplied, the model is loaded from and saved to the file so that it persists across sessions.
+    The model is saved only if it has changed since it was loaded or last saved; the camera hardware source saves it
+    when it is closed.
+    """
+
+    decay = 0.8
+
+    def __init__(self, config_file: typing.Optional[pathlib.Path] = None) -> None:
+        self.__config_file = config_file
+        self.__lock = threading.RLock()
+        self.__entries: typing.Dict[str, typing.Dict[str, float]] = dict()
+        self.__is_modified = False
+        if config_file and config_file.is_file():
+            try:
+                with open(config_file) as f:
+                    self.__entries = dict(json.load(f).get("entries", dict()))
+            except Exception as e:
+                logging.warning(f"Unable to read camera overhead model {config_file}: {e}")
+
+    @staticmethod
+    def __get_key(binning: int, frame_shape: DataAndMetadata.ShapeType) -> str:
+        return f"{binning}:" + "x".join(str(d) for d in frame_shape)
+
+    def __get_entry(self, binning: int, frame_shape: DataAndMetadata.ShapeType) -> typing.Dict[str, float]:
+        return self.__entries.setdefault(self.__get_key(binning, frame_shape), dict())
+
+    def __update_average(self, entry: typing.Dict[str, float], name: str, value: float) -> None:
+        entry[name] = entry[name] * self.decay + value * (1.0 - self.decay) if name in entry else value
+
+    def add_start_measurement(self, binning: int, frame_shape: DataAndMetadata.ShapeType, duration: float, *, is_first_section: bool = True) -> None:
+        """Add a measurement of the time to prepare and start an acquisition section."""
+        with self.__lock:
+            entry = self.__get_entry(binning, frame_shape)
+            self.__update_average(entry, "start" if is_first_section else "section", duration)
+            self.__is_modified = True
+
+    def add_frames_measurement(self, binning: int, frame_shape: DataAndMetadata.ShapeType, exposure: float, frame_count: int, duration: float) -> None:
+        """Add a measurement of the time to acquire frame_count frames at the exposure (seconds)."""
+        if frame_count > 0:
+            with self.__lock:
+                entry = self.__get_entry(binning, frame_shape)
+                frame_time = duration / frame_count
+                for name, value in (("n", 1.0), ("sx", exposure), ("sy", frame_time), ("sxx", exposure * exposure), ("sxy", exposure * frame_time)):
+                    entry[name] = entry.get(name, 0.0) * self.decay + value
+                self.__is_modified = True
+
+    def __get_frame_overhead(self, entry: typing.Mapping[str, float], exposure: float) -> typing.Optional[float]:
+        n = entry.get("n", 0.0)
+        if n <= 0.0:
+            return None
+        mean_x = entry["sx"] / n
+        mean_y = entry["sy"] / n
+        variance_x = entry["sxx"] / n - mean_x * mean_x
+        if variance_x > 1E-12:
+            # use the fit if measurements cover several exposures.
+            slope = (entry["sxy"] / n - mean_x * mean_y) / variance_x
+            frame_time = mean_y + slope * (exposure - mean_x)
+        else:
+            # otherwise assume the overhead is independent of the exposure.
+            frame_time = mean_y - mean_x + exposure
+        return max(0.0, frame_time - exposure)
+
+    def get_overhead(self, exposure: float, binning: int, frame_shape: DataAndMetadata.ShapeType) -> CameraOverhead:
+        """Return the estimated overhead for the exposure (seconds), binning, and frame shape.
+
+        Falls back to the average of all measured configurations if this configuration has not been measured; and to
+        zero overhead if nothing has been measured.
+        """
+        with self.__lock:
+            entries = list(self.__entries.values())
+            entry = self.__entries.get(self.__get_key(binning, frame_shape))
+            values: typing.Dict[str, float] = dict()
+            for name in ("start", "section"):
+                if entry and name in entry:
+                    values[name] = entry[name]
+                else:
+                    measured = [e[name] for e in entries if name in e]
+                    values[name] = sum(measured) / len(measured) if measured else 0.0
+            frame_overhead = self.__get_frame_overhead(entry, exposure) if entry else None
+            if frame_overhead is None:
+                frame_overheads = [o for o in (self.__get_frame_overhead(e, exposure) for e in entries) if o is not None]
+                frame_overhead = sum(frame_overheads) / len(frame_overheads) if frame_overheads else 0.0
+            # a section which has not been measured separately costs the same as the first section.
+            section = values["section"] or values["start"]
+            return CameraOverhead(values["start"], section, frame_overhead)
+
+    def estimate_acquisition_time(self, exposure: float, binning: int, frame_shape: DataAndMetadata.ShapeType, frame_count: int, section_count: int = 1) -> float:
+        """Return the estimated time (seconds) to acquire frame_count frames split into section_count sections."""
+        overhead = self.get_overhead(exposure, binning, frame_shape)
+        return overhead.start + overhead.section * max(0, section_count - 1) + (exposure + overhead.frame) * frame_count
+
+    def choose_section_height(self, exposure: float, binning: int, frame_shape: DataAndMetadata.ShapeType, scan_width: int, scan_height: int, max_overhead_fraction: float = 0.05) -> int:
+        """Return the smallest section height (rows) whose section overhead is at most max_overhead_fraction of the time
+        to acquire the section.
+
+        Returns scan_height (a single section) if the section overhead has not been measured.
+        """
+        overhead = self.get_overhead(exposure, binning, frame_shape)
+        row_time = (exposure + overhead.frame) * scan_width
+        if overhead.section <= 0.0 or row_time <= 0.0 or max_overhead_fraction <= 0.0:
+            return scan_height
+        return max(1, min(scan_height, math.ceil(overhead.section / (max_overhead_fraction * row_time))))
+
+    def save(self) -> None:
+        """Save the model to the config file, if any, if it has changed."""
+        if self.__config_file:
+            with self.__lock:
+                if not self.__is_modified:
+                    return
+                entries = copy.deepcopy(self.__entries)
+                self.__is_modified = False
+            settings_changed(self.__config_file, {"version": 1, "entries": entries})
+
+
 class CameraDataStream(Acquisition.DataStream):
     """A data stream of a sequence of camera frames.
     """
@@ -2866,6 +3182,9 @@ class CameraDataStream(Acquisition.DataStream):
         self.__camera_sequence_overheads: typing.List[float] = list()
         self.camera_sequence_overhead = 0.0
         self.__start = 0.0
+        self.__prepare_duration = 0.0
+        self.__frames_start = 0.0
+        self.__is_first_section = True
         self.__progress = 0.0
 
     def __deepcopy__(self, memo: typing.Dict[typing.Any, typing.Any]) -> CameraDataStream:
@@ -2892,13 +3211,15 @@ class CameraDataStream(Acquisition.DataStream):
 
             self.__camera_hardware_source.abort_playing(sync_timeout=60.0)
             device_state.add_state("restart_camera", functools.partial(restart_camera, self.__camera_hardware_source, self.__camera_hardware_source.get_current_frame_parameters()))
+        self.__is_first_section = True
 
     def _prepare_stream(self, stream_args: Acquisition.DataStreamArgs, index_stack: Acquisition.IndexDescriptionList, **kwargs: typing.Any) -> None:
         assert self.__camera_device_stream_delegate
         # bookkeeping for timing and progress
         self.__start = time.perf_counter()
         self.__total_count = self.__camera_device_stream_delegate.prepare_stream(stream_args, index_stack, **kwargs)
-        self.__camera_sequence_overheads.append(time.perf_counter() - self.__start)
+        self.__prepare_duration = time.perf_counter() - self.__start
+        self.__camera_sequence_overheads.append(self.__prepare_duration)
         while len(self.__camera_sequence_overheads) > 4:
             self.__camera_sequence_overheads.pop(0)
 
@@ -2908,10 +3229,16 @@ class CameraDataStream(Acquisition.DataStream):
         self.__progress = 0.0
         self.__start = time.perf_counter()
         self.__camera_device_stream_delegate.start_stream(stream_args)
-        self.__camera_sequence_overheads.append(time.perf_counter() - self.__start)
+        self.__frames_start = time.perf_counter()
+        start_duration = self.__frames_start - self.__start
+        self.__camera_sequence_overheads.append(start_duration)
         while len(self.__camera_sequence_overheads) > 4:
             self.__camera_sequence_overheads.pop(0)
         self.camera_sequence_overhead = sum(self.__camera_sequence_overheads) / (len(self.__camera_sequence_overheads) / 2)
+        self.__camera_hardware_source.overhead_model.add_start_measurement(self.__camera_frame_parameters.binning, self.__frame_shape,
+                                                                           self.__prepare_duration + start_duration,
+                                                                           is_first_section=self.__is_first_section)
+        self.__is_first_section = False
 
     def _finish_stream(self) -> None:
         assert self.__camera_device_stream_delegate
@@ -2958,9 +3285,10 @@ class CameraDataStream(Acquisition.DataStream):
                 # data_count is the total for the data provided by the child data stream. some data streams will
                 # provide a slice into a chunk of data representing the entire stream; whereas others will provide
                 # smaller chunks.
-                data_count = int(numpy.prod(xdata.navigation_dimension_shape, dtype=numpy.int64))
-                data = data_channel_data.reshape((data_count,) + tuple(xdata.datum_dimension_shape))
-                source_slice = (slice(start_index, stop_index),) + (slice(None),) * len(xdata.datum_dimension_shape)
+                # the data will be a view unless the navigation dimensions are not contiguous, in which case only
+                # the rows spanning the new data are copied.
+                data, data_start_index = get_flattened_navigation_data(data_channel_data, xdata.navigation_dimension_shape, start_index, stop_index)
+                source_slice = (slice(start_index - data_start_index, stop_index - data_start_index),) + (slice(None),) * len(xdata.datum_dimension_shape)
                 data_stream_event = Acquisition.DataStreamEventArgs(channel,
                                                                     data_metadata,
                                                                     data,
@@ -2971,6 +3299,11 @@ class CameraDataStream(Acquisition.DataStream):
                 # total_count is the total for this entire stream.
                 self.__progress = valid_index / self.__total_count
             self.__last_index = valid_index
+            if partial_data.is_complete:
+                # measure the time to acquire the frames, excluding prepare and start, for the overhead model.
+                self.__camera_hardware_source.overhead_model.add_frames_measurement(self.__camera_frame_parameters.binning, self.__frame_shape,
+                                                                                    self.__camera_frame_parameters.exposure_ms / 1000, self.__total_count,
+                                                                                    time.perf_counter() - self.__frames_start)
         self.__camera_device_stream_delegate.continue_data(partial_data)
         return raw_data_stream_events
 
@@ -3147,6 +3480,9 @@ class CalibrationControlsCalibrator2(CameraCalibrator):
     If calibration control for a particular index is empty, the appropriate default value will be used (scale=1.0, offset=0.0, units='').
 
     NOTE: counts_per_electron control is configured as before, using calibration_controls.
+
+    Calibrations are cached and the cache is invalidated when any of the calibration controls change value. The
+    calibration_timestamp property gives the time at which the cached values became valid.
     """
 
     def __init__(self, instrument_controller: InstrumentController, camera_device: CameraDevice3, config: typing.Mapping[str, typing.Any]) -> None:
@@ -3154,6 +3490,37 @@ class CalibrationControlsCalibrator2(CameraCalibrator):
         self.__camera_device = camera_device
         self.__config = config
         self.__streams = dict[str, Stream.AbstractStream[STEMController.TryValue[float]]]()
+        self.__stream_listeners = dict[str, Event.EventListener]()
+        self.__cache_lock = threading.RLock()
+        self.__cache = dict[typing.Tuple[typing.Any, ...], typing.Any]()
+        self.__cache_generation = 0
+        self.__is_clean_needed = True
+        self.__calibration_timestamp = DateTime.utcnow()
+
+    @property
+    def calibration_timestamp(self) -> datetime.datetime:
+        """Return the time (utc) at which the current calibration values became valid."""
+        return self.__calibration_timestamp
+
+    def __handle_control_value_changed(self, value: STEMController.TryValue[float] | None) -> None:
+        # invalidate all cached values. the active controls may have changed too, so clean the streams on next use.
+        with self.__cache_lock:
+            self.__cache.clear()
+            self.__cache_generation += 1
+            self.__is_clean_needed = True
+            self.__calibration_timestamp = DateTime.utcnow()
+
+    def __get_cached_value(self, key: typing.Tuple[typing.Any, ...], fn: typing.Callable[[], typing.Any]) -> typing.Any:
+        with self.__cache_lock:
+            if key in self.__cache:
+                return self.__cache[key]
+            generation = self.__cache_generation
+        value = fn()
+        with self.__cache_lock:
+            # only cache the value if no control changed while it was being computed.
+            if generation == self.__cache_generation:
+                self.__cache[key] = value
+        return value
 
     def __get_value_non_blocking(self, control_name: str, clean: bool = True) -> STEMController.TryValue[float] | None:
         stream: Stream.AbstractStream[STEMController.TryValue[float]] | None = self.__streams.get(control_name, None)
@@ -3173,16 +3540,26 @@ class CalibrationControlsCalibrator2(CameraCalibrator):
                     if self.__instrument_controller.does_control_exist(control_name):
                         value_changed_event.wait(5.0)  # wait up to 5s for the first value
             self.__streams[control_name] = stream
+            self.__stream_listeners[control_name] = stream.value_stream.listen(self.__handle_control_value_changed)
+            self.__is_clean_needed = True
 
-        if clean:
+        # the active controls only change when a stream is added or a control value changes.
+        if clean and self.__is_clean_needed:
+            self.__is_clean_needed = False
             activate_control_names = self.__get_active_calibration_controls()
             for key in list(self.__streams.keys()):
                 if key not in activate_control_names:
                     del self.__streams[key]
+                    stream_listener = self.__stream_listeners.pop(key, None)
+                    if stream_listener:
+                        stream_listener.close()
 
         return stream.value
 
     def __construct_suffix(self) -> str:
+        return typing.cast(str, self.__get_cached_value(("suffix",), self.__construct_suffix_uncached))
+
+    def __construct_suffix_uncached(self) -> str:
         control = self.__config.get("calibrationModeIndexControl", str())
         if control:
             try_value = self.__get_value_non_blocking(control, clean=False)
@@ -3198,6 +3575,12 @@ class CalibrationControlsCalibrator2(CameraCalibrator):
         return str()
 
     def __construct_calibration(self, prefix: str, suffix: str, relative_scale: float = 1.0, is_center_origin: bool = False, data_len: int = 0) -> Calibration.Calibration:
+        calibration = self.__get_cached_value(("calibration", prefix, suffix, relative_scale, is_center_origin, data_len),
+                                              functools.partial(self.__construct_calibration_uncached, prefix, suffix, relative_scale, is_center_origin, data_len))
+        # return a copy since the caller may modify the calibration.
+        return Calibration.Calibration(calibration.offset, calibration.scale, calibration.units)
+
+    def __construct_calibration_uncached(self, prefix: str, suffix: str, relative_scale: float, is_center_origin: bool, data_len: int) -> Calibration.Calibration:
         scale = None
         scale_control_key = prefix + "ScaleControl" + suffix
         scale_control = self.__config.get(scale_control_key, self.__config.get((scale_control_key).lower(), None))
@@ -7,6 +7,7 @@ import collections
 import copy
 import dataclasses
 import datetime
+import enum
 import functools
 import gettext
 import json
@@ -435,6 +436,12 @@ def update_detector_metadata(detector_metadata: typing.MutableMapping[str, typin
     detector_metadata["line_time_us"] = line_time_us
 
 
+# bounds for the period between reads of partial scan data, in seconds. see calculate_scan_poll_period.
+SCAN_POLL_PERIOD_MIN = 0.002
+SCAN_POLL_PERIOD_DISPLAY = 0.05
+SCAN_POLL_PERIOD_MAX = 0.5
+
+
 @dataclasses.dataclass
 class ScanAcquisitionTaskParameters(HardwareSource.AcquisitionTaskParameters):
     scan_id: typing.Optional[uuid.UUID] = None
@@ -448,11 +455,14 @@ class ScanAcquisitionTask(HardwareSource.AcquisitionTask):
     def __init__(self, stem_controller_: STEMController.STEMController, scan_hardware_source: ScanHardwareSource,
                  device: ScanDevice, hardware_source_id: str, is_continuous: bool, frame_parameters: ScanFrameParameters,
                  acquisition_task_parameters: typing.Optional[ScanAcquisitionTaskParameters], channel_ids: typing.Sequence[str],
-                 display_name: str) -> None:
+                 display_name: str, *, destinations: typing.Optional[typing.Mapping[int, _NDArray]] = None,
+                 rows_available_fn: typing.Optional[typing.Callable[[int], None]] = None) -> None:
         # acquisition_task_parameters are internal parameters that are needed by this package. do not use externally.
         # channel_ids is the channel id for each acquired channel
         # for instance, there may be 4 possible channels (0-3, a-d) and acquisition from channels 1,2
         # in that case channel_ids would be [b, c]
+        # destinations optionally maps channel indexes to arrays into which the rows are copied as they are read.
+        # rows_available_fn is called with the number of valid rows after they are copied to the destinations.
         super().__init__(is_continuous)
         self.__stem_controller = stem_controller_
         self.hardware_source_id = hardware_source_id
@@ -470,13 +480,50 @@ class ScanAcquisitionTask(HardwareSource.AcquisitionTask):
         self.__fixed_scan_id = self.__acquisition_task_parameters.scan_id
         self.__pixels_to_skip = 0
         self.__channel_ids = list(channel_ids)
+        self.__destinations = dict(destinations) if destinations else dict()
+        self.__rows_available_fn = rows_available_fn
+        self.__is_abort_requested = False
         self.__last_read_time = 0.0
         self.__subscan_enabled = False
+        self.__data_available_event = threading.Event()
+        # instrument metadata is captured at the start of each frame and refreshed when the instrument reports a
+        # property change. instruments without a property changed event are only queried at the start of each frame.
+        # the listener is only active while acquiring.
+        self.__instrument_metadata_lock = threading.RLock()
+        self.__instrument_metadata: typing.Optional[typing.Dict[str, typing.Any]] = None
+        self.__instrument_metadata_generation = 0
+        self.__instrument_property_changed_listener: typing.Optional[Event.EventListener] = None
+
+    def __instrument_property_changed(self, property_name: str) -> None:
+        # called from any thread. the metadata will be refreshed on the next read.
+        self.__invalidate_instrument_metadata()
+
+    def __invalidate_instrument_metadata(self) -> None:
+        with self.__instrument_metadata_lock:
+            self.__instrument_metadata = None
+            self.__instrument_metadata_generation += 1
+
+    def __get_instrument_metadata(self) -> typing.Dict[str, typing.Any]:
+        with self.__instrument_metadata_lock:
+            if self.__instrument_metadata is not None:
+                return self.__instrument_metadata
+            generation = self.__instrument_metadata_generation
+        instrument_metadata: typing.Dict[str, typing.Any] = dict()
+        STEMController.update_instrument_properties(instrument_metadata, self.__stem_controller, self.__device)
+        with self.__instrument_metadata_lock:
+            # only cache the metadata if no property changed while it was being read.
+            if generation == self.__instrument_metadata_generation:
+                self.__instrument_metadata = instrument_metadata
+        return instrument_metadata
 
     def set_frame_parameters(self, frame_parameters: ScanFrameParameters) -> None:
         if self.__frame_parameters.as_dict() != frame_parameters.as_dict():
+            is_subscan_geometry_only = is_subscan_geometry_change(self.__frame_parameters, frame_parameters)
             self.__frame_parameters = copy.copy(frame_parameters)
-            self.__activate_frame_parameters()
+            if is_subscan_geometry_only:
+                set_device_subscan_geometry(self.__device, copy.copy(frame_parameters))
+            else:
+                self.__activate_frame_parameters()
 
     @property
     def frame_parameters(self) -> typing.Optional[ScanFrameParameters]:
@@ -491,6 +538,13 @@ class ScanAcquisitionTask(HardwareSource.AcquisitionTask):
                 self.__scan_hardware_source.set_channel_enabled(index, index in self.__frame_parameters.enabled_channel_indexes)
         if not any(self.__device.channels_enabled):
             return False
+        self.__invalidate_instrument_metadata()
+        property_changed_event = getattr(self.__stem_controller, "property_changed_event", None)
+        if isinstance(property_changed_event, Event.Event) and not self.__instrument_property_changed_listener:
+            self.__instrument_property_changed_listener = property_changed_event.listen(self.__instrument_property_changed)
+        # devices which do not signal available data are read at the end of each poll period.
+        if hasattr(self.__device, "on_data_available"):
+            setattr(self.__device, "on_data_available", self.__data_available_event.set)
         self._resume_acquisition()
         self.__frame_number = None
         self.__scan_id = self.__fixed_scan_id
@@ -517,15 +571,21 @@ class ScanAcquisitionTask(HardwareSource.AcquisitionTask):
         self._suspend_acquisition()
 
     def _request_abort_acquisition(self) -> None:
+        # set before canceling the device since a canceled device may report the partially read frame as complete.
+        self.__is_abort_requested = True
         super()._request_abort_acquisition()
         self.__device.cancel()
+        self.__data_available_event.set()
 
     def _mark_acquisition(self) -> None:
         super()._mark_acquisition()
         self.__device.stop()
+        self.__data_available_event.set()
 
     def _stop_acquisition(self) -> None:
         super()._stop_acquisition()
+        if hasattr(self.__device, "on_data_available"):
+            setattr(self.__device, "on_data_available", None)
         self.__device.stop()
         start_time = time.time()
         while self.__device.is_scanning and time.time() - start_time < 1.0:
@@ -533,6 +593,9 @@ class ScanAcquisitionTask(HardwareSource.AcquisitionTask):
         self.__frame_number = None
         self.__scan_id = self.__fixed_scan_id
         self.__stem_controller._exit_scanning_state()
+        if self.__instrument_property_changed_listener:
+            self.__instrument_property_changed_listener.close()
+            self.__instrument_property_changed_listener = None
 
     def __update_data_element_acquisition_progress(self, data_element: typing.MutableMapping[str, typing.Any], complete: bool, sub_area: typing.Tuple[typing.Tuple[int, int], typing.Tuple[int, int]], npdata: _NDArray) -> None:
         data_element["data"] = npdata
@@ -547,20 +610,33 @@ class ScanAcquisitionTask(HardwareSource.AcquisitionTask):
         data_element["metadata"].setdefault("scan", dict())["valid_rows"] = sub_area[0][0] + sub_area[1][0]
 
     def _acquire_data_elements(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        # wait for the poll period since the last read unless the device signals that new data is available.
+        poll_period = calculate_scan_poll_period(self.__frame_parameters_at_start_of_frame if self.__pixels_to_skip else self.__frame_parameters)
+        remaining_time = poll_period - (time.time() - self.__last_read_time)
+        if remaining_time > 0.0:
+            self.__data_available_event.wait(remaining_time)
+        self.__data_available_event.clear()
+        self.__last_read_time = time.time()
+
         if self.__pixels_to_skip == 0:
             self.__frame_parameters_at_start_of_frame = copy.copy(self.__frame_parameters)
+            self.__invalidate_instrument_metadata()
+
+        pixels_already_read = self.__pixels_to_skip
 
         _data_elements, complete, bad_frame, sub_area, self.__frame_number, self.__pixels_to_skip = self.__device.read_partial(self.__frame_number, self.__pixels_to_skip)
 
-        min_period = 0.05
-        current_time = time.time()
-        if current_time - self.__last_read_time < min_period:
-            time.sleep(min_period - (current_time - self.__last_read_time))
-        self.__last_read_time = time.time()
+        if complete and not bad_frame:
+            sub_area = get_unread_sub_area(sub_area, pixels_already_read)
+
+        # rows read after an abort request may not be valid, so they are not copied to the destinations.
+        is_destination_valid = not self.__is_abort_requested
 
         if not self.__scan_id:
             self.__scan_id = uuid.uuid4()
 
+        instrument_metadata = self.__get_instrument_metadata()
+
         # merge the _data_elements into data_elements
         data_elements = []
         for _data_element in _data_elements:
@@ -581,10 +657,8 @@ class ScanAcquisitionTask(HardwareSource.AcquisitionTask):
             # create the 'data_element' in the format that must be returned from this method
             # '_data_element' is the format returned from the Device.
             data_element: typing.Dict[str, typing.Any] = {"metadata": dict()}
-            instrument_metadata: typing.Dict[str, typing.Any] = dict()
-            STEMController.update_instrument_properties(instrument_metadata, self.__stem_controller, self.__device)
             if instrument_metadata:
-                data_element["metadata"].setdefault("instrument", dict()).update(instrument_metadata)
+                data_element["metadata"]["instrument"] = copy.deepcopy(instrument_metadata)
             update_data_channel_specifier(data_element, HardwareSource.DataChannelSpecifier(channel_id, channel_variant, channel_name))
             # the spatial calibrations from the incoming data override the calculated calibrations.
             # also, the calculated calibrations are only valid for 2D incoming data.
@@ -595,8 +669,21 @@ class ScanAcquisitionTask(HardwareSource.AcquisitionTask):
             update_scan_metadata(data_element["metadata"].setdefault("scan", dict()), self.hardware_source_id, self.__display_name, self.__frame_parameters_at_start_of_frame, scan_id, _scan_properties)
             update_detector_metadata(data_element["metadata"].setdefault("hardware_source", dict()), self.hardware_source_id, self.__display_name, _data.shape, self.__frame_number, channel_name, channel_id, _scan_properties)
             self.__update_data_element_acquisition_progress(data_element, complete, sub_area, _data)
+            destination = self.__destinations.get(channel_index)
+            if destination is not None:
+                # copy the new rows to the destination and pass the destination on in place of the device data. the
+                # data channel uses the destination directly rather than keeping its own copy of the frame.
+                dest_sub_area = data_element["dest_sub_area"]
+                if is_destination_valid:
+                    destination[Geometry.IntRect.make(dest_sub_area).slice] = _data[Geometry.IntRect.make(sub_area).slice]
+                data_element["data"] = destination
+                data_element["sub_area"] = dest_sub_area
+                data_element["in_place"] = True
             data_elements.append(data_element)
 
+        if self.__destinations and is_destination_valid and callable(self.__rows_available_fn) and data_elements:
+            self.__rows_available_fn(sub_area[0][0] + sub_area[1][0])
+
         if complete or bad_frame:
             # proceed to next frame
             self.__frame_number = None
@@ -610,6 +697,61 @@ class ScanAcquisitionTask(HardwareSource.AcquisitionTask):
         self.__device.set_frame_parameters(device_frame_parameters)
 
 
+SUBSCAN_GEOMETRY_PARAMETER_NAMES = ("subscan_fractional_center", "subscan_fractional_size", "subscan_rotation")
+
+
+def is_subscan_geometry_change(old_frame_parameters: ScanFrameParameters, new_frame_parameters: ScanFrameParameters) -> bool:
+    """Return whether the frame parameters differ only in the position, size, or rotation of the subscan.
+
+    The subscan pixel size must be unchanged, so the scan shape, the scan context, and the data layout are unchanged.
+    This is the case while interactively dragging a subscan or line scan region.
+    """
+    subscan_pixel_size = old_frame_parameters.subscan_pixel_size
+    if not subscan_pixel_size or subscan_pixel_size != new_frame_parameters.subscan_pixel_size:
+        return False
+    old_d = old_frame_parameters.as_dict()
+    new_d = new_frame_parameters.as_dict()
+    for parameter_name in SUBSCAN_GEOMETRY_PARAMETER_NAMES:
+        old_d.pop(parameter_name, None)
+        new_d.pop(parameter_name, None)
+    return old_d == new_d
+
+
+def set_device_subscan_geometry(device: ScanDevice, frame_parameters: ScanFrameParameters) -> None:
+    """Update the subscan geometry of the device, using the full frame parameters if it has no faster method."""
+    set_subscan_geometry = getattr(device, "set_subscan_geometry", None)
+    if callable(set_subscan_geometry):
+        set_subscan_geometry(frame_parameters)
+    else:
+        device.set_frame_parameters(frame_parameters)
+
+
+def get_unread_sub_area(sub_area: typing.Tuple[typing.Tuple[int, int], typing.Tuple[int, int]], pixels_already_read: int) -> typing.Tuple[typing.Tuple[int, int], typing.Tuple[int, int]]:
+    """Return the part of the sub area of a completed frame that was not already read in previous partial reads.
+
+    Devices report the entire frame as the sub area when a frame completes. The rows already read were passed to the
+    data channels in the previous partial reads, so only the remaining rows need to be copied from the device buffer.
+    """
+    (top, left), (height, width) = sub_area
+    rows_already_read = pixels_already_read // width if width > 0 else 0
+    if top == 0 and 0 < rows_already_read < height:
+        return (rows_already_read, left), (height - rows_already_read, width)
+    return sub_area
+
+
+def calculate_scan_poll_period(frame_parameters: ScanFrameParameters) -> float:
+    """Return the period between reads of partial data for a scan with the frame parameters.
+
+    Reading more often than once per line yields little new data and reading less often than once per frame delays
+    complete frames. Between those limits, the period matches the live display update rate. The result is bounded so
+    that the acquisition thread never busy waits and slow scans still update the display regularly.
+    """
+    scan_size = frame_parameters.scan_size
+    line_time = scan_size.width * frame_parameters.pixel_time_us / 1E6
+    frame_time = scan_size.height * line_time
+    return max(SCAN_POLL_PERIOD_MIN, min(max(line_time, SCAN_POLL_PERIOD_DISPLAY), frame_time, SCAN_POLL_PERIOD_MAX))
+
+
 def apply_section_rect(scan_frame_parameters: ScanFrameParameters, acquisition_task_parameters: ScanAcquisitionTaskParameters,
                        section_rect: Geometry.IntRect, scan_size: Geometry.IntSize, fractional_area: Geometry.FloatRect) -> ScanFrameParameters:
     section_rect_f = section_rect.to_float_rect()
@@ -631,6 +773,36 @@ def apply_section_rect(scan_frame_parameters: ScanFrameParameters, acquisition_t
     return section_frame_parameters
 
 
+class SequenceBufferOverflowPolicy(enum.Enum):
+    """What a scan device does with a completed frame when the sequence buffer is full.
+
+    BLOCK waits for the consumer to pop a frame; the device acquisition thread is blocked while waiting, so a slow
+    consumer stalls the scan. DROP_OLDEST discards the oldest buffered frame and acquires another frame in its place.
+    ERROR discards the new frame and reports an overflow error to the consumer.
+
+    The policy only applies if the buffer is limited by bytes; by default the buffer is unbounded.
+    """
+    BLOCK = 0
+    DROP_OLDEST = 1
+    ERROR = 2
+
+
+@dataclasses.dataclass
+class SequenceBufferStatistics:
+    """Statistics of a scan device sequence buffer since sequence mode was prepared.
+
+    byte_count and frame_count describe the frames currently buffered; max_byte_count is the largest byte count seen.
+    dropped_count is the number of frames discarded by the overflow policy; blocked_time is the total time in seconds
+    the device waited for space. overflow_error is True if a frame was discarded under the error policy.
+    """
+    frame_count: int = 0
+    byte_count: int = 0
+    max_byte_count: int = 0
+    dropped_count: int = 0
+    blocked_time: float = 0.0
+    overflow_error: bool = False
+
+
 class ScanDevice(typing.Protocol):
     scan_device_id: str
     scan_device_name: str
@@ -640,6 +812,7 @@ class ScanDevice(typing.Protocol):
     def get_channel_name(self, channel_index: int) -> str: ...
     def set_channel_enabled(self, channel_index: int, enabled: bool) -> bool: ...
     def set_frame_parameters(self, frame_parameters: ScanFrameParameters) -> None: ...
+    def set_subscan_geometry(self, frame_parameters: ScanFrameParameters) -> None: self.set_frame_parameters(frame_parameters)
     def save_frame_parameters(self) -> None: ...
     def start_frame(self, is_continuous: bool) -> int: ...
     def cancel(self) -> None: ...
@@ -653,7 +826,9 @@ class ScanDevice(typing.Protocol):
     def calculate_flyback_pixels(self, frame_parameters: ScanFrameParameters) -> int: return 2
     def calculate_max_field_of_view(self, frame_parameters: ScanFrameParameters) -> float: return 100000.0
     def set_sequence_buffer_size(self, buffer_size: int) -> None: return
+    def set_sequence_buffer_limits(self, max_bytes: typing.Optional[int], overflow_policy: SequenceBufferOverflowPolicy) -> None: return
     def get_sequence_buffer_count(self) -> int: return 0
+    def get_sequence_buffer_statistics(self) -> SequenceBufferStatistics: return SequenceBufferStatistics()
     def pop_sequence_buffer_data(self) -> typing.List[typing.Dict[str, typing.Any]]: return list()
 
     # default implementation
@@ -682,6 +857,10 @@ class ScanDevice(typing.Protocol):
 
     on_device_state_changed: typing.Optional[typing.Callable[[typing.Sequence[ScanFrameParameters], typing.Sequence[typing.Tuple[str, bool]]], None]]
 
+    # optional attribute on_data_available, initially None. the acquisition task assigns a function to it while
+    # acquiring. devices may call it from any thread when new partial data is available so that the acquisition task
+    # reads it without waiting for the full poll period.
+
 
 @typing.runtime_checkable
 class ScanHardwareSource(HardwareSource.HardwareSource, typing.Protocol):
@@ -701,11 +880,21 @@ class ScanHardwareSource(HardwareSource.HardwareSource, typing.Protocol):
                          frame_parameters: ScanFrameParameters,
                          sync_timeout: typing.Optional[float] = None) -> typing.Sequence[typing.Optional[DataAndMetadata.DataAndMetadata]]: ...
 
+    def record_immediate_into(self,
+                              frame_parameters: ScanFrameParameters,
+                              destinations: typing.Mapping[int, _NDArray], *,
+                              progress_fn: typing.Optional[typing.Callable[[int], None]] = None,
+                              cancel_event: typing.Optional[threading.Event] = None,
+                              sync_timeout: typing.Optional[float] = None) -> int: ...
+
     # sequence mode. the sequence mode allocates a buffer of a given size and then allows the caller to pop the data
     # from the buffer as it is acquired. the buffer count returns the current count of items in the buffer. popping the
-    # data removes it from the buffer and reduces the buffer count.
+    # data removes it from the buffer and reduces the buffer count. the buffer may be limited to max_bytes, in which
+    # case the overflow policy determines what happens when it is full.
 
-    def prepare_sequence_mode(self, scan_frame_parameters: ScanFrameParameters, count: int) -> None: ...
+    def prepare_sequence_mode(self, scan_frame_parameters: ScanFrameParameters, count: int, *,
+                              max_bytes: typing.Optional[int] = None,
+                              overflow_policy: SequenceBufferOverflowPolicy = SequenceBufferOverflowPolicy.BLOCK) -> None: ...
 
     def start_sequence_mode(self, scan_frame_parameters: ScanFrameParameters, count: int) -> None: ...
 
@@ -715,6 +904,8 @@ class ScanHardwareSource(HardwareSource.HardwareSource, typing.Protocol):
 
     def get_sequence_buffer_count(self) -> int: ...
 
+    def get_sequence_buffer_statistics(self) -> SequenceBufferStatistics: ...
+
     def pop_sequence_buffer_data(self, scan_id: uuid.UUID) -> typing.Mapping[Acquisition.Channel, DataAndMetadata.DataAndMetadata]: ...
 
     # used in Facade
@@ -1744,41 +1935,95 @@ class ConcreteScanHardwareSource(HardwareSource.ConcreteHardwareSource, ScanHard
                          frame_parameters: ScanFrameParameters,
                          sync_timeout: typing.Optional[float] = None) -> typing.Sequence[typing.Optional[DataAndMetadata.DataAndMetadata]]:
         assert not self.is_recording
-        frame_parameters = copy.deepcopy(frame_parameters)
+        datas_promises = self.__record_frame(copy.deepcopy(frame_parameters), sync_timeout=sync_timeout)
+        return [data_promise.xdata for data_promise in datas_promises]
+
+    def __record_frame(self,
+                       frame_parameters: ScanFrameParameters, *,
+                       destinations: typing.Optional[typing.Mapping[int, _NDArray]] = None,
+                       rows_available_fn: typing.Optional[typing.Callable[[int], None]] = None,
+                       cancel_event: typing.Optional[threading.Event] = None,
+                       sync_timeout: typing.Optional[float] = None) -> typing.Sequence[HardwareSource.DataAndMetadataPromise]:
+        # record a single frame and wait for the record task to finish. the enabled channels are restored even if
+        # the record fails or times out.
         old_enabled_channels = self.get_enabled_channel_indexes()
         channel_states = [self.get_channel_state(i) for i in range(self.__device.channel_count)]
         channel_ids = [channel_state.channel_id for channel_state in channel_states]
-        record_task = ScanAcquisitionTask(self.__stem_controller, self, self.__device, self.hardware_source_id, False, frame_parameters, None, channel_ids, self.display_name)
+        record_task = ScanAcquisitionTask(self.__stem_controller, self, self.__device, self.hardware_source_id, False,
+                                          frame_parameters, None, channel_ids, self.display_name,
+                                          destinations=destinations, rows_available_fn=rows_available_fn)
         finished_event = threading.Event()
-        xdatas: typing.List[typing.Optional[DataAndMetadata.DataAndMetadata]] = list()
-        def finished(datas_promises: typing.Sequence[HardwareSource.DataAndMetadataPromise]) -> None:
-            nonlocal xdatas
-            xdatas = [data_promise.xdata for data_promise in datas_promises]
-            self.set_enabled_channels(old_enabled_channels)
+        datas_promises: typing.Sequence[HardwareSource.DataAndMetadataPromise] = list()
+
+        def finished(finished_datas_promises: typing.Sequence[HardwareSource.DataAndMetadataPromise]) -> None:
+            nonlocal datas_promises
+            datas_promises = finished_datas_promises
             finished_event.set()
+
         record_task.finished_callback_fn = finished
-        self._record_task_updated(record_task)
-        self.start_task('record', record_task)
-        # loop will break on finished or error (not recording). maybe a race condition?
-        while not record_task.is_finished:
-            if finished_event.wait(0.01):  # 10 msec
-                break
-        # self.stop_task('record')
-        self._record_task_updated(None)
-        sync_timeout = sync_timeout or 3.0
-        start = time.time()
-        while not record_task.is_finished:
-            time.sleep(0.01)  # 10 msec
-            assert time.time() - start < float(sync_timeout)
-        # since we check for 'is_recording' at beginning, wait for that to clear also.
-        start = time.time()
-        while self.is_recording:
-            time.sleep(0.01)  # 10 msec
-            assert time.time() - start < float(sync_timeout)
-        return xdatas
-
-    def prepare_sequence_mode(self, scan_frame_parameters: ScanFrameParameters, count: int) -> None:
+        try:
+            self._record_task_updated(record_task)
+            self.start_task('record', record_task)
+            if cancel_event:
+                # loop will break on finished, error (not recording), or cancel.
+                while not record_task.is_finished and not finished_event.wait(0.01):  # 10 msec
+                    if cancel_event.is_set():
+                        self.abort_recording()
+                        break
+            else:
+                # wait will end on finished or error (not recording).
+                self._wait_for_task_state(lambda: record_task.is_finished or finished_event.is_set(), None)
+            self._record_task_updated(None)
+            sync_timeout = sync_timeout or 3.0
+            self._wait_for_task_state(lambda: record_task.is_finished, sync_timeout)
+            # since we check for 'is_recording' at beginning, wait for that to clear also.
+            self._wait_for_task_state(lambda: not self.is_recording, sync_timeout)
+        finally:
+            self.set_enabled_channels(old_enabled_channels)
+        return datas_promises
+
+    def record_immediate_into(self,
+                              frame_parameters: ScanFrameParameters,
+                              destinations: typing.Mapping[int, _NDArray], *,
+                              progress_fn: typing.Optional[typing.Callable[[int], None]] = None,
+                              cancel_event: typing.Optional[threading.Event] = None,
+                              sync_timeout: typing.Optional[float] = None) -> int:
+        """Record a frame, copying the rows of each channel into a preallocated destination as they arrive.
+
+        The destinations map channel indexes to arrays with the shape of the scan, for instance memory-mapped files.
+        Only those channels are recorded. The data channels use the destinations directly, so the frame is not held in
+        memory a second time.
+
+        The progress function is called from the acquisition thread with the number of valid rows after each read.
+        Setting the cancel event ends the record early and keeps the rows that are already valid.
+
+        Returns the number of valid rows in the destinations.
+        """
+        assert not self.is_recording
+        frame_parameters = copy.deepcopy(frame_parameters)
+        scan_shape = frame_parameters.scan_size.as_tuple()
+        for channel_index, destination in destinations.items():
+            if tuple(destination.shape) != scan_shape:
+                raise ValueError(f"Destination shape {destination.shape} for channel {channel_index} does not match scan size {scan_shape}.")
+        frame_parameters.enabled_channel_indexes = sorted(destinations.keys())
+        valid_rows = 0
+
+        def rows_available(rows: int) -> None:
+            nonlocal valid_rows
+            valid_rows = rows
+            if callable(progress_fn):
+                progress_fn(rows)
+
+        self.__record_frame(frame_parameters, destinations=destinations, rows_available_fn=rows_available,
+                            cancel_event=cancel_event, sync_timeout=sync_timeout)
+        return valid_rows
+
+    def prepare_sequence_mode(self, scan_frame_parameters: ScanFrameParameters, count: int, *,
+                              max_bytes: typing.Optional[int] = None,
+                              overflow_policy: SequenceBufferOverflowPolicy = SequenceBufferOverflowPolicy.BLOCK) -> None:
         self.abort_playing(sync_timeout=5.0)
+        if callable(getattr(self.__device, "set_sequence_buffer_limits", None)):
+            self.__device.set_sequence_buffer_limits(max_bytes, overflow_policy)
         self.set_sequence_buffer_size(count)
 
     def start_sequence_mode(self, scan_frame_parameters: ScanFrameParameters, count: int) -> None:
@@ -1798,6 +2043,11 @@ class ConcreteScanHardwareSource(HardwareSource.ConcreteHardwareSource, ScanHard
     def get_sequence_buffer_count(self) -> int:
         return self.__device.get_sequence_buffer_count()
 
+    def get_sequence_buffer_statistics(self) -> SequenceBufferStatistics:
+        if callable(getattr(self.__device, "get_sequence_buffer_statistics", None)):
+            return self.__device.get_sequence_buffer_statistics()
+        return SequenceBufferStatistics()
+
     def pop_sequence_buffer_data(self, scan_id: uuid.UUID) -> typing.Mapping[Acquisition.Channel, DataAndMetadata.DataAndMetadata]:
         data_element_group = self.__get_data_element_group_with_metadata(self.__device.pop_sequence_buffer_data(), scan_id)
         xdata_group = dict()
@@ -1819,15 +2069,21 @@ class ConcreteScanHardwareSource(HardwareSource.ConcreteHardwareSource, ScanHard
     def __set_current_frame_parameters(self, frame_parameters: ScanFrameParameters) -> None:
         frame_parameters = copy.copy(frame_parameters)
         self.__apply_subscan_parameters(frame_parameters)
+        # moving, resizing, or rotating the subscan without changing its pixel size leaves the scan context and the
+        # field of view unchanged, so only the subscan geometry needs to be passed to the device.
+        is_subscan_geometry_only = is_subscan_geometry_change(self.__frame_parameters, frame_parameters)
         acquisition_task = self.__acquisition_task
         if isinstance(acquisition_task, ScanAcquisitionTask):
             acquisition_task.set_frame_parameters(frame_parameters)
+        elif is_subscan_geometry_only:
+            set_device_subscan_geometry(self.__device, copy.copy(frame_parameters))
         else:
             # handle case where current profile has been changed but scan is not running.
             device_frame_parameters = copy.copy(frame_parameters)
             self.__device.set_frame_parameters(device_frame_parameters)
-        self.max_field_of_view_nm_stream.value = self.__device.calculate_max_field_of_view(frame_parameters)
-        self.__stem_controller._update_scan_context(frame_parameters.pixel_size, frame_parameters.center_nm, frame_parameters.fov_nm, frame_parameters.rotation_rad)
+        if not is_subscan_geometry_only:
+            self.max_field_of_view_nm_stream.value = self.__device.calculate_max_field_of_view(frame_parameters)
+            self.__stem_controller._update_scan_context(frame_parameters.pixel_size, frame_parameters.center_nm, frame_parameters.fov_nm, frame_parameters.rotation_rad)
         self.__frame_parameters = copy.copy(frame_parameters)
         self.current_frame_parameters_changed_event.fire(self.__frame_parameters)
         frame_parameters_with_channels = copy.copy(frame_parameters)
@@ -1995,6 +2251,9 @@ class ConcreteScanHardwareSource(HardwareSource.ConcreteHardwareSource, ScanHard
 
         new_data_element_group = list()
 
+        instrument_metadata: typing.Dict[str, typing.Any] = dict()
+        STEMController.update_instrument_properties(instrument_metadata, self.__stem_controller, self.__device)
+
         for channel_index, (_data_element, channel_state) in enumerate(zip(data_element_group, enabled_channel_states)):
             channel_name = channel_state.name
             channel_id = channel_state.channel_id
@@ -2005,10 +2264,8 @@ class ConcreteScanHardwareSource(HardwareSource.ConcreteHardwareSource, ScanHard
             # create the 'data_element' in the format that must be returned from this method
             # '_data_element' is the format returned from the Device.
             data_element: typing.Dict[str, typing.Any] = {"metadata": dict()}
-            instrument_metadata: typing.Dict[str, typing.Any] = dict()
-            STEMController.update_instrument_properties(instrument_metadata, self.__stem_controller, self.__device)
             if instrument_metadata:
-                data_element["metadata"].setdefault("instrument", dict()).update(instrument_metadata)
+                data_element["metadata"]["instrument"] = copy.deepcopy(instrument_metadata)
             update_data_channel_specifier(data_element, HardwareSource.DataChannelSpecifier(channel_id, channel_variant, channel_name))
             # the spatial calibrations from the incoming data override the calculated calibrations.
             # also, the calculated calibrations are only valid for 2D incoming data.
@@ -2190,17 +2447,28 @@ def _acquire_synchronized_stream(scan_hardware_source_id: str, camera_hardware_s
 
 
 class ScanFrameSequenceDataStream(Acquisition.DataStream):
+    """A data stream of a sequence of scan frames read from the scan device sequence buffer.
+
+    The sequence buffer is unbounded unless max_buffer_bytes is specified, in which case the overflow policy applies
+    when it is full. See SequenceBufferOverflowPolicy.
+    """
+
     def __init__(self,
                  scan_hardware_source: ScanHardwareSource,
                  scan_frame_parameters: ScanFrameParameters,
                  scan_id: uuid.UUID,
-                 count: int) -> None:
+                 count: int,
+                 *,
+                 max_buffer_bytes: typing.Optional[int] = None,
+                 overflow_policy: SequenceBufferOverflowPolicy = SequenceBufferOverflowPolicy.BLOCK) -> None:
         super().__init__()
         scan_frame_parameters = copy.deepcopy(scan_frame_parameters)
         self.__scan_hardware_source = scan_hardware_source
         self.__scan_frame_parameters = scan_frame_parameters
         self.__scan_id = scan_id
         self.__count = count
+        self.__max_buffer_bytes = max_buffer_bytes
+        self.__overflow_policy = overflow_policy
         self.__sent_count = 0
         self.__is_aborted = False
         self.__data_metadata: typing.Optional[DataAndMetadata.DataMetadata] = None
@@ -2245,8 +2513,14 @@ class ScanFrameSequenceDataStream(Acquisition.DataStream):
     def channels(self) -> typing.Tuple[Acquisition.Channel, ...]:
         return self.__channels
 
+    @property
+    def sequence_buffer_statistics(self) -> SequenceBufferStatistics:
+        return self.__scan_hardware_source.get_sequence_buffer_statistics()
+
     def _prepare_stream(self, stream_args: Acquisition.DataStreamArgs, index_stack: Acquisition.IndexDescriptionList, **kwargs: typing.Any) -> None:
-        self.__scan_hardware_source.prepare_sequence_mode(self.__scan_frame_parameters, self.__count)
+        self.__scan_hardware_source.prepare_sequence_mode(self.__scan_frame_parameters, self.__count,
+                                                          max_bytes=self.__max_buffer_bytes,
+                                                          overflow_policy=self.__overflow_policy)
         self.__sent_count = 0
         self.__is_aborted = False
         self.__data_metadata = None
@@ -2263,25 +2537,31 @@ class ScanFrameSequenceDataStream(Acquisition.DataStream):
 
     def _get_raw_data_stream_events(self) -> typing.Sequence[typing.Tuple[weakref.ReferenceType[Acquisition.DataStream], Acquisition.DataStreamEventArgs]]:
         raw_data_stream_events = list[typing.Tuple[weakref.ReferenceType[Acquisition.DataStream], Acquisition.DataStreamEventArgs]]()
+        if self.sequence_buffer_statistics.overflow_error:
+            raise RuntimeError("Scan sequence buffer overflow.")
         start_time = time.time()
-        MAX_TIME = 0.1
-        while self.__scan_hardware_source.get_sequence_buffer_count() > 0 and self.__sent_count < self.__count and not self.__is_aborted and time.time() - start_time < MAX_TIME:
-            buffer_data = self.__scan_hardware_source.pop_sequence_buffer_data(self.__scan_id)
-            self.__sent_count += 1
-
-            for channel, xdata in buffer_data.items():
-                data_channel_data = xdata.data
+        # limit the time spent sending buffered frames so that the other streams are serviced at the scan rate.
+        max_time = calculate_scan_poll_period(self.__scan_frame_parameters)
+        # drain the available frames, then send them as a single multi-frame packet for each channel.
+        buffer_data_list = list[typing.Mapping[Acquisition.Channel, DataAndMetadata.DataAndMetadata]]()
+        while self.__scan_hardware_source.get_sequence_buffer_count() > 0 and self.__sent_count + len(buffer_data_list) < self.__count and not self.__is_aborted and time.time() - start_time < max_time:
+            buffer_data_list.append(self.__scan_hardware_source.pop_sequence_buffer_data(self.__scan_id))
+        if buffer_data_list:
+            frame_count = len(buffer_data_list)
+            self.__sent_count += frame_count
+            for channel, xdata in buffer_data_list[0].items():
                 # establish "the data metadata" based on the first frame
                 if not self.__data_metadata:
                     self.__data_metadata = xdata.data_metadata
                 data_metadata = self.__data_metadata
-                data = data_channel_data.reshape((1,) + tuple(xdata.datum_dimension_shape))
-                source_slice = (slice(0, 1),) + (slice(None),) * len(xdata.datum_dimension_shape)
+                # copy the frames once into a contiguous block.
+                data = numpy.stack([typing.cast(_NDArray, buffer_data[channel].data) for buffer_data in buffer_data_list])
+                source_slice = (slice(0, frame_count),) + (slice(None),) * len(xdata.datum_dimension_shape)
                 state = Acquisition.DataStreamStateEnum.COMPLETE  # always complete since sending full frame chunks
                 data_stream_event = Acquisition.DataStreamEventArgs(channel,
                                                                     data_metadata,
                                                                     data,
-                                                                    1,
+                                                                    frame_count,
                                                                     source_slice,
                                                                     state)
                 raw_data_stream_events.append((weakref.ref(self), data_stream_event))
@@ -2291,12 +2571,31 @@ class ScanFrameSequenceDataStream(Acquisition.DataStream):
         return False
 
 
+class _ScanSectionBuffers:
+    """Row buffers for one section of a scan data stream.
+
+    The record thread is the only writer: it copies new rows into the channel buffer and then publishes the new
+    row count. The acquisition thread is the only reader: it reads only rows below the published row count, which
+    are never written again during the section, so no lock is needed between the two threads. A new instance is
+    used for each section so that late updates from a previous section do not disturb the current one.
+    """
+    def __init__(self, section_rect: Geometry.IntRect) -> None:
+        self.section_rect = section_rect
+        self.buffers: typing.Dict[Acquisition.Channel, DataAndMetadata.DataAndMetadata] = dict()
+        self.available_rows: typing.Dict[Acquisition.Channel, int] = dict()
+        self.sent_rows: typing.Dict[Acquisition.Channel, int] = dict()
+
+
 class ScanDataStream(Acquisition.DataStream):
     """A data stream that provides frames from a scan.
 
     The scan is defined by a ScanFrameParameters object and a ScanHardwareSource object.
 
     The fov_nm and rotation models allow the magnification to be controlled by envelopes like 1D ramp.
+
+    Pass coalesce_channels to send the rows of all enabled channels in a single packet on a combined channel. The
+    combined channel data has the enabled channels stacked along its last dimension and shares the metadata of the
+    first channel. Use ChannelSplitOperator with scan_channels to split it into the individual channels.
     """
     def __init__(self, scan_hardware_source: ScanHardwareSource,
                  scan_frame_parameters: ScanFrameParameters, scan_id: uuid.UUID,
@@ -2306,6 +2605,7 @@ class ScanDataStream(Acquisition.DataStream):
                  *,
                  fov_nm_model: typing.Optional[Model.PropertyModel[float]] = None,
                  rotation_model: typing.Optional[Model.PropertyModel[float]] = None,
+                 coalesce_channels: bool = False,
                  ) -> None:
         super().__init__()
         scan_frame_parameters = copy.deepcopy(scan_frame_parameters)
@@ -2320,6 +2620,9 @@ class ScanDataStream(Acquisition.DataStream):
         self.__enabled_channels = scan_frame_parameters.enabled_channel_indexes if scan_frame_parameters.enabled_channel_indexes is not None else scan_hardware_source.get_enabled_channel_indexes()
         self.__fov_nm_model = fov_nm_model
         self.__rotation_model = rotation_model
+        self.__coalesce_channels = coalesce_channels
+        self.__scan_channels = tuple(Acquisition.Channel(self.__scan_hardware_source.hardware_source_id, str(c)) for c in self.__enabled_channels)
+        self.__combined_channel = Acquisition.Channel(self.__scan_hardware_source.hardware_source_id, "combined")
         subscan_pixel_size = scan_frame_parameters.subscan_pixel_size
         if subscan_pixel_size:
             scan_size = get_limited_scan_shape(subscan_pixel_size)
@@ -2337,13 +2640,10 @@ class ScanDataStream(Acquisition.DataStream):
             self.__scan_frame_parameters.subscan_pixel_size = self.__scan_size
         else:
             self.__scan_frame_parameters.pixel_size = self.__scan_size
-        self.__section_rect = Geometry.IntRect.from_tlbr(0, 0, 0, 0)
         self.__record_task = typing.cast(HardwareSource.RecordTask, None)
 
-        self.__lock = threading.RLock()
-        self.__buffers: typing.Dict[Acquisition.Channel, DataAndMetadata.DataAndMetadata] = dict()
-        self.__sent_rows: typing.Dict[Acquisition.Channel, int] = dict()
-        self.__available_rows: typing.Dict[Acquisition.Channel, int] = dict()
+        # the section buffers are replaced (not modified) when a section starts; see _ScanSectionBuffers.
+        self.__section_buffers = _ScanSectionBuffers(Geometry.IntRect.from_tlbr(0, 0, 0, 0))
 
         self.__started = False
 
@@ -2358,37 +2658,45 @@ class ScanDataStream(Acquisition.DataStream):
             camera_exposure_ms=self.__camera_exposure_ms,
             camera_data_stream=self.__camera_data_stream,
             fov_nm_model=self.__fov_nm_model,
-            rotation_model=self.__rotation_model
+            rotation_model=self.__rotation_model,
+            coalesce_channels=self.__coalesce_channels
         )
 
     def __update_data(self, data_channel_event_args: HardwareSource.DataChannelEventArgs, data_and_metadata: DataAndMetadata.DataAndMetadata) -> None:
         # when data arrives here, it will be part of the overall data item, even if it is only a partial
         # acquire of the data item. so the buffer data shape will reflect the overall data item.
         if self.__started:
-            with self.__lock:
-                channel_id = data_channel_event_args.channel_id
-                assert channel_id
-                channel_index = self.__scan_hardware_source.get_channel_index(channel_id)
-                channel = Acquisition.Channel(self.__scan_hardware_source.hardware_source_id, str(channel_index))
-                # valid_rows will represent the number of valid rows within this section, not within the overall
-                # data. so valid and available rows need to be offset by the section rect top.
-                valid_rows = self.__section_rect.top + data_and_metadata.metadata.get("hardware_source", dict()).get("valid_rows", 0)
-                available_rows = self.__available_rows.get(channel, self.__section_rect.top)
-                if valid_rows > available_rows:
-                    if channel not in self.__buffers:
-                        self.__buffers[channel] = copy.deepcopy(data_and_metadata)
-                    buffer = self.__buffers[channel]
-                    assert buffer
+            section_buffers = self.__section_buffers
+            section_rect = section_buffers.section_rect
+            channel_id = data_channel_event_args.channel_id
+            assert channel_id
+            channel_index = self.__scan_hardware_source.get_channel_index(channel_id)
+            channel = Acquisition.Channel(self.__scan_hardware_source.hardware_source_id, str(channel_index))
+            # valid_rows will represent the number of valid rows within this section, not within the overall
+            # data. so valid and available rows need to be offset by the section rect top.
+            valid_rows = section_rect.top + data_and_metadata.metadata.get("hardware_source", dict()).get("valid_rows", 0)
+            available_rows = section_buffers.available_rows.get(channel, section_rect.top)
+            if valid_rows > available_rows:
+                buffer = section_buffers.buffers.get(channel)
+                if buffer is None:
+                    buffer = copy.deepcopy(data_and_metadata)
+                    section_buffers.buffers[channel] = buffer
+                else:
                     buffer_data = buffer.data
                     assert buffer_data is not None
                     buffer_data[available_rows:valid_rows] = data_and_metadata[available_rows:valid_rows]
-                    self.__available_rows[channel] = valid_rows
+                # publish the new rows only after they have been written.
+                section_buffers.available_rows[channel] = valid_rows
 
     @property
     def scan_size(self) -> Geometry.IntSize:
         return self.__scan_size
 
     def _get_info(self, channel: Acquisition.Channel) -> Acquisition.DataStreamInfo:
+        if self.__coalesce_channels:
+            return Acquisition.DataStreamInfo(DataAndMetadata.DataMetadata(data_shape=(len(self.__scan_channels),), data_dtype=numpy.float32,
+                                                                           dimensional_calibrations=[Calibration.Calibration()],
+                                                                           data_descriptor=DataAndMetadata.DataDescriptor(False, 0, 1)), 0.0)
         return Acquisition.DataStreamInfo(DataAndMetadata.DataMetadata(data_shape=(), data_dtype=numpy.float32), 0.0)
 
     def _prepare_device_state(self, device_state: Acquisition.DeviceState) -> None:
@@ -2405,7 +2713,12 @@ class ScanDataStream(Acquisition.DataStream):
 
     @property
     def channels(self) -> typing.Tuple[Acquisition.Channel, ...]:
-        return tuple(Acquisition.Channel(self.__scan_hardware_source.hardware_source_id, str(c)) for c in self.__enabled_channels)
+        return (self.__combined_channel,) if self.__coalesce_channels else self.__scan_channels
+
+    @property
+    def scan_channels(self) -> typing.Tuple[Acquisition.Channel, ...]:
+        """Return the channels of the enabled scan channels, whether or not they are coalesced."""
+        return self.__scan_channels
 
     def _prepare_stream(self, stream_args: Acquisition.DataStreamArgs, index_stack: Acquisition.IndexDescriptionList, **kwargs: typing.Any) -> None:
         self.__scan_hardware_source.abort_playing(sync_timeout=5.0)
@@ -2432,13 +2745,9 @@ class ScanDataStream(Acquisition.DataStream):
         section_rect = section_rect + Geometry.IntPoint(y=self.__section_offset)
         acquisition_task_parameters = ScanAcquisitionTaskParameters(scan_id=self.__scan_id)
         section_frame_parameters = apply_section_rect(scan_frame_parameters, acquisition_task_parameters, section_rect, scan_size, self.__fractional_area)
-        self.__section_rect = section_rect
         self.__section_offset = section_rect.bottom % scan_size.height
+        self.__section_buffers = _ScanSectionBuffers(section_rect)
         self.__started = True
-        with self.__lock:
-            self.__buffers.clear()
-            self.__sent_rows.clear()
-            self.__available_rows.clear()
         if self.__fov_nm_model and self.__fov_nm_model.value is not None:
             section_frame_parameters.fov_nm = self.__fov_nm_model.value
         if self.__rotation_model and self.__rotation_model.value is not None:
@@ -2457,49 +2766,96 @@ class ScanDataStream(Acquisition.DataStream):
 
     def _get_raw_data_stream_events(self) -> typing.Sequence[typing.Tuple[weakref.ReferenceType[Acquisition.DataStream], Acquisition.DataStreamEventArgs]]:
         raw_data_stream_events = list[typing.Tuple[weakref.ReferenceType[Acquisition.DataStream], Acquisition.DataStreamEventArgs]]()
-        with self.__lock:
-            for channel in self.__buffers.keys():
-                sent_rows = self.__sent_rows.get(channel, self.__section_rect.top)
-                available_rows = self.__available_rows.get(channel, self.__section_rect.top)
-                if sent_rows < available_rows:
-                    # when we extract data from the buffer, extract only the part that is the section rect.
-                    # the buffer represents the entire data item; but only is updated with the section.
-                    scan_data = self.__buffers[channel]
-                    is_complete = available_rows == self.__section_rect.bottom
-                    # only complete when the record task is finished. this prevents a race condition when restarting.
-                    if not is_complete or (is_complete and self.__record_task.is_finished):
-                        start = self.__section_rect.width * sent_rows
-                        stop = self.__section_rect.width * available_rows
-                        data_dtype = scan_data.data_dtype
-                        assert data_dtype is not None
-                        data_metadata = DataAndMetadata.DataMetadata(data_shape=(), data_dtype=data_dtype,
-                                                                     intensity_calibration=scan_data.intensity_calibration,
-                                                                     dimensional_calibrations=None,
-                                                                     metadata=scan_data.metadata,
-                                                                     timestamp=scan_data.timestamp,
-                                                                     data_descriptor=DataAndMetadata.DataDescriptor(False, 0, 0),
-                                                                     timezone=scan_data.timezone,
-                                                                     timezone_offset=scan_data.timezone_offset)
-                        source_slice = (slice(start, stop),)
-                        scan_data_data = scan_data.data
-                        assert scan_data_data is not None
-                        data_stream_event = Acquisition.DataStreamEventArgs(channel,
-                                                                            data_metadata,
-                                                                            scan_data_data.reshape(-1),
-                                                                            stop - start,
-                                                                            source_slice,
-                                                                            Acquisition.DataStreamStateEnum.COMPLETE)
-                        if stop - start > 0:
-                            raw_data_stream_events.append((weakref.ref(self), data_stream_event))
-                            self.__sent_rows[channel] = available_rows
+        section_buffers = self.__section_buffers
+        section_rect = section_buffers.section_rect
+        if self.__coalesce_channels:
+            raw_data_stream_events.extend(self.__get_combined_raw_data_stream_events(section_buffers))
+            return raw_data_stream_events
+        for channel, scan_data in list(section_buffers.buffers.items()):
+            sent_rows = section_buffers.sent_rows.get(channel, section_rect.top)
+            available_rows = section_buffers.available_rows.get(channel, section_rect.top)
+            if sent_rows < available_rows:
+                # when we extract data from the buffer, extract only the part that is the section rect.
+                # the buffer represents the entire data item; but only is updated with the section.
+                is_complete = available_rows == section_rect.bottom
+                # only complete when the record task is finished. this prevents a race condition when restarting.
+                if not is_complete or (is_complete and self.__record_task.is_finished):
+                    start = section_rect.width * sent_rows
+                    stop = section_rect.width * available_rows
+                    data_metadata = self.__get_data_metadata(scan_data, (), None, DataAndMetadata.DataDescriptor(False, 0, 0), scan_data.metadata)
+                    source_slice = (slice(start, stop),)
+                    scan_data_data = scan_data.data
+                    assert scan_data_data is not None
+                    data_stream_event = Acquisition.DataStreamEventArgs(channel,
+                                                                        data_metadata,
+                                                                        scan_data_data.reshape(-1),
+                                                                        stop - start,
+                                                                        source_slice,
+                                                                        Acquisition.DataStreamStateEnum.COMPLETE)
+                    if stop - start > 0:
+                        raw_data_stream_events.append((weakref.ref(self), data_stream_event))
+                        section_buffers.sent_rows[channel] = available_rows
         return raw_data_stream_events
 
+    def __get_combined_raw_data_stream_events(self, section_buffers: _ScanSectionBuffers) -> typing.Sequence[typing.Tuple[weakref.ReferenceType[Acquisition.DataStream], Acquisition.DataStreamEventArgs]]:
+        # send the rows available in all channels as a single packet with the channels stacked along the last axis.
+        section_rect = section_buffers.section_rect
+        buffers = section_buffers.buffers
+        channel = self.__combined_channel
+        if not all(scan_channel in buffers for scan_channel in self.__scan_channels):
+            return list()
+        sent_rows = section_buffers.sent_rows.get(channel, section_rect.top)
+        available_rows = min(section_buffers.available_rows.get(scan_channel, section_rect.top) for scan_channel in self.__scan_channels)
+        is_complete = available_rows == section_rect.bottom
+        # only complete when the record task is finished. this prevents a race condition when restarting.
+        if sent_rows >= available_rows or (is_complete and not self.__record_task.is_finished):
+            return list()
+        start = section_rect.width * sent_rows
+        stop = section_rect.width * available_rows
+        scan_data = buffers[self.__scan_channels[0]]
+        # the channel specific metadata of the first channel does not apply to the combined data.
+        metadata = dict(scan_data.metadata)
+        hardware_source_metadata = dict(metadata.get("hardware_source", dict()))
+        for key in ("channel_index", "channel_id", "channel_name", "reference_key"):
+            hardware_source_metadata.pop(key, None)
+        metadata["hardware_source"] = hardware_source_metadata
+        data_metadata = self.__get_data_metadata(scan_data, (len(self.__scan_channels),), [Calibration.Calibration()], DataAndMetadata.DataDescriptor(False, 0, 1), metadata)
+        combined_data = numpy.stack([typing.cast(_NDArray, buffers[scan_channel].data).reshape(-1)[start:stop] for scan_channel in self.__scan_channels], axis=-1)
+        source_slice = (slice(0, stop - start), slice(None))
+        data_stream_event = Acquisition.DataStreamEventArgs(channel,
+                                                            data_metadata,
+                                                            combined_data,
+                                                            stop - start,
+                                                            source_slice,
+                                                            Acquisition.DataStreamStateEnum.COMPLETE)
+        section_buffers.sent_rows[channel] = available_rows
+        return [(weakref.ref(self), data_stream_event)]
+
+    def __get_data_metadata(self, scan_data: DataAndMetadata.DataAndMetadata, data_shape: DataAndMetadata.ShapeType,
+                            dimensional_calibrations: typing.Optional[typing.Sequence[Calibration.Calibration]],
+                            data_descriptor: DataAndMetadata.DataDescriptor, metadata: DataAndMetadata.MetadataType) -> DataAndMetadata.DataMetadata:
+        data_dtype = scan_data.data_dtype
+        assert data_dtype is not None
+        return DataAndMetadata.DataMetadata(data_shape=data_shape, data_dtype=data_dtype,
+                                            intensity_calibration=scan_data.intensity_calibration,
+                                            dimensional_calibrations=dimensional_calibrations,
+                                            metadata=metadata,
+                                            timestamp=scan_data.timestamp,
+                                            data_descriptor=data_descriptor,
+                                            timezone=scan_data.timezone,
+                                            timezone_offset=scan_data.timezone_offset)
+
     def _build_data_handler(self, data_handler: Acquisition.DataHandler) -> bool:
         return False
 
 
 class ScanFrameDataStream(Acquisition.StackedDataStream):
-    def __init__(self, scan_hardware_source: ScanHardwareSource, scan_frame_parameters: ScanFrameParameters) -> None:
+    """A data stream that provides scan frames.
+
+    Pass coalesce_channels to send all enabled channels through the stream as a single combined channel, which is
+    split into the individual channels when each frame is complete.
+    """
+    def __init__(self, scan_hardware_source: ScanHardwareSource, scan_frame_parameters: ScanFrameParameters, *, coalesce_channels: bool = False) -> None:
         self.__scan_hardware_source = scan_hardware_source
         self.__scan_frame_parameters = scan_frame_parameters
         self.__scan_id = uuid.uuid4()
@@ -2524,17 +2880,21 @@ class ScanFrameDataStream(Acquisition.StackedDataStream):
         scan_data_stream = ScanDataStream(scan_hardware_source, scan_frame_parameters, scan_id,
                                           scan_hardware_source.drift_tracker,
                                           fov_nm_model=magnification_device_controller.fov_nm_model,
-                                          rotation_model=magnification_device_controller.rotation_model)
+                                          rotation_model=magnification_device_controller.rotation_model,
+                                          coalesce_channels=coalesce_channels)
 
         # potentially break the scan into multiple sections; this is an unused capability currently.
         scan_size = scan_data_stream.scan_size
         section_height = scan_size.height
         section_count = (scan_size.height + section_height - 1) // section_height
-        collectors: typing.List[Acquisition.CollectedDataStream] = list()
+        collectors: typing.List[Acquisition.DataStream] = list()
         for section in range(section_count):
             start = section * section_height
             stop = min(start + section_height, scan_size.height)
-            collectors.append(Acquisition.CollectedDataStream(scan_data_stream, (stop - start, scan_size.width), get_scan_calibrations(scan_frame_parameters)))
+            collector: Acquisition.DataStream = Acquisition.CollectedDataStream(scan_data_stream, (stop - start, scan_size.width), get_scan_calibrations(scan_frame_parameters))
+            if coalesce_channels:
+                collector = Acquisition.FramedDataStream(collector, operator=Acquisition.ChannelSplitOperator(scan_data_stream.scan_channels))
+            collectors.append(collector)
 
         super().__init__(collectors)
         self.magnification_device_controller = magnification_device_controller
@@ -2613,7 +2973,11 @@ def make_synchronized_scan_data_stream(
         drift_rotation: float = 0.0,
         fov_nm_model: typing.Optional[Model.PropertyModel[float]] = None,
         rotation_model: typing.Optional[Model.PropertyModel[float]] = None,
-        old_move_axis: bool = False) -> Acquisition.DataStream:
+        old_move_axis: bool = False,
+        max_section_overhead_fraction: typing.Optional[float] = None) -> Acquisition.DataStream:
+
+    # if section_height is not specified and max_section_overhead_fraction is specified, the section height is chosen
+    # by the camera from its learned overhead as the smallest height keeping the section overhead within the fraction.
 
     # there are two separate drift corrector possibilities:
     #   1 - a drift corrector that takes a separate scan, implemented using the scan_data_stream_functor
@@ -2663,6 +3027,8 @@ def make_synchronized_scan_data_stream(
     if scan_data_stream_functor:
         scan_like_data_stream = scan_data_stream_functor.apply(scan_like_data_stream)
     combined_data_stream = Acquisition.CombinedDataStream([scan_like_data_stream, processed_camera_data_stream])
+    if not section_height and max_section_overhead_fraction is not None:
+        section_height = camera_hardware_source.choose_section_height(camera_frame_parameters, scan_size, max_section_overhead_fraction)
     section_height = section_height or scan_size.height
     section_count = (scan_size.height + section_height - 1) // section_height
     # create a stream for each section of the acquisition.
@@ -2762,7 +3128,8 @@ class SynchronizedScanAcquisitionDevice(Acquisition.AcquisitionDeviceLike):
                  drift_interval_scans: int,
                  drift_channel_id: typing.Optional[str],
                  drift_region: typing.Optional[Geometry.FloatRect],
-                 drift_rotation: float
+                 drift_rotation: float,
+                 *, max_section_overhead_fraction: typing.Optional[float] = None
                  ) -> None:
         self.__scan_hardware_source = scan_hardware_source
         self.__scan_frame_parameters = scan_frame_parameters
@@ -2775,6 +3142,7 @@ class SynchronizedScanAcquisitionDevice(Acquisition.AcquisitionDeviceLike):
         self.__drift_channel_id = drift_channel_id
         self.__drift_region = drift_region
         self.__drift_rotation = drift_rotation
+        self.__max_section_overhead_fraction = max_section_overhead_fraction
 
     def build_acquisition_device_data_stream(self, device_map: typing.MutableMapping[str, STEMController.DeviceController]) -> Acquisition.DataStream:
         # build the device data stream. return the data stream, channel names, drift tracker (optional), and device map.
@@ -2818,7 +3186,8 @@ class SynchronizedScanAcquisitionDevice(Acquisition.AcquisitionDeviceLike):
                 self.__drift_interval_scans,
                 self.__drift_channel_id,
                 self.__drift_region,
-                self.__drift_rotation
+                self.__drift_rotation,
+                measure_asynchronously=scan_hardware_source.drift_settings.measure_asynchronously
             )
             section_height = self.__drift_interval_lines
         enable_drift_tracker = drift_tracker is not None and self.__drift_correction_enabled
@@ -2840,7 +3209,8 @@ class SynchronizedScanAcquisitionDevice(Acquisition.AcquisitionDeviceLike):
             enable_drift_tracker=enable_drift_tracker,
             drift_rotation=self.__drift_rotation,
             fov_nm_model=magnification_device_controller.fov_nm_model,
-            rotation_model=magnification_device_controller.rotation_model
+            rotation_model=magnification_device_controller.rotation_model,
+            max_section_overhead_fraction=self.__max_section_overhead_fraction
         )
 
         # construct the channel names.
@@ -72,9 +72,11 @@ class DriftIntervalUnit(enum.IntEnum):
 
 
 class DriftCorrectionSettings:
-    def __init__(self, interval: int = 0, interval_units: DriftIntervalUnit = DriftIntervalUnit.FRAME) -> None:
+    def __init__(self, interval: int = 0, interval_units: DriftIntervalUnit = DriftIntervalUnit.FRAME, *, measure_asynchronously: bool = False) -> None:
         self.interval = interval
         self.interval_units = interval_units
+        # whether synchronized acquisition measures drift on the drift tracker thread rather than waiting for it.
+        self.measure_asynchronously = measure_asynchronously
 
     def __eq__(self, other: typing.Any) -> bool:
         if other is None:
@@ -85,10 +87,12 @@ class DriftCorrectionSettings:
             return False
         if other.interval_units != self.interval_units:
             return False
+        if other.measure_asynchronously != self.measure_asynchronously:
+            return False
         return True
 
     def __repr__(self) -> str:
-        return f"{self.interval=} {self.interval_units=}"
+        return f"{self.interval=} {self.interval_units=} {self.measure_asynchronously=}"
 
 
 AxisType = typing.Tuple[str, str]
@@ -96,6 +96,12 @@ class ScanBoxSimulator(ScanDevice.ScanSimulatorLike):
     def generate_scan_data(self, instrument: InstrumentDevice.Instrument, scan_frame_parameters: ScanDevice.ScanFrameParameters) -> numpy.typing.NDArray[numpy.float32]:
         return self.__scan_data_generator.generate_scan_data(instrument, scan_frame_parameters)
 
+    def generate_scan_data_rows(self, instrument: InstrumentDevice.Instrument, scan_frame_parameters: ScanDevice.ScanFrameParameters, row_start: int, row_stop: int) -> numpy.typing.NDArray[numpy.float32]:
+        generate_scan_data_rows = getattr(self.__scan_data_generator, "generate_scan_data_rows", None)
+        if callable(generate_scan_data_rows):
+            return typing.cast(numpy.typing.NDArray[numpy.float32], generate_scan_data_rows(instrument, scan_frame_parameters, row_start, row_stop))
+        return self.__scan_data_generator.generate_scan_data(instrument, scan_frame_parameters)[row_start:row_stop]
+
 
 class ScanModule(scan_base.ScanModule):
     def __init__(self, instrument: InstrumentDevice.Instrument, device_id: str, scan_data_generator: ScanDevice.ScanDataGeneratorLike, *, advance_pixel_filter: typing.Callable[[int], bool] | None = None) -> None:
@@ -208,6 +214,9 @@ class ScanDataGenerator(ScanDevice.ScanDataGeneratorLike):
         self.__pattern = typing.cast(numpy.typing.NDArray[numpy.float32], pattern)
 
     def generate_scan_data(self, instrument: InstrumentDevice.Instrument, scan_frame_parameters: ScanDevice.ScanFrameParameters) -> numpy.typing.NDArray[numpy.float32]:
+        return self.generate_scan_data_rows(instrument, scan_frame_parameters, 0, scan_frame_parameters.size.height)
+
+    def generate_scan_data_rows(self, instrument: InstrumentDevice.Instrument, scan_frame_parameters: ScanDevice.ScanFrameParameters, row_start: int, row_stop: int) -> numpy.typing.NDArray[numpy.float32]:
         pattern = self.__pattern
         shift_nm = Geometry.FloatPoint(instrument.GetVal("CSH.y") * 1e9, instrument.GetVal("CSH.x") * 1e9)  # for drift tests
         size = scan_frame_parameters.size
@@ -218,13 +227,13 @@ class ScanDataGenerator(ScanDevice.ScanDataGeneratorLike):
         y_length = fov_size_nm.height / 100 * pattern.shape[0]
         x_start = (50 + center_nm.x + shift_nm.x - fov_size_nm.width / 2) / 100 * pattern.shape[1]
         x_length = fov_size_nm.width / 100 * pattern.shape[1]
-        iy, ix = numpy.meshgrid(numpy.arange(size.width), numpy.arange(size.height))
+        iy, ix = numpy.meshgrid(numpy.arange(size.width), numpy.arange(row_start, row_stop))
         y = iy * y_length / size.height - y_length / 2
         x = ix * x_length / size.width - x_length / 2
         angle_sin = math.sin(-rotation)
         angle_cos = math.cos(-rotation)
         coordinates = [y_start + y_length / 2 + (x * angle_cos - y * angle_sin), x_start + x_length / 2 + (y * angle_cos + x * angle_sin)]
-        return typing.cast(numpy.typing.NDArray[numpy.float32], scipy.ndimage.map_coordinates(pattern, coordinates, order=1) + numpy.random.randn(*size) * 0.1)
+        return typing.cast(numpy.typing.NDArray[numpy.float32], scipy.ndimage.map_coordinates(pattern, coordinates, order=1) + numpy.random.randn(row_stop - row_start, size.width) * 0.1)
 
 
 class AcquisitionTestContextConfiguration:
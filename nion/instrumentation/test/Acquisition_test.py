@@ -484,6 +484,34 @@ class TestAcquisitionClass(unittest.TestCase):
                 self.assertEqual(DataAndMetadata.DataDescriptor(False, 0, 2), maker.get_data(channel1).data_descriptor)
                 self.assertEqual(DataAndMetadata.DataDescriptor(False, 2, 1), maker.get_data(channel2).data_descriptor)
 
+    def test_collection_camera_binned_and_projected_in_software(self):
+        scan_shape = (4, 4)
+        channel = Acquisition.Channel("2")
+        for operator, expected_fn, expected_data_descriptor in (
+                (Acquisition.BinningOperator((2, 2)), lambda d: d[..., :4, :6].reshape(d.shape[:-2] + (2, 2, 3, 2)).sum((-3, -1)), DataAndMetadata.DataDescriptor(False, 2, 2)),
+                (Acquisition.ProjectionOperator(((1, 3), None), 0), lambda d: d[..., 1:3, :].sum(-2), DataAndMetadata.DataDescriptor(False, 2, 1))):
+            with self.subTest(operator=str(operator)):
+                camera_data_stream = SingleFrameDataStream(numpy.prod(scan_shape), (5, 6), channel)
+                reduced_data_stream = Acquisition.FramedDataStream(camera_data_stream, operator=operator)
+                collector = Acquisition.CollectedDataStream(reduced_data_stream, scan_shape, [Calibration.Calibration(), Calibration.Calibration()])
+                maker = Acquisition.MakerDataStream(collector)
+                Acquisition.acquire(maker)
+                expected_data = expected_fn(camera_data_stream.data.reshape(scan_shape + (5, 6)))
+                self.assertTrue(numpy.allclose(expected_data, maker.get_data(channel).data))
+                self.assertEqual(expected_data_descriptor, maker.get_data(channel).data_descriptor)
+
+    def test_binning_and_projection_of_integer_data_do_not_overflow(self):
+        data = numpy.full((2, 8, 8), 60000, dtype=numpy.uint16)
+        data_metadata = DataAndMetadata.DataMetadata(data_shape=data.shape, data_dtype=data.dtype, data_descriptor=DataAndMetadata.DataDescriptor(True, 0, 2))
+        for operator, expected_shape in ((Acquisition.BinningOperator((4, 4)), (2, 2, 2)), (Acquisition.ProjectionOperator((None, None), 0), (2, 8))):
+            with self.subTest(operator=str(operator)):
+                reduced_data = operator.reduce_data(data, 2)
+                self.assertEqual(expected_shape, reduced_data.shape)
+                self.assertTrue(numpy.all(reduced_data == (60000 * 16 if expected_shape == (2, 2, 2) else 60000 * 8)))
+                self.assertEqual(reduced_data.dtype, operator.reduce_data_metadata(data_metadata).data_dtype)
+        # floating point data keeps its type.
+        self.assertEqual(numpy.dtype(numpy.float32), Acquisition.BinningOperator((2, 2)).reduce_data(numpy.ones((4, 4), dtype=numpy.float32), 2).dtype)
+
     def test_collection_camera_summed_to_single_scalar(self):
         # scan will produce two data streams of pixels.
         # camera will produce one stream of frames.
@@ -16,6 +16,7 @@ import numpy
 
 from nion.data import Calibration
 from nion.data import DataAndMetadata
+from nion.device_kit import CameraDevice as DeviceKitCameraDevice
 from nion.instrumentation import Acquisition
 from nion.instrumentation import AcquisitionPreferences
 from nion.instrumentation import camera_base
@@ -183,6 +184,40 @@ class CameraDevice:
         self.calibration_controls = dict[str, typing.Any]()
 
 
+class LoopingCameraDevice:
+    # a camera device without acquire_sequence, so the hardware source acquires sequences by looping over frames.
+
+    def __init__(self) -> None:
+        self.camera_id = "looping_camera"
+        self.camera_name = "Looping Camera"
+        self.camera_type = "ronchigram"
+        self.calibration_controls = dict[str, typing.Any]()
+        self.sensor_dimensions = (16, 16)
+        self.readout_area = (0, 0, 16, 16)
+        self.binning_values = [1, 2]
+        self.frame_count = 0
+
+    def close(self) -> None:
+        pass
+
+    def get_expected_dimensions(self, binning: int) -> typing.Tuple[int, int]:
+        return 16 // binning, 16 // binning
+
+    def set_frame_parameters(self, frame_parameters: camera_base.CameraFrameParameters) -> None:
+        self.binning = frame_parameters.binning
+
+    def start_live(self) -> None:
+        pass
+
+    def stop_live(self) -> None:
+        pass
+
+    def acquire_image(self) -> typing.Dict[str, typing.Any]:
+        self.frame_count += 1
+        data = numpy.full(self.get_expected_dimensions(self.binning), self.frame_count, dtype=numpy.float32)
+        return {"data": data, "properties": {"frame_number": self.frame_count}}
+
+
 class CameraFrameParameters:
     def __init__(self) -> None:
         self.binning = 2
@@ -917,6 +952,72 @@ class TestCameraControlClass(unittest.TestCase):
             self.assertEqual(2, len(data_element["data"].shape))
             self.assertEqual(2, len(data_element["spatial_calibrations"]))
 
+    def test_acquire_sequence_reports_progress(self):
+        # the simulator camera supports sequences, so the progress is reported by the device partial data.
+        with self._test_context() as test_context:
+            hardware_source = test_context.camera_hardware_source
+            frame_parameters = hardware_source.get_frame_parameters(0)
+            hardware_source.set_current_frame_parameters(frame_parameters)
+            progress_counts = list()
+
+            def progress(data: numpy.typing.NDArray[typing.Any], valid_count: int) -> None:
+                progress_counts.append(valid_count)
+
+            hardware_source.acquire_sequence_prepare(4)
+            data_elements = hardware_source.acquire_sequence(4, progress_fn=progress)
+            self.assertEqual(1, len(data_elements))
+            self.assertEqual(4, data_elements[0]["data"].shape[0])
+            self.assertEqual(4, progress_counts[-1])
+            self.assertEqual(sorted(progress_counts), progress_counts)
+
+    def test_acquire_sequence_without_device_sequence_support_writes_frames_in_place_and_reports_progress(self):
+        with self._test_context():
+            camera_device = LoopingCameraDevice()
+            camera_settings = DeviceKitCameraDevice.CameraSettings(camera_device.camera_id, 0.005)
+            hardware_source = camera_base.CameraHardwareSource2(None, typing.cast(typing.Any, camera_device), camera_settings, None, None)
+            with contextlib.closing(hardware_source):
+                progress_counts = list()
+                data_arrays = list()
+
+                def progress(data: numpy.typing.NDArray[typing.Any], valid_count: int) -> None:
+                    progress_counts.append(valid_count)
+                    data_arrays.append(data)
+
+                hardware_source.acquire_sequence_prepare(4)
+                data_elements = hardware_source.acquire_sequence(4, progress_fn=progress)
+                self.assertEqual(1, len(data_elements))
+                data = data_elements[0]["data"]
+                self.assertEqual((4, 8, 8), data.shape)
+                self.assertEqual([1, 2, 3, 4], progress_counts)
+                # the frames are written into the same array.
+                self.assertTrue(all(data_array is data for data_array in data_arrays))
+                self.assertEqual([1, 2, 3, 4], [data[index, 0, 0] for index in range(4)])
+
+    def test_acquire_sequence_without_device_sequence_support_can_be_canceled(self):
+        with self._test_context():
+            camera_device = LoopingCameraDevice()
+            camera_settings = DeviceKitCameraDevice.CameraSettings(camera_device.camera_id, 0.005)
+            hardware_source = camera_base.CameraHardwareSource2(None, typing.cast(typing.Any, camera_device), camera_settings, None, None)
+            with contextlib.closing(hardware_source):
+                # cancel during the acquisition.
+                def progress(data: numpy.typing.NDArray[typing.Any], valid_count: int) -> None:
+                    if valid_count == 2:
+                        hardware_source.acquire_sequence_cancel()
+
+                hardware_source.acquire_sequence_prepare(4)
+                self.assertEqual(0, len(hardware_source.acquire_sequence(4, progress_fn=progress)))
+                self.assertEqual(2, camera_device.frame_count)
+                # cancel between prepare and acquire.
+                hardware_source.acquire_sequence_prepare(4)
+                hardware_source.acquire_sequence_cancel()
+                self.assertEqual(0, len(hardware_source.acquire_sequence(4)))
+                self.assertEqual(2, camera_device.frame_count)
+                # a cancel before prepare does not cancel the next sequence.
+                hardware_source.acquire_sequence_cancel()
+                hardware_source.acquire_sequence_prepare(4)
+                self.assertEqual(1, len(hardware_source.acquire_sequence(4)))
+                self.assertEqual(6, camera_device.frame_count)
+
     def test_ronchigram_calibrations(self):
         with self._test_context() as test_context:
             document_controller = test_context.document_controller
@@ -1959,6 +2060,114 @@ class TestCameraControlClass(unittest.TestCase):
         intensity_calibration = calibrator.get_intensity_calibration(camera_frame_parameters)
         self.assertTrue(calibration_equal(Calibration.Calibration(), intensity_calibration))
 
+    def test_calibrator_cache_is_invalidated_when_control_changes(self) -> None:
+        instrument_controller = InstrumentController({"angle": 0.01, "intensity": 0.1})
+        camera_device = CameraDevice("eels")
+        camera_frame_parameters = CameraFrameParameters()
+        config = {
+            "calibXScaleControl": "angle",
+            "calibYScaleControl": "angle",
+            "calibXUnits": "eV",
+            "calibYUnits": "y",
+            "calibIntensityScaleControl": "intensity",
+            "calibIntensityUnits": "counts",
+        }
+        calibrator = camera_base.CalibrationControlsCalibrator2(instrument_controller, camera_device, config)
+        calibrations = calibrator.get_signal_calibrations(camera_frame_parameters, (100, 100))
+        self.assertTrue(calibration_equal(Calibration.Calibration(None, 0.02, "eV"), calibrations[1]))
+        calibration_timestamp = calibrator.calibration_timestamp
+        # modifying a returned calibration does not modify the cached calibration.
+        calibrations[1].scale = 5.0
+        calibrations = calibrator.get_signal_calibrations(camera_frame_parameters, (100, 100))
+        self.assertTrue(calibration_equal(Calibration.Calibration(None, 0.02, "eV"), calibrations[1]))
+        self.assertEqual(calibration_timestamp, calibrator.calibration_timestamp)
+        # changing a control invalidates the cached calibrations.
+        instrument_controller.set_control_value("angle", 0.03)
+        calibrations = calibrator.get_signal_calibrations(camera_frame_parameters, (100, 100))
+        self.assertTrue(calibration_equal(Calibration.Calibration(None, 0.06, "eV"), calibrations[1]))
+        self.assertLessEqual(calibration_timestamp, calibrator.calibration_timestamp)
+        intensity_calibration = calibrator.get_intensity_calibration(camera_frame_parameters)
+        self.assertTrue(calibration_equal(Calibration.Calibration(None, 0.1, "counts"), intensity_calibration))
+
+    def test_crop_and_calibrate_returns_view_with_adjusted_calibrations(self) -> None:
+        data = numpy.random.randn(4, 6, 8).astype(numpy.float32)
+        collection_calibrations = [Calibration.Calibration(0.0, 2.0, "nm"), Calibration.Calibration(0.0, 2.0, "nm")]
+        uncropped_xdata = DataAndMetadata.new_data_and_metadata(data, dimensional_calibrations=collection_calibrations + [Calibration.Calibration()], data_descriptor=DataAndMetadata.DataDescriptor(False, 2, 1))
+        cropped_xdata = camera_base.crop_and_calibrate(uncropped_xdata, 2, None, [Calibration.Calibration(units="eV")], None, dict())
+        self.assertEqual((4, 4, 8), cropped_xdata.data_shape)
+        self.assertTrue(numpy.shares_memory(data, cropped_xdata.data))
+        self.assertTrue(numpy.array_equal(data[:, 2:, :], cropped_xdata.data))
+        self.assertEqual(4.0, cropped_xdata.dimensional_calibrations[1].offset)
+        self.assertEqual("eV", cropped_xdata.dimensional_calibrations[-1].units)
+        # flattening only copies the rows spanning the requested range.
+        flattened_data, start_index = camera_base.get_flattened_navigation_data(cropped_xdata.data, (4, 4), 5, 10)
+        self.assertEqual(4, start_index)
+        self.assertEqual((8, 8), flattened_data.shape)
+        self.assertTrue(numpy.array_equal(cropped_xdata.data[1:3].reshape(8, 8), flattened_data))
+        # contiguous data is flattened without a copy.
+        flattened_data, start_index = camera_base.get_flattened_navigation_data(data, (4, 6), 5, 10)
+        self.assertEqual(0, start_index)
+        self.assertTrue(numpy.shares_memory(data, flattened_data))
+
+    def test_camera_overhead_model_estimates_and_persists(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_file = pathlib.Path(temp_dir) / "camera_overhead.json"
+            overhead_model = camera_base.CameraOverheadModel(config_file)
+            # nothing measured, no overhead.
+            self.assertAlmostEqual(0.4, overhead_model.estimate_acquisition_time(0.1, 1, (16, 16), 4))
+            self.assertEqual(32, overhead_model.choose_section_height(0.1, 1, (16, 16), 4, 32))
+            # an unchanged model is not written.
+            overhead_model.save()
+            self.assertFalse(config_file.exists())
+            overhead_model.add_start_measurement(1, (16, 16), 0.5)
+            overhead_model.add_start_measurement(1, (16, 16), 0.2, is_first_section=False)
+            # frame time is twice the exposure plus 10 ms.
+            overhead_model.add_frames_measurement(1, (16, 16), 0.1, 10, 10 * 0.21)
+            overhead_model.add_frames_measurement(1, (16, 16), 0.2, 10, 10 * 0.41)
+            overhead = overhead_model.get_overhead(0.3, 1, (16, 16))
+            self.assertAlmostEqual(0.5, overhead.start)
+            self.assertAlmostEqual(0.2, overhead.section)
+            self.assertAlmostEqual(0.31, overhead.frame)
+            self.assertAlmostEqual(0.5 + 0.2 * 2 + 0.61 * 4, overhead_model.estimate_acquisition_time(0.3, 1, (16, 16), 4, 3))
+            # unmeasured configurations use the average of the measured ones.
+            self.assertAlmostEqual(0.5, overhead_model.get_overhead(0.3, 2, (8, 8)).start)
+            # each row takes 0.61 s; keeping the 0.2 s section overhead within 5% requires 7 rows.
+            self.assertEqual(7, overhead_model.choose_section_height(0.3, 1, (16, 16), 1, 32))
+            self.assertEqual(4, overhead_model.choose_section_height(0.3, 1, (16, 16), 1, 4))
+            overhead_model.save()
+            reloaded_overhead_model = camera_base.CameraOverheadModel(config_file)
+            self.assertAlmostEqual(overhead.frame, reloaded_overhead_model.get_overhead(0.3, 1, (16, 16)).frame)
+
+    def test_camera_data_stream_measures_overhead(self) -> None:
+        with self._test_context() as test_context:
+            hardware_source = test_context.camera_hardware_source
+            frame_parameters = hardware_source.get_current_frame_parameters()
+            camera_data_stream = camera_base.make_sequence_data_stream(hardware_source, frame_parameters, 4)
+            Acquisition.acquire_immediate(camera_data_stream)
+            overhead = hardware_source.overhead_model.get_overhead(frame_parameters.exposure_ms / 1000, frame_parameters.binning, hardware_source.get_expected_dimensions(frame_parameters))
+            self.assertLess(0.0, overhead.start)
+            self.assertLess(frame_parameters.exposure_ms / 1000 * 4, hardware_source.estimate_acquisition_time(frame_parameters, 4))
+            self.assertLessEqual(1, hardware_source.choose_section_height(frame_parameters, Geometry.IntSize(h=8, w=8)))
+
+    def test_camera_sequence_binned_in_software_before_copy(self):
+        with self._test_context() as test_context:
+            hardware_source = test_context.camera_hardware_source
+            frame_parameters = hardware_source.get_current_frame_parameters()
+            frame_shape = tuple(hardware_source.get_expected_dimensions(frame_parameters))
+            calibrations = hardware_source.get_camera_calibrations(frame_parameters)
+            camera_data_stream = camera_base.CameraDataStream(hardware_source, frame_parameters, camera_base.CameraDeviceSequenceStreamDelegate(hardware_source, frame_parameters))
+            operator = Acquisition.BinningOperator((2, 4))
+            binned_data_stream = Acquisition.SequenceDataStream(Acquisition.FramedDataStream(camera_data_stream, operator=operator), 3)
+            maker = Acquisition.MakerDataStream(binned_data_stream)
+            Acquisition.acquire(maker)
+            # the operator is applied by the camera device stream, not by the framed data stream.
+            self.assertTrue(operator.is_applied)
+            xdata = maker.get_data(camera_data_stream.channels[0])
+            self.assertEqual((3, frame_shape[0] // 2, frame_shape[1] // 4), xdata.data_shape)
+            self.assertEqual(DataAndMetadata.DataDescriptor(True, 0, 2), xdata.data_descriptor)
+            self.assertAlmostEqual(calibrations[0].scale * 2, xdata.dimensional_calibrations[1].scale)
+            self.assertAlmostEqual(calibrations[1].scale * 4, xdata.dimensional_calibrations[2].scale)
+
     def planned_test_custom_view_followed_by_ui_view_uses_ui_frame_parameters(self):
         pass
 
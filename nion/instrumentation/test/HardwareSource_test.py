@@ -8,6 +8,7 @@ import unittest
 
 import numpy
 
+from nion.data import Calibration
 from nion.data import DataAndMetadata
 from nion.instrumentation import HardwareSource
 from nion.instrumentation.test import AcquisitionTestContext
@@ -848,6 +849,249 @@ class TestHardwareSourceClass(unittest.TestCase):
             self.assertAlmostEqual(data[0, 0], 1.0)
             self.assertAlmostEqual(data[128, 0], 16.0)
 
+    def test_sum_processor_sums_partial_frames_incrementally(self):
+        processor = HardwareSource.SumProcessor()
+        frame = numpy.random.randint(0, 100, (16, 8))
+        data = numpy.zeros((16, 8), dtype=frame.dtype)
+        data[0:5] = frame[0:5]
+        data[4] = 7  # the last row is incomplete and will be sent again
+        processor.update(DataAndMetadata.new_data_and_metadata(data), Geometry.IntRect.from_tlbr(0, 0, 5, 8))
+        data[4:10] = frame[4:10]
+        processor.update(DataAndMetadata.new_data_and_metadata(data), Geometry.IntRect.from_tlbr(4, 0, 10, 8))
+        data[10:16] = frame[10:16]
+        # rows summed by earlier updates are not summed again.
+        data[0] = 0
+        summed = processor.process(DataAndMetadata.new_data_and_metadata(data), sub_area=Geometry.IntRect.from_tlbr(10, 0, 16, 8))
+        self.assertTrue(numpy.array_equal(numpy.sum(frame, axis=0), summed.data))
+
+    def test_sum_processor_sums_full_frame_when_partial_rows_are_skipped(self):
+        processor = HardwareSource.SumProcessor()
+        frame = numpy.random.randint(0, 100, (16, 8))
+        processor.update(DataAndMetadata.new_data_and_metadata(frame), Geometry.IntRect.from_tlbr(0, 0, 5, 8))
+        summed = processor.process(DataAndMetadata.new_data_and_metadata(frame), sub_area=Geometry.IntRect.from_tlbr(10, 0, 16, 8))
+        self.assertTrue(numpy.array_equal(numpy.sum(frame, axis=0), summed.data))
+
+    def test_data_channel_processor_sums_partial_scan_frames(self):
+        data_channel_manager = HardwareSource.DataChannelManager("hardware_source", lambda data_channel_specifier: data_channel_specifier)
+        data_channel_manager.add_data_channel("hardware_source", None, 0, "A")
+        data_channel_manager.add_channel_processor("hardware_source", 0, HardwareSource.SumProcessor())
+        frame = numpy.random.randn(16, 8)
+        calibrations = [Calibration.Calibration(units="y"), Calibration.Calibration(units="x")]
+        xdatas = list()
+        for top, bottom in ((0, 5), (5, 11), (11, 16)):
+            data_element = {
+                "version": 1,
+                "data": frame,
+                "sub_area": ((top, 0), (bottom - top, 8)),
+                "state": "complete" if bottom == 16 else "partial",
+                "spatial_calibrations": [{"units": "y"}, {"units": "x"}],
+            }
+            xdatas = data_channel_manager.process_data_elements([data_element], None, False, None)
+        self.assertEqual(2, len(xdatas))
+        self.assertTrue(numpy.allclose(numpy.sum(frame, axis=0), xdatas[1].data))
+        self.assertEqual([calibrations[1]], list(xdatas[1].dimensional_calibrations))
+
+    def test_data_channel_with_persistent_buffer_updates_data_in_place(self):
+        data_channel = HardwareSource.DataChannel("hardware_source", "a", 0, "A", is_persistent_buffer=True)
+        data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((8, 8), 1.0), metadata={"frame": 1}), "complete", None, None, None, None)
+        data_and_metadata = data_channel.data_and_metadata
+        data = data_and_metadata.data
+        # the buffer is published as a read-only view.
+        self.assertFalse(data.flags.writeable)
+        data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((8, 8), 2.0), metadata={"frame": 2}), "complete", None, None, None, None)
+        # each update publishes a new data and metadata object on the same buffer.
+        self.assertIsNot(data_and_metadata, data_channel.data_and_metadata)
+        self.assertTrue(numpy.shares_memory(data, data_channel.data_and_metadata.data))
+        self.assertTrue(numpy.array_equal(numpy.full((8, 8), 2.0), data_channel.data_and_metadata.data))
+        self.assertEqual(1, data_and_metadata.metadata["frame"])
+        self.assertEqual(2, data_channel.data_and_metadata.metadata["frame"])
+        self.assertEqual("hardware_source", data_channel.data_and_metadata.metadata["hardware_source"]["hardware_source_id"])
+        # partial updates copy only the sub area.
+        data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((8, 8), 3.0)), "partial", None, ((0, 0), (2, 8)), ((0, 0), (2, 8)), None)
+        self.assertTrue(numpy.shares_memory(data, data_channel.data_and_metadata.data))
+        self.assertTrue(numpy.all(data[:2] == 3.0))
+        self.assertTrue(numpy.all(data[2:] == 2.0))
+        # a change of shape allocates a new buffer.
+        data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), 4.0)), "complete", None, None, None, None)
+        self.assertEqual((4, 4), data_channel.data_and_metadata.data_shape)
+        self.assertTrue(numpy.array_equal(numpy.full((8, 8), 3.0)[:2], data[:2]))
+
+    def test_data_channel_snapshot_shares_data_and_copies_on_next_write(self):
+        data_channel = HardwareSource.DataChannel("hardware_source", "a", 0, "A", is_persistent_buffer=True)
+        data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((8, 8), 1.0), metadata={"frame": 1}), "complete", None, None, None, None)
+        snapshot = data_channel.get_data_and_metadata_snapshot()
+        self.assertIs(snapshot, data_channel.get_data_and_metadata_snapshot())
+        # the snapshot shares the data of the channel.
+        self.assertTrue(numpy.shares_memory(snapshot.data, data_channel.data_and_metadata.data))
+        data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((8, 8), 2.0), metadata={"frame": 2}), "partial", None, ((0, 0), (2, 8)), ((0, 0), (2, 8)), None)
+        # the channel copies on write, so the snapshot is not changed by later updates.
+        self.assertFalse(numpy.shares_memory(snapshot.data, data_channel.data_and_metadata.data))
+        self.assertTrue(numpy.array_equal(numpy.full((8, 8), 1.0), snapshot.data))
+        self.assertEqual(1, snapshot.metadata["frame"])
+        self.assertTrue(numpy.all(data_channel.data_and_metadata.data[:2] == 2.0))
+        self.assertTrue(numpy.all(data_channel.data_and_metadata.data[2:] == 1.0))
+        # later writes go to the new buffer in place.
+        data = data_channel.data_and_metadata.data
+        data_channel.update(DataAndMetadata.new_data_and_metadata(numpy.full((8, 8), 3.0)), "complete", None, None, None, None)
+        self.assertTrue(numpy.shares_memory(data, data_channel.data_and_metadata.data))
+
+    def test_data_channel_snapshot_copies_data_owned_by_producer(self):
+        data_channel = HardwareSource.DataChannel("hardware_source", "a", 0, "A")
+        data = numpy.full((8, 8), 1.0)
+        data_channel.update(DataAndMetadata.new_data_and_metadata(data), "complete", None, None, None, None, is_in_place=True)
+        snapshot = data_channel.get_data_and_metadata_snapshot()
+        self.assertFalse(numpy.shares_memory(data, snapshot.data))
+        data[...] = 2.0
+        self.assertTrue(numpy.array_equal(numpy.full((8, 8), 1.0), snapshot.data))
+
+    def test_persistent_data_channel_buffers_acquire_consecutive_frames(self):
+        with self.__simple_test_context() as simple_test_context:
+            document_controller = simple_test_context.document_controller
+            document_model = simple_test_context.document_model
+            hardware_source = simple_test_context.hardware_source
+            hardware_source.set_persistent_data_channel_buffers(True)
+            hardware_source.start_playing()
+            try:
+                frame_indexes = [hardware_source.get_next_xdatas_to_finish()[0].metadata["hardware_source"]["frame_index"] for i in range(3)]
+            finally:
+                hardware_source.abort_playing(sync_timeout=3.0)
+            self.assertEqual(sorted(set(frame_indexes)), frame_indexes)
+            document_controller.periodic()
+            self.assertEqual(1, len(document_model.data_items))
+            self.assertIsNotNone(document_model.data_items[0].data)
+
+    def test_view_task_buffer_shares_frames_owned_by_data_channel_without_copy(self):
+        with self.__scan_test_context() as scan_test_context:
+            hardware_source = scan_test_context.hardware_source
+            view_task_buffer = HardwareSource.ViewTaskBuffer(hardware_source, 4)
+            with contextlib.closing(view_task_buffer):
+                view_task_buffer.start()
+                hardware_source.start_playing()
+                try:
+                    frame = view_task_buffer.grab_next()[0]
+                    frame_data = numpy.copy(frame.data)
+                    # the buffered frame is a read-only frame shared with the data channel.
+                    self.assertFalse(frame.data.flags.writeable)
+                    view_task_buffer.grab_next()
+                    view_task_buffer.grab_next()
+                finally:
+                    hardware_source.abort_playing(sync_timeout=3.0)
+                    view_task_buffer.stop()
+                # the data channel copies on write, so later frames leave the buffered frame unchanged.
+                self.assertTrue(numpy.array_equal(frame_data, frame.data))
+
+    def test_view_task_buffer_copies_frames_owned_by_producer(self):
+        with self.__simple_test_context() as simple_test_context:
+            hardware_source = simple_test_context.hardware_source
+            view_task_buffer = HardwareSource.ViewTaskBuffer(hardware_source, 4)
+            with contextlib.closing(view_task_buffer):
+                view_task_buffer.start()
+                hardware_source.start_playing()
+                try:
+                    frame = view_task_buffer.grab_next()[0]
+                    frame_data = numpy.copy(frame.data)
+                    view_task_buffer.grab_next()
+                finally:
+                    hardware_source.abort_playing(sync_timeout=3.0)
+                    view_task_buffer.stop()
+                # the producer writes into its data, so the buffered frame is a copy and the producer data is unchanged.
+                self.assertTrue(frame.data.flags.writeable)
+                self.assertTrue(hardware_source.image.flags.writeable)
+                self.assertTrue(numpy.array_equal(frame_data, frame.data))
+                self.assertFalse(numpy.array_equal(hardware_source.image, frame.data))
+
+    def test_view_task_buffer_evicts_earliest_frames_to_stay_within_max_bytes(self):
+        with self.__scan_test_context() as scan_test_context:
+            hardware_source = scan_test_context.hardware_source
+            frame_bytes = numpy.zeros((256, 256)).nbytes
+            view_task_buffer = HardwareSource.ViewTaskBuffer(hardware_source, 16, max_bytes=frame_bytes * 2)
+            with contextlib.closing(view_task_buffer):
+                view_task_buffer.start()
+                hardware_source.start_playing()
+                try:
+                    for i in range(4):
+                        view_task_buffer.grab_latest()
+                        self.assertLessEqual(view_task_buffer.buffer_bytes, frame_bytes * 2)
+                    time.sleep(0.5)
+                    self.assertLessEqual(view_task_buffer.buffer_bytes, frame_bytes * 2)
+                    earliest = view_task_buffer.grab_earliest()
+                    latest = view_task_buffer.grab_latest()
+                    self.assertLess(earliest[0].metadata["hardware_source"]["frame_index"], latest[0].metadata["hardware_source"]["frame_index"])
+                finally:
+                    hardware_source.abort_playing(sync_timeout=3.0)
+                    view_task_buffer.stop()
+
+    def test_start_recording_with_sync_timeout_returns_when_task_starts_rather_than_after_first_frame(self):
+        with self.__simple_test_context() as simple_test_context:
+            hardware_source = simple_test_context.hardware_source
+            hardware_source.sleep = 0.5
+            recording_task = hardware_source.start_recording(sync_timeout=3.0)
+            try:
+                self.assertTrue(recording_task.is_started)
+                self.assertFalse(recording_task.is_finished)
+            finally:
+                recording_task.wait_finished(timeout=3.0)
+            self.assertTrue(recording_task.is_finished)
+            hardware_source.stop_recording(sync_timeout=3.0)
+            self.assertFalse(hardware_source.is_recording)
+
+    def test_stop_playing_with_sync_timeout_returns_with_task_removed(self):
+        with self.__simple_test_context() as simple_test_context:
+            hardware_source = simple_test_context.hardware_source
+            hardware_source.start_playing(sync_timeout=3.0)
+            self.assertTrue(hardware_source.is_playing)
+            hardware_source.get_next_xdatas_to_finish()
+            hardware_source.stop_playing(sync_timeout=3.0)
+            self.assertFalse(hardware_source.is_playing)
+            self.assertFalse(hardware_source.is_task_running('view'))
+
+    def test_wait_for_task_state_waits_until_timeout(self):
+        with self.__simple_test_context() as simple_test_context:
+            hardware_source = simple_test_context.hardware_source
+            hardware_source._wait_for_task_state(lambda: True, 0.0)
+            start = time.perf_counter()
+            with self.assertRaises(AssertionError):
+                hardware_source._wait_for_task_state(lambda: False, 0.2)
+            self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+
+    def test_max_fps_frame_rate_policy_skips_frames_during_view(self):
+        with self.__simple_test_context() as simple_test_context:
+            hardware_source = simple_test_context.hardware_source
+            hardware_source.set_frame_rate_policy(HardwareSource.FrameRatePolicy.MAX_FPS, 10.0)
+            hardware_source.start_playing(sync_timeout=3.0)
+            try:
+                time.sleep(0.5)
+            finally:
+                hardware_source.abort_playing(sync_timeout=3.0)
+            frame_rate_statistics = hardware_source.get_frame_rate_statistics()
+            self.assertGreater(frame_rate_statistics.published_count, 0)
+            self.assertLessEqual(frame_rate_statistics.published_count, 8)
+            self.assertGreater(frame_rate_statistics.skipped_count, frame_rate_statistics.published_count)
+            self.assertEqual(frame_rate_statistics.acquired_count, frame_rate_statistics.published_count + frame_rate_statistics.skipped_count)
+            self.assertGreater(frame_rate_statistics.average_processing_time, 0.0)
+
+    def test_unlimited_frame_rate_policy_publishes_every_frame(self):
+        with self.__simple_test_context() as simple_test_context:
+            hardware_source = simple_test_context.hardware_source
+            hardware_source.set_frame_rate_policy(HardwareSource.FrameRatePolicy.MATCH_DISPLAY)
+            hardware_source.set_frame_rate_policy(HardwareSource.FrameRatePolicy.UNLIMITED)
+            hardware_source.start_playing(sync_timeout=3.0)
+            try:
+                for i in range(4):
+                    hardware_source.get_next_xdatas_to_finish()
+                frame_rate_statistics = hardware_source.get_frame_rate_statistics()
+            finally:
+                hardware_source.abort_playing(sync_timeout=3.0)
+            self.assertGreaterEqual(frame_rate_statistics.published_count, 4)
+            self.assertEqual(0, frame_rate_statistics.skipped_count)
+
+    def test_max_fps_frame_rate_policy_requires_positive_max_fps(self):
+        with self.__simple_test_context() as simple_test_context:
+            hardware_source = simple_test_context.hardware_source
+            with self.assertRaises(ValueError):
+                hardware_source.set_frame_rate_policy(HardwareSource.FrameRatePolicy.MAX_FPS)
+            self.assertEqual(HardwareSource.FrameRatePolicy.UNLIMITED, hardware_source.frame_rate_policy)
+
     def test_standard_data_element_constructs_metadata_with_hardware_source_as_dict(self):
         data_element = ScanAcquisitionTask(False, 0).make_data_element()
         data_item = ImportExportManager.create_data_item_from_data_element(data_element)
@@ -1131,6 +1375,67 @@ class TestHardwareSourceClass(unittest.TestCase):
             finally:
                 hardware_source.abort_playing(sync_timeout=3.0)
 
+    def test_leased_data_generator_shares_read_only_frames_until_released(self):
+        with self.__scan_test_context() as scan_test_context:
+            hardware_source = scan_test_context.hardware_source
+            snapshots = list()
+
+            def data_channel_updated(data_channel_event_args, data_and_metadata):
+                if data_channel_event_args.state == "complete":
+                    snapshots.append(data_channel_event_args.get_data_and_metadata_snapshot())
+
+            with contextlib.closing(hardware_source.data_channel_updated_event.listen(data_channel_updated)):
+                hardware_source.start_playing()
+                try:
+                    with HardwareSource.get_leased_data_generator_by_id(hardware_source.hardware_source_id) as data_generator:
+                        with data_generator() as lease:
+                            # the scan data is owned by the data channel, so the lease shares its snapshot without copying.
+                            self.assertTrue(any(lease.data_and_metadata is snapshot for snapshot in snapshots))
+                            self.assertFalse(lease.data.flags.writeable)
+                            kept = lease.keep()
+                            self.assertTrue(kept.data.flags.writeable)
+                            self.assertTrue(numpy.array_equal(kept.data, lease.data))
+                            # later frames do not change the leased frame.
+                            next_lease = data_generator()
+                            self.assertTrue(numpy.array_equal(kept.data, lease.data))
+                            next_lease.release()
+                        self.assertTrue(lease.is_released)
+                        with self.assertRaises(RuntimeError):
+                            lease.data
+                finally:
+                    hardware_source.abort_playing(sync_timeout=3.0)
+
+    def test_leased_data_generator_copies_producer_frames_into_ring_and_refuses_when_ring_is_full(self):
+        with self.__simple_test_context() as simple_test_context:
+            hardware_source = simple_test_context.hardware_source
+            hardware_source.start_playing()
+            try:
+                with HardwareSource.get_leased_data_generator_by_id(hardware_source.hardware_source_id, ring_size=2) as data_generator:
+                    lease1 = data_generator()
+                    lease2 = data_generator()
+                    # the leased frames are read-only copies in the ring and the producer data is unchanged.
+                    data1 = lease1.data
+                    self.assertFalse(numpy.shares_memory(data1, hardware_source.image))
+                    self.assertFalse(numpy.shares_memory(data1, lease2.data))
+                    self.assertFalse(data1.flags.writeable)
+                    self.assertTrue(hardware_source.image.flags.writeable)
+                    # a buffer still leased is never reused.
+                    kept1 = lease1.keep()
+                    with self.assertRaises(RuntimeError):
+                        data_generator()
+                    self.assertFalse(lease1.is_released)
+                    self.assertFalse(lease2.is_released)
+                    self.assertTrue(numpy.array_equal(kept1.data, data1))
+                    # the buffer of a released lease is reused for the next frame without allocating.
+                    lease1.release()
+                    lease3 = data_generator()
+                    self.assertTrue(numpy.shares_memory(data1, lease3.data))
+                    self.assertFalse(numpy.shares_memory(lease2.data, lease3.data))
+                self.assertTrue(lease2.is_released)
+                self.assertTrue(lease3.is_released)
+            finally:
+                hardware_source.abort_playing(sync_timeout=3.0)
+
     def test_hardware_source_api_data_item_setup(self):
         with self.__simple_test_context() as simple_test_context:
             _hardware_source = simple_test_context.hardware_source
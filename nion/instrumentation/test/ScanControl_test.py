@@ -16,7 +16,12 @@ import uuid
 import numpy
 
 from nion.data import Calibration
+from nion.data import DataAndMetadata
+from nion.device_kit import ScanDevice
+from nion.instrumentation import Acquisition
 from nion.instrumentation import AcquisitionPreferences
+from nion.instrumentation import HardwareSource
+from nion.instrumentation import scan_base
 from nion.instrumentation import stem_controller
 from nion.instrumentation.test import AcquisitionTestContext
 from nion.instrumentation.test import HardwareSource_test
@@ -385,6 +390,241 @@ class TestScanControlClass(unittest.TestCase):
                 self.assertEqual((256, 256), metadata_source.metadata["scan"]["scan_context_size"])
                 self.assertEqual((256, 256), metadata_source.metadata["scan"]["scan_size"])
 
+    def test_scan_acquisition_task_listens_to_instrument_only_while_acquiring(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            property_changed_event = scan_hardware_source.stem_controller.property_changed_event
+            listener_count = property_changed_event.listener_count
+            # a task which is created but never started does not listen.
+            scan_hardware_source._create_acquisition_view_task()
+            self.assertEqual(listener_count, property_changed_event.listener_count)
+            scan_hardware_source.start_playing()
+            try:
+                scan_hardware_source.get_next_xdatas_to_finish()
+                self.assertEqual(listener_count + 1, property_changed_event.listener_count)
+            finally:
+                scan_hardware_source.stop_playing(sync_timeout=3.0)
+            self.assertEqual(listener_count, property_changed_event.listener_count)
+
+    def test_scan_instrument_metadata_is_captured_per_frame_and_updated_on_property_change(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            stem_controller = scan_hardware_source.stem_controller
+            scan_hardware_source.set_channel_enabled(0, True)
+            scan_hardware_source.set_channel_enabled(1, True)
+            frame_parameters = scan_hardware_source.get_current_frame_parameters()
+            frame_parameters.size = Geometry.IntSize(64, 64)
+            frame_parameters.pixel_time_us = 20
+            scan_hardware_source.set_current_frame_parameters(frame_parameters)
+            get_autostem_properties = stem_controller.get_autostem_properties
+            query_count_ref = [0]
+            def counting_get_autostem_properties():
+                query_count_ref[0] += 1
+                return get_autostem_properties()
+            stem_controller.get_autostem_properties = counting_get_autostem_properties
+            read_partial = scan_hardware_source.scan_device.read_partial
+            read_count_ref = [0]
+            def counting_read_partial(*args, **kwargs):
+                read_count_ref[0] += 1
+                return read_partial(*args, **kwargs)
+            scan_hardware_source.scan_device.read_partial = counting_read_partial
+            try:
+                scan_hardware_source.start_playing()
+                scan_hardware_source.get_next_xdatas_to_finish()
+                # a frame is read in several partial reads but the instrument is queried once per frame, not per read or channel.
+                self.assertLess(query_count_ref[0], read_count_ref[0])
+                stem_controller.voltage = 150000
+                xdatas = scan_hardware_source.get_next_xdatas_to_start()
+                xdatas = scan_hardware_source.get_next_xdatas_to_finish()
+                for xdata in xdatas:
+                    self.assertEqual(150000, xdata.metadata["instrument"]["high_tension"])
+            finally:
+                scan_hardware_source.stop_playing()
+                del stem_controller.get_autostem_properties
+                del scan_hardware_source.scan_device.read_partial
+
+    def test_scan_instrument_metadata_is_not_cached_when_property_changes_while_reading(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            stem_controller = scan_hardware_source.stem_controller
+            frame_parameters = scan_hardware_source.get_current_frame_parameters()
+            frame_parameters.size = Geometry.IntSize(128, 128)
+            frame_parameters.pixel_time_us = 20
+            scan_hardware_source.set_current_frame_parameters(frame_parameters)
+            get_autostem_properties = stem_controller.get_autostem_properties
+            def changing_get_autostem_properties():
+                # the property changes after the instrument was read but before the read metadata is cached.
+                autostem_properties = get_autostem_properties()
+                if stem_controller.voltage != 150000:
+                    stem_controller.voltage = 150000
+                return autostem_properties
+            stem_controller.get_autostem_properties = changing_get_autostem_properties
+            try:
+                scan_hardware_source.start_playing()
+                xdatas = scan_hardware_source.get_next_xdatas_to_finish()
+                self.assertEqual(150000, xdatas[0].metadata["instrument"]["high_tension"])
+            finally:
+                scan_hardware_source.stop_playing()
+                del stem_controller.get_autostem_properties
+
+    def test_completed_scan_frame_copies_only_unread_rows(self):
+        # a completed frame reports only the rows not already passed to the data channels in partial reads.
+        self.assertEqual(((40, 0), (24, 64)), scan_base.get_unread_sub_area(((0, 0), (64, 64)), 40 * 64))
+        self.assertEqual(((0, 0), (64, 64)), scan_base.get_unread_sub_area(((0, 0), (64, 64)), 0))
+        self.assertEqual(((0, 0), (64, 64)), scan_base.get_unread_sub_area(((0, 0), (64, 64)), 64 * 64))
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            frame_parameters = scan_hardware_source.get_current_frame_parameters()
+            frame_parameters.size = Geometry.IntSize(64, 64)
+            frame_parameters.pixel_time_us = 20
+            scan_hardware_source.set_current_frame_parameters(frame_parameters)
+            update = HardwareSource.DataChannel.update
+            complete_sub_areas = list()
+            def recording_update(data_channel, data_and_metadata, state, data_shape, dest_sub_area, sub_area, view_id, **kwargs):
+                if state == "complete":
+                    complete_sub_areas.append(sub_area)
+                update(data_channel, data_and_metadata, state, data_shape, dest_sub_area, sub_area, view_id, **kwargs)
+            HardwareSource.DataChannel.update = recording_update
+            scan_hardware_source.start_playing()
+            try:
+                xdata = scan_hardware_source.get_next_xdatas_to_finish()[0]
+                # the frame takes several reads, so the final update copies only the remaining rows.
+                self.assertLess(0, complete_sub_areas[0][0][0])
+                # the channel data assembled from the partial reads matches the complete frame from the device.
+                device_frames = scan_hardware_source.scan_device.get_buffer_data(-4, 4)
+                self.assertTrue(any(numpy.array_equal(device_frame[0]["data"], xdata.data) for device_frame in device_frames))
+            finally:
+                scan_hardware_source.stop_playing()
+                HardwareSource.DataChannel.update = update
+
+    def test_scan_poll_period_scales_with_scan_rate(self):
+        frame_parameters = scan_base.ScanFrameParameters()
+        # small fast scans are read once per frame.
+        frame_parameters.pixel_size = Geometry.IntSize(32, 32)
+        frame_parameters.pixel_time_us = 4
+        self.assertAlmostEqual(32 * 32 * 4 / 1E6, scan_base.calculate_scan_poll_period(frame_parameters))
+        # typical scans are read at the display rate.
+        frame_parameters.pixel_size = Geometry.IntSize(512, 512)
+        frame_parameters.pixel_time_us = 2
+        self.assertAlmostEqual(scan_base.SCAN_POLL_PERIOD_DISPLAY, scan_base.calculate_scan_poll_period(frame_parameters))
+        # slow scans are read once per line, up to a limit.
+        frame_parameters.pixel_time_us = 200
+        self.assertAlmostEqual(512 * 200 / 1E6, scan_base.calculate_scan_poll_period(frame_parameters))
+        frame_parameters.pixel_time_us = 2000
+        self.assertAlmostEqual(scan_base.SCAN_POLL_PERIOD_MAX, scan_base.calculate_scan_poll_period(frame_parameters))
+        # tiny scans do not busy wait.
+        frame_parameters.pixel_size = Geometry.IntSize(4, 4)
+        frame_parameters.pixel_time_us = 1
+        self.assertAlmostEqual(scan_base.SCAN_POLL_PERIOD_MIN, scan_base.calculate_scan_poll_period(frame_parameters))
+
+    def test_scan_device_generates_only_scanned_rows(self):
+        with self._test_context() as test_context:
+            scan_device = test_context.scan_hardware_source.scan_device
+            scan_device.set_channel_enabled(0, True)
+            scan_device.set_channel_enabled(1, True)
+            frame_parameters = scan_device.current_frame_parameters
+            frame_parameters.pixel_size = Geometry.IntSize(1024, 1024)
+            frame_parameters.pixel_time_us = 2
+            scan_device.set_frame_parameters(frame_parameters)
+            get_scan_data_rows = scan_device.get_scan_data_rows
+            generated_rows_ref = [0]
+            def counting_get_scan_data_rows(frame_parameters, channel, row_start, row_stop):
+                generated_rows_ref[0] += row_stop - row_start
+                return get_scan_data_rows(frame_parameters, channel, row_start, row_stop)
+            scan_device.get_scan_data_rows = counting_get_scan_data_rows
+            try:
+                frame_number = scan_device.start_frame(False)
+                data_elements, complete, bad_frame, sub_area, frame_number, pixels_to_skip = scan_device.read_partial(frame_number, 0)
+                data_elements, complete, bad_frame, sub_area, frame_number, pixels_to_skip = scan_device.read_partial(frame_number, pixels_to_skip)
+                scan_device.cancel()
+                self.assertFalse(complete)
+                valid_rows = sub_area[0][0] + sub_area[1][0]
+                self.assertLess(0, valid_rows)
+                for data_element in data_elements:
+                    self.assertTrue(numpy.all(data_element["data"][:valid_rows] != 0.0))
+                # each channel generates only the rows scanned so far, plus at most one partially scanned row.
+                self.assertLessEqual(generated_rows_ref[0], 2 * (valid_rows + 1))
+                self.assertLess(generated_rows_ref[0], 2 * 1024)
+            finally:
+                scan_device.read_partial(frame_number, pixels_to_skip)
+                del scan_device.get_scan_data_rows
+
+    def test_scan_acquisition_wakes_when_device_signals_data_available(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            frame_parameters = scan_hardware_source.get_current_frame_parameters()
+            frame_parameters.size = Geometry.IntSize(16, 16)
+            frame_parameters.pixel_time_us = 100
+            scan_hardware_source.set_current_frame_parameters(frame_parameters)
+            calculate_scan_poll_period = scan_base.calculate_scan_poll_period
+            # a poll period much longer than the frame; only the device notification can deliver frames quickly.
+            scan_base.calculate_scan_poll_period = lambda frame_parameters: 5.0
+            try:
+                start_time = time.perf_counter()
+                scan_hardware_source.start_playing()
+                try:
+                    scan_hardware_source.get_next_xdatas_to_finish()
+                    scan_hardware_source.get_next_xdatas_to_finish()
+                finally:
+                    scan_hardware_source.stop_playing(sync_timeout=3.0)
+                self.assertLess(time.perf_counter() - start_time, 2.5)
+            finally:
+                scan_base.calculate_scan_poll_period = calculate_scan_poll_period
+
+    def test_scan_device_signals_end_of_each_frame_from_one_thread(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            scan_device = scan_hardware_source.scan_device
+            frame_parameters = scan_hardware_source.get_current_frame_parameters()
+            frame_parameters.size = Geometry.IntSize(16, 16)
+            frame_parameters.pixel_time_us = 100
+            scan_hardware_source.set_current_frame_parameters(frame_parameters)
+            read_partial = scan_device.read_partial
+            reading_threads = set()
+            signaling_threads = set()
+            def recording_read_partial(*args, **kwargs):
+                reading_threads.add(threading.current_thread())
+                return read_partial(*args, **kwargs)
+            scan_device.read_partial = recording_read_partial
+            try:
+                scan_hardware_source.start_playing()
+                try:
+                    scan_hardware_source.get_next_xdatas_to_finish()
+                    on_data_available = scan_device.on_data_available
+                    def recording_on_data_available():
+                        signaling_threads.add(threading.current_thread())
+                        on_data_available()
+                    scan_device.on_data_available = recording_on_data_available
+                    for i in range(4):
+                        scan_hardware_source.get_next_xdatas_to_finish()
+                finally:
+                    scan_hardware_source.stop_playing(sync_timeout=3.0)
+            finally:
+                del scan_device.read_partial
+            # the end of each frame is signaled from a single long-lived thread rather than a new thread per frame.
+            self.assertEqual(1, len(signaling_threads - reading_threads))
+
+    def test_scan_acquisition_reads_device_without_data_available_signal(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            scan_device = scan_hardware_source.scan_device
+            frame_parameters = scan_hardware_source.get_current_frame_parameters()
+            frame_parameters.size = Geometry.IntSize(16, 16)
+            frame_parameters.pixel_time_us = 100
+            scan_hardware_source.set_current_frame_parameters(frame_parameters)
+            # the device does not define the optional on_data_available attribute.
+            del scan_device.on_data_available
+            try:
+                scan_hardware_source.start_playing()
+                try:
+                    scan_hardware_source.get_next_xdatas_to_finish()
+                    scan_hardware_source.get_next_xdatas_to_finish()
+                finally:
+                    scan_hardware_source.stop_playing(sync_timeout=3.0)
+                self.assertFalse(hasattr(scan_device, "on_data_available"))
+            finally:
+                scan_device.on_data_available = None
+
     def test_sub_scan_attaches_required_metadata(self):
         with self._test_context() as test_context:
             document_controller = test_context.document_controller
@@ -647,6 +887,141 @@ class TestScanControlClass(unittest.TestCase):
             finally:
                 scan_hardware_source.finish_sequence_mode()
 
+    def test_scan_sequence_buffer_applies_overflow_policy(self):
+        def make_frame(value: float) -> typing.List[typing.Dict[str, typing.Any]]:
+            return [{"data": numpy.full((4, 4), value, dtype=numpy.float32)}]  # 64 bytes
+        cancel_event = threading.Event()
+        # drop oldest keeps the newest frames and acquires replacements for dropped ones.
+        sequence_buffer = ScanDevice.SequenceBuffer()
+        sequence_buffer.set_limits(128, scan_base.SequenceBufferOverflowPolicy.DROP_OLDEST)
+        sequence_buffer.reset(3)
+        for i in range(4):
+            sequence_buffer.append(make_frame(i), cancel_event)
+        self.assertEqual(2, sequence_buffer.count)
+        self.assertEqual(2, sequence_buffer.statistics.dropped_count)
+        self.assertEqual(128, sequence_buffer.statistics.max_byte_count)
+        self.assertEqual(2.0, sequence_buffer.pop()[0]["data"][0, 0])
+        self.assertEqual(3.0, sequence_buffer.pop()[0]["data"][0, 0])
+        # one more frame is accepted to make up for the dropped frames.
+        sequence_buffer.append(make_frame(4), cancel_event)
+        sequence_buffer.append(make_frame(5), cancel_event)
+        self.assertEqual(1, sequence_buffer.count)
+        # error rejects the new frame and reports the overflow.
+        sequence_buffer.set_limits(128, scan_base.SequenceBufferOverflowPolicy.ERROR)
+        sequence_buffer.reset(3)
+        for i in range(3):
+            sequence_buffer.append(make_frame(i), cancel_event)
+        self.assertEqual(2, sequence_buffer.count)
+        self.assertTrue(sequence_buffer.statistics.overflow_error)
+        # block waits for the consumer to pop a frame.
+        sequence_buffer.set_limits(128, scan_base.SequenceBufferOverflowPolicy.BLOCK)
+        sequence_buffer.reset(3)
+        sequence_buffer.append(make_frame(0), cancel_event)
+        sequence_buffer.append(make_frame(1), cancel_event)
+        timer = threading.Timer(0.1, sequence_buffer.pop)
+        timer.start()
+        sequence_buffer.append(make_frame(2), cancel_event)
+        timer.join()
+        self.assertEqual(2, sequence_buffer.count)
+        self.assertLess(0.0, sequence_buffer.statistics.blocked_time)
+        self.assertEqual(0, sequence_buffer.statistics.dropped_count)
+        # an unbounded buffer never blocks, even with the block policy.
+        sequence_buffer.set_limits(None, scan_base.SequenceBufferOverflowPolicy.BLOCK)
+        sequence_buffer.reset(8)
+        for i in range(8):
+            sequence_buffer.append(make_frame(i), cancel_event)
+        self.assertEqual(8, sequence_buffer.count)
+        self.assertEqual(0.0, sequence_buffer.statistics.blocked_time)
+
+    def test_scan_sequence_mode_limits_buffered_bytes(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            frame_parameters = scan_hardware_source.get_frame_parameters(0)
+            frame_parameters.size = Geometry.IntSize(16, 16)
+            frame_bytes = 16 * 16 * 4
+            scan_hardware_source.prepare_sequence_mode(frame_parameters, 4, max_bytes=2 * frame_bytes,
+                                                       overflow_policy=scan_base.SequenceBufferOverflowPolicy.DROP_OLDEST)
+            scan_hardware_source.start_sequence_mode(frame_parameters, 4)
+            try:
+                start_time = time.time()
+                while scan_hardware_source.get_sequence_buffer_statistics().dropped_count == 0:
+                    time.sleep(0.01)
+                    self.assertLess(time.time() - start_time, 3.0)
+                statistics = scan_hardware_source.get_sequence_buffer_statistics()
+                self.assertGreaterEqual(2 * frame_bytes, statistics.max_byte_count)
+                self.assertGreaterEqual(2, scan_hardware_source.get_sequence_buffer_count())
+            finally:
+                scan_hardware_source.finish_sequence_mode()
+                scan_hardware_source.stop_playing(sync_timeout=3.0)
+
+    def test_scan_frame_sequence_stream_sends_buffered_frames_as_one_packet(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            frame_parameters = scan_hardware_source.get_frame_parameters(0)
+            frame_parameters.size = Geometry.IntSize(16, 16)
+            scan_id = uuid.uuid4()
+            data_stream = scan_base.ScanFrameSequenceDataStream(scan_hardware_source, frame_parameters, scan_id, 3)
+            scan_hardware_source.prepare_sequence_mode(frame_parameters, 3)
+            scan_hardware_source.start_sequence_mode(frame_parameters, 3)
+            try:
+                start_time = time.time()
+                while scan_hardware_source.get_sequence_buffer_count() < 3:
+                    time.sleep(0.01)
+                    self.assertLess(time.time() - start_time, 3.0)
+                data_stream_events = data_stream._get_raw_data_stream_events()
+                self.assertEqual(1, len(data_stream_events))
+                data_stream_event = data_stream_events[0][1]
+                self.assertEqual(3, data_stream_event.count)
+                self.assertEqual((3, 16, 16), data_stream_event.source_data.shape)
+                self.assertTrue(data_stream_event.source_data.flags.c_contiguous)
+                self.assertEqual(slice(0, 3), data_stream_event.source_slice[0])
+                self.assertEqual(0, scan_hardware_source.get_sequence_buffer_count())
+            finally:
+                scan_hardware_source.finish_sequence_mode()
+                scan_hardware_source.stop_playing(sync_timeout=3.0)
+
+    def test_scan_data_stream_delivers_all_rows_in_sections(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            frame_parameters = scan_hardware_source.get_frame_parameters(0)
+            frame_parameters.size = Geometry.IntSize(16, 16)
+            scan_data_stream = scan_base.ScanDataStream(scan_hardware_source, frame_parameters, uuid.uuid4())
+            channel = scan_data_stream.channels[0]
+            collector = Acquisition.CollectedDataStream(scan_data_stream, (16, 16), [Calibration.Calibration(), Calibration.Calibration()])
+            sequencer = Acquisition.SequenceDataStream(collector, 2)
+            maker = Acquisition.MakerDataStream(sequencer)
+            Acquisition.acquire(maker)
+            data = maker.get_data(channel).data
+            self.assertEqual((2, 16, 16), data.shape)
+            # every row of both frames must have been delivered.
+            self.assertTrue(numpy.all(numpy.any(data != 0, axis=-1)))
+
+    def test_scan_frame_data_stream_with_coalesced_channels_splits_channels_when_framed(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            scan_hardware_source.set_channel_enabled(0, True)
+            scan_hardware_source.set_channel_enabled(1, True)
+            frame_parameters = scan_hardware_source.get_frame_parameters(0)
+            frame_parameters.size = Geometry.IntSize(16, 16)
+            scan_data_stream = scan_base.ScanDataStream(scan_hardware_source, frame_parameters, uuid.uuid4(), coalesce_channels=True)
+            self.assertEqual(1, len(scan_data_stream.channels))
+            self.assertEqual(2, len(scan_data_stream.scan_channels))
+            latest_xdatas = dict()
+            def data_channel_updated(data_channel_event_args, xdata):
+                latest_xdatas[scan_hardware_source.get_channel_index(data_channel_event_args.channel_id)] = xdata
+            with contextlib.closing(scan_hardware_source.data_channel_updated_event.listen(data_channel_updated)):
+                scan_frame_data_stream = scan_base.ScanFrameDataStream(scan_hardware_source, frame_parameters, coalesce_channels=True)
+                maker = Acquisition.MakerDataStream(scan_frame_data_stream)
+                Acquisition.acquire(maker)
+            self.assertEqual(2, len(scan_frame_data_stream.channels))
+            for channel_index, channel in enumerate(scan_frame_data_stream.channels):
+                xdata = maker.get_data(channel)
+                self.assertEqual((16, 16), xdata.data_shape)
+                self.assertEqual(numpy.float32, xdata.data_dtype)
+                self.assertEqual(DataAndMetadata.DataDescriptor(False, 0, 2), xdata.data_descriptor)
+                self.assertTrue(numpy.array_equal(latest_xdatas[channel_index].data, xdata.data))
+            self.assertFalse(numpy.array_equal(latest_xdatas[0].data, latest_xdatas[1].data))
+
     def test_capturing_during_view_captures_new_data_items(self):
         with self._test_context() as test_context:
             document_controller = test_context.document_controller
@@ -1243,6 +1618,43 @@ class TestScanControlClass(unittest.TestCase):
             scan_hardware_source.stop_playing(sync_timeout=3.0)
             ScanControlPanel.stop()
 
+    def test_moving_subscan_updates_only_subscan_geometry(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            scan_device = scan_hardware_source.scan_device
+            scan_hardware_source.subscan_enabled = True
+            scan_hardware_source.subscan_region = Geometry.FloatRect.from_tlhw(0.25, 0.25, 0.5, 0.5)
+            subscan_pixel_size = scan_hardware_source.get_current_frame_parameters().subscan_pixel_size
+            set_frame_parameters = scan_device.set_frame_parameters
+            set_subscan_geometry = scan_device.set_subscan_geometry
+            set_frame_parameters_count_ref = [0]
+            set_subscan_geometry_count_ref = [0]
+            def counting_set_frame_parameters(frame_parameters):
+                set_frame_parameters_count_ref[0] += 1
+                set_frame_parameters(frame_parameters)
+            def counting_set_subscan_geometry(frame_parameters):
+                set_subscan_geometry_count_ref[0] += 1
+                set_subscan_geometry(frame_parameters)
+            scan_device.set_frame_parameters = counting_set_frame_parameters
+            scan_device.set_subscan_geometry = counting_set_subscan_geometry
+            try:
+                # moving the subscan keeps its pixel size, so only the subscan geometry is passed to the device.
+                scan_hardware_source.subscan_region = Geometry.FloatRect.from_tlhw(0.3, 0.2, 0.5, 0.5)
+                frame_parameters = scan_hardware_source.get_current_frame_parameters()
+                self.assertEqual(subscan_pixel_size, frame_parameters.subscan_pixel_size)
+                self.assertAlmostEqual(0.55, frame_parameters.subscan_fractional_center.y)
+                self.assertAlmostEqual(0.45, frame_parameters.subscan_fractional_center.x)
+                self.assertEqual(0, set_frame_parameters_count_ref[0])
+                self.assertEqual(1, set_subscan_geometry_count_ref[0])
+                # resizing the subscan changes its pixel size, so the device is set up again.
+                scan_hardware_source.subscan_region = Geometry.FloatRect.from_tlhw(0.3, 0.2, 0.25, 0.25)
+                self.assertNotEqual(subscan_pixel_size, scan_hardware_source.get_current_frame_parameters().subscan_pixel_size)
+                self.assertEqual(1, set_frame_parameters_count_ref[0])
+                self.assertEqual(1, set_subscan_geometry_count_ref[0])
+            finally:
+                del scan_device.set_frame_parameters
+                del scan_device.set_subscan_geometry
+
     def test_subscan_state_goes_from_invalid_to_disabled_upon_first_acquisition(self):
         with self._test_context() as test_context:
             document_controller = test_context.document_controller
@@ -1782,6 +2194,114 @@ class TestScanControlClass(unittest.TestCase):
             self.assertAlmostEqual(document_model.data_items[0].dimensional_calibrations[0].scale, xdata.dimensional_calibrations[1].scale * 2)
             self.assertEqual(document_model.data_items[0].dimensional_calibrations[0].units, xdata.dimensional_calibrations[1].units)
 
+    def test_record_immediate_into_streams_rows_into_destination(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            frame_parameters = copy.copy(scan_hardware_source.get_current_frame_parameters())
+            frame_parameters.pixel_size = Geometry.IntSize(128, 128)
+            frame_parameters.pixel_time_us = 20
+            destination = numpy.zeros((128, 128), dtype=numpy.float32)
+            progress = list()
+            valid_rows = scan_hardware_source.record_immediate_into(frame_parameters, {0: destination}, progress_fn=progress.append)
+            self.assertEqual(128, valid_rows)
+            self.assertGreater(len(progress), 1)
+            self.assertEqual(sorted(progress), progress)
+            self.assertEqual(128, progress[-1])
+            self.assertTrue(numpy.all(numpy.any(destination != 0, axis=1)))
+            # the data channel uses the destination directly, so a later view must not write into it.
+            destination_copy = numpy.copy(destination)
+            scan_hardware_source.start_playing(sync_timeout=3.0)
+            try:
+                scan_hardware_source.get_next_xdatas_to_finish()
+            finally:
+                scan_hardware_source.stop_playing(sync_timeout=3.0)
+            self.assertTrue(numpy.array_equal(destination_copy, destination))
+
+    def test_record_tasks_reuse_worker_threads_of_hardware_source(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            frame_parameters = copy.copy(scan_hardware_source.get_current_frame_parameters())
+            frame_parameters.pixel_size = Geometry.IntSize(16, 16)
+            record_thread_prefix = scan_hardware_source.hardware_source_id + "_record"
+            for i in range(4):
+                acquisition_parameters = HardwareSource.AcquisitionParameters(frame_parameters, scan_base.ScanAcquisitionTaskParameters(), 5.0)
+                record_task = HardwareSource.RecordTask(scan_hardware_source, acquisition_parameters)
+                xdatas = record_task.grab()
+                self.assertTrue(record_task.is_finished)
+                self.assertEqual((16, 16), xdatas[0].data.shape)
+            record_threads = [thread for thread in threading.enumerate() if thread.name.startswith(record_thread_prefix)]
+            self.assertLessEqual(1, len(record_threads))
+            self.assertGreaterEqual(2, len(record_threads))
+
+    def test_record_task_logs_and_raises_error_from_worker(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            frame_parameters = copy.copy(scan_hardware_source.get_current_frame_parameters())
+            frame_parameters.pixel_size = Geometry.IntSize(16, 16)
+            stop_recording = scan_hardware_source.stop_recording
+
+            def failing_stop_recording(*args, **kwargs):
+                stop_recording(*args, **kwargs)
+                raise RuntimeError("stop failed")
+
+            scan_hardware_source.stop_recording = failing_stop_recording
+            try:
+                with self.assertLogs(level=logging.WARNING) as log_context:
+                    acquisition_parameters = HardwareSource.AcquisitionParameters(frame_parameters, scan_base.ScanAcquisitionTaskParameters(), 5.0)
+                    record_task = HardwareSource.RecordTask(scan_hardware_source, acquisition_parameters)
+                    with self.assertRaises(RuntimeError):
+                        record_task.grab()
+                    # the error is logged when the worker finishes, which may be after grab returns.
+                    start_time = time.time()
+                    while not log_context.output and time.time() - start_time < 3.0:
+                        time.sleep(0.01)
+                self.assertIn("stop failed", "".join(log_context.output))
+            finally:
+                del scan_hardware_source.stop_recording
+
+    def test_record_immediate_into_keeps_valid_rows_when_canceled(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            frame_parameters = copy.copy(scan_hardware_source.get_current_frame_parameters())
+            frame_parameters.pixel_size = Geometry.IntSize(256, 256)
+            frame_parameters.pixel_time_us = 40
+            destination = numpy.zeros((256, 256), dtype=numpy.float32)
+            cancel_event = threading.Event()
+
+            def progress(rows: int) -> None:
+                cancel_event.set()
+
+            valid_rows = scan_hardware_source.record_immediate_into(frame_parameters, {0: destination}, progress_fn=progress, cancel_event=cancel_event)
+            self.assertLess(0, valid_rows)
+            self.assertLess(valid_rows, 256)
+            self.assertTrue(numpy.all(numpy.any(destination[:valid_rows] != 0, axis=1)))
+            self.assertFalse(numpy.any(destination[valid_rows:]))
+            self.assertFalse(scan_hardware_source.is_recording)
+
+    def test_record_immediate_into_restores_enabled_channels_when_wait_fails(self):
+        with self._test_context() as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            scan_hardware_source.set_channel_enabled(0, True)
+            scan_hardware_source.set_channel_enabled(1, True)
+            enabled_channels = scan_hardware_source.get_enabled_channel_indexes()
+            frame_parameters = copy.copy(scan_hardware_source.get_current_frame_parameters())
+            frame_parameters.pixel_size = Geometry.IntSize(16, 16)
+            destination = numpy.zeros((16, 16), dtype=numpy.float32)
+            wait_for_task_state = scan_hardware_source._wait_for_task_state
+
+            def failing_wait_for_task_state(predicate, timeout):
+                wait_for_task_state(predicate, timeout)
+                if timeout is not None:
+                    raise RuntimeError("timeout")
+
+            scan_hardware_source._wait_for_task_state = failing_wait_for_task_state
+            try:
+                with self.assertRaises(RuntimeError):
+                    scan_hardware_source.record_immediate_into(frame_parameters, {2: destination})
+            finally:
+                del scan_hardware_source._wait_for_task_state
+            self.assertEqual(enabled_channels, scan_hardware_source.get_enabled_channel_indexes())
+
     def test_get_buffer_data_basic_functionality(self):
         with self._test_context() as test_context:
             document_controller = test_context.document_controller
@@ -1,4 +1,5 @@
 import copy
+import datetime
 import math
 import numpy
 import threading
@@ -8,8 +9,12 @@ import uuid
 import tempfile
 import typing
 import pathlib
+import scipy.ndimage
 
+from nion.data import Calibration
 from nion.data import DataAndMetadata
+from nion.data import TemplateMatching
+from nion.data import xdata_1_0 as xd
 from nion.swift import Facade
 from nion.swift.model import ApplicationData
 from nion.swift.model import Metadata
@@ -176,6 +181,47 @@ class TestSynchronizedAcquisitionClass(unittest.TestCase):
             # check the acquisition state
             self.assertFalse(camera_hardware_source.camera._is_acquire_synchronized_running)
 
+    def test_synchronized_scan_data_stream_chooses_section_height_from_camera_overhead(self):
+        with self.__test_context(is_eels=True) as test_context:
+            scan_hardware_source = test_context.scan_hardware_source
+            camera_hardware_source = test_context.camera_hardware_source
+            scan_frame_parameters = scan_hardware_source.get_current_frame_parameters()
+            scan_frame_parameters.scan_id = uuid.uuid4()
+            scan_frame_parameters.size = Geometry.IntSize(8, 4)
+            camera_frame_parameters = camera_hardware_source.get_current_frame_parameters()
+            camera_frame_parameters.processing = "sum_project"
+            # teach the camera a section overhead of one second and no frame overhead.
+            exposure = camera_frame_parameters.exposure_ms / 1000
+            binning = camera_frame_parameters.binning
+            frame_shape = camera_hardware_source.get_expected_dimensions(camera_frame_parameters)
+            camera_hardware_source.overhead_model.add_start_measurement(binning, frame_shape, 1.0, is_first_section=False)
+            camera_hardware_source.overhead_model.add_frames_measurement(binning, frame_shape, exposure, 10, 10 * exposure)
+            # allow the overhead of a section to be two thirds of the time of a section of two rows.
+            max_section_overhead_fraction = 1.0 / (1.5 * exposure * 4)
+            self.assertEqual(2, camera_hardware_source.choose_section_height(camera_frame_parameters, Geometry.IntSize(h=8, w=4), max_section_overhead_fraction))
+
+            section_count_ref = [0]
+
+            class SectionCountingDataStream(Acquisition.ContainerDataStream):
+                def _prepare_stream(self, stream_args: Acquisition.DataStreamArgs, index_stack: Acquisition.IndexDescriptionList, **kwargs: typing.Any) -> None:
+                    section_count_ref[0] += 1
+                    super()._prepare_stream(stream_args, index_stack, **kwargs)
+
+            class SectionCountingFunctor(Acquisition.DataStreamFunctor):
+                def apply(self, data_stream: Acquisition.DataStream) -> Acquisition.DataStream:
+                    return SectionCountingDataStream(data_stream)
+
+            synchronized_scan_data_stream = scan_base.make_synchronized_scan_data_stream(
+                scan_hardware_source=scan_hardware_source,
+                scan_frame_parameters=scan_frame_parameters,
+                camera_hardware_source=camera_hardware_source,
+                camera_frame_parameters=camera_frame_parameters,
+                scan_data_stream_functor=SectionCountingFunctor(),
+                max_section_overhead_fraction=max_section_overhead_fraction)
+            Acquisition.acquire_immediate(synchronized_scan_data_stream)
+            synchronized_scan_data_stream = None
+            self.assertEqual(4, section_count_ref[0])
+
     def test_grab_synchronized_basic_eels_no_scan_data(self):
         def advance_pixel_filter(n: int) -> bool:
             return False
@@ -788,6 +834,93 @@ class TestSynchronizedAcquisitionClass(unittest.TestCase):
             # ensure graphic is still the original one and hasn't flickered with a replacement
             self.assertEqual(drift_graphic, display_item.graphics[-1])
 
+    def test_drift_tracker_with_max_history_length_keeps_recent_measurements(self):
+        def make_xdata(shift: int, timestamp: datetime.datetime) -> DataAndMetadata.DataAndMetadata:
+            y, x = numpy.mgrid[0:64, 0:64]
+            data = numpy.exp(-((y - 32) ** 2 + (x - 24 - shift) ** 2) / 32.0)
+            calibrations = [Calibration.Calibration(scale=1.0, units="nm"), Calibration.Calibration(scale=1.0, units="nm")]
+            return DataAndMetadata.new_data_and_metadata(data, dimensional_calibrations=calibrations, timestamp=timestamp)
+
+        drift_tracker = DriftTracker.DriftTracker()
+        bounded_drift_tracker = DriftTracker.DriftTracker(max_history_length=4)
+        try:
+            start_time = datetime.datetime(2000, 1, 1)
+            for i in range(40):
+                xdata = make_xdata(i % 8, start_time + datetime.timedelta(seconds=i))
+                drift_tracker.submit_image(xdata, 0.0, wait=True)
+                bounded_drift_tracker.submit_image(xdata, 0.0, wait=True)
+            self.assertEqual(39, drift_tracker.measurement_count)
+            self.assertEqual(39, bounded_drift_tracker.measurement_count)
+            self.assertEqual((4, 39), drift_tracker.drift_data_frame.shape)
+            self.assertEqual((4, 4), bounded_drift_tracker.drift_data_frame.shape)
+            self.assertTrue(numpy.allclose(drift_tracker.drift_data_frame[:, -4:], bounded_drift_tracker.drift_data_frame))
+            self.assertEqual(drift_tracker._last_entry_utc_time, bounded_drift_tracker._last_entry_utc_time)
+            self.assertAlmostEqual(drift_tracker.get_drift_rate(n=3).width, bounded_drift_tracker.get_drift_rate(n=3).width)
+            self.assertAlmostEqual(drift_tracker.total_delta_nm.width, bounded_drift_tracker.total_delta_nm.width)
+        finally:
+            drift_tracker.close()
+            bounded_drift_tracker.close()
+
+    def test_drift_tracker_measures_submitted_images_on_measurement_thread(self):
+        def make_xdata(shift: int, timestamp: datetime.datetime) -> DataAndMetadata.DataAndMetadata:
+            y, x = numpy.mgrid[0:64, 0:64]
+            data = numpy.exp(-((y - 32) ** 2 + (x - 24 - shift) ** 2) / 32.0)
+            calibrations = [Calibration.Calibration(scale=1.0, units="nm"), Calibration.Calibration(scale=1.0, units="nm")]
+            return DataAndMetadata.new_data_and_metadata(data, dimensional_calibrations=calibrations, timestamp=timestamp)
+
+        drift_tracker = DriftTracker.DriftTracker()
+        try:
+            start_time = datetime.datetime(2000, 1, 1)
+            for i in range(20):
+                drift_tracker.submit_image(make_xdata(i % 8, start_time + datetime.timedelta(seconds=i)), 0.0)
+            self.assertTrue(drift_tracker.wait_for_pending_measurement(10.0))
+            # every image after the reference is either measured or skipped; the last one is always measured.
+            self.assertEqual(19, drift_tracker.measurement_count + drift_tracker.skipped_measurement_count)
+            self.assertEqual(start_time + datetime.timedelta(seconds=19), drift_tracker._last_entry_utc_time)
+            self.assertIsNotNone(drift_tracker.last_measurement_time)
+        finally:
+            drift_tracker.close()
+
+    def test_drift_registration_reference_matches_register_template(self):
+        rng = numpy.random.default_rng(7)
+        data = scipy.ndimage.gaussian_filter(rng.random((64, 80)), 2.0)
+        reference_xdata = DataAndMetadata.new_data_and_metadata(data[8:56, 8:72])
+        registration_reference = DriftTracker._RegistrationReference(reference_xdata)
+        for dy, dx in ((0, 0), (2, -3), (-5, 4)):
+            xdata = DataAndMetadata.new_data_and_metadata(data[8 + dy:56 + dy, 8 + dx:72 + dx])
+            quality, offset = registration_reference.register(xdata)
+            expected_quality, expected_offset = xd.register_template(reference_xdata, xdata)
+            self.assertAlmostEqual(expected_quality, quality)
+            self.assertTrue(numpy.allclose(expected_offset, offset))
+
+    def test_binned_drift_registration_is_refined_at_full_resolution(self):
+        rng = numpy.random.default_rng(7)
+        data = scipy.ndimage.gaussian_filter(rng.random((72, 88)), 2.0)
+        # odd sizes do not fill the last bin, which must not shift the measured offset.
+        for height, width in ((48, 64), (47, 63)):
+            reference_xdata = DataAndMetadata.new_data_and_metadata(data[12:12 + height, 12:12 + width])
+            for binning in (2, 3, 4):
+                binned_registration_reference = DriftTracker._RegistrationReference(reference_xdata, binning)
+                for dy, dx in ((0, 0), (4, -7), (-5, 3), (7, 1)):
+                    xdata = DataAndMetadata.new_data_and_metadata(data[12 + dy:12 + dy + height, 12 + dx:12 + dx + width])
+                    quality, offset = binned_registration_reference.register(xdata)
+                    expected_quality, expected_offset = xd.register_template(reference_xdata, xdata)
+                    self.assertAlmostEqual(expected_quality, quality)
+                    self.assertTrue(numpy.allclose(expected_offset, offset))
+
+    def test_drift_normalized_correlation_matches_match_template(self):
+        rng = numpy.random.default_rng(3)
+        image = rng.random((40, 52))
+        correlation = DriftTracker._NormalizedCorrelation(image)
+        for template_shape in ((40, 52), (21, 30)):
+            template = rng.random(template_shape)
+            ccorr = correlation.correlate(template)
+            expected_ccorr = TemplateMatching.match_template(image, template)
+            self.assertTrue(numpy.allclose(expected_ccorr, ccorr))
+            for position in ((1, 1), (20, 26), (38, 50)):
+                expected_patch = expected_ccorr[position[0] - 1:position[0] + 2, position[1] - 1:position[1] + 2]
+                self.assertTrue(numpy.allclose(expected_patch, correlation.correlate_around(template, position)))
+
     def test_drift_corrector(self):
         # for this test, drift should be in a constant direction
         with self.__test_context() as test_context:
@@ -832,6 +965,129 @@ class TestSynchronizedAcquisitionClass(unittest.TestCase):
             self.assertTrue(1.9 < abs(last_delta_nm.width) < 2.1, f"{last_delta_nm=}")
             self.assertTrue(abs(last_delta_nm.height) < 0.1, f"{last_delta_nm=}")
 
+    def test_drift_corrector_measuring_asynchronously_records_measurement_latency(self):
+        with self.__test_context() as test_context:
+            document_controller = test_context.document_controller
+            scan_hardware_source = test_context.scan_hardware_source
+            test_context.instrument.sample_index = 2  # use CTS sample, custom position chosen using view mode in Swift
+            drift_tracker = scan_hardware_source.drift_tracker
+            self._acquire_one(document_controller, scan_hardware_source)
+            scan_hardware_source.drift_enabled = True
+            scan_hardware_source.drift_region = Geometry.FloatRect.from_center_and_size(Geometry.FloatPoint(0.6554, 0.2932), Geometry.FloatSize(0.15, 0.15))
+            document_controller.periodic()
+            scan_frame_parameters = scan_hardware_source.get_current_frame_parameters()
+            pending_drift_xdata: typing.List[DataAndMetadata.DataAndMetadata] = list()
+            drift_correction_behavior = DriftTracker.DriftCorrectionBehavior(
+                drift_tracker,
+                scan_hardware_source,
+                scan_frame_parameters,
+                0,
+                scan_hardware_source.drift_channel_id,
+                scan_hardware_source.drift_region,
+                scan_hardware_source.drift_rotation,
+                measure_asynchronously=True,
+                max_measurement_latencies=2
+            )
+            drift_correction_behavior.prepare_section(pending_drift_xdata)
+            drift_correction_behavior.prepare_section(pending_drift_xdata)
+            self.assertTrue(drift_tracker.wait_for_pending_measurement(10.0))
+            self.assertEqual(1, drift_tracker.measurement_count)
+            drift_correction_behavior.prepare_section(pending_drift_xdata)
+            self.assertTrue(drift_tracker.wait_for_pending_measurement(10.0))
+            self.assertEqual(2, drift_tracker.measurement_count)
+            self.assertEqual(3, len(pending_drift_xdata))
+            # the second section may or may not see its own measurement, but the third always sees a completed one.
+            self.assertIn(len(drift_correction_behavior.measurement_latencies), (1, 2))
+            self.assertTrue(all(latency >= 0.0 for latency in drift_correction_behavior.measurement_latencies))
+            # only the most recent latencies are kept.
+            drift_correction_behavior.prepare_section(pending_drift_xdata)
+            self.assertTrue(drift_tracker.wait_for_pending_measurement(10.0))
+            self.assertEqual(2, len(drift_correction_behavior.measurement_latencies))
+
+    def test_synchronized_acquisition_measures_drift_asynchronously_when_enabled_in_drift_settings(self):
+        with self.__test_context(is_eels=True) as test_context:
+            document_controller = test_context.document_controller
+            scan_hardware_source = test_context.scan_hardware_source
+            camera_hardware_source = test_context.camera_hardware_source
+            self._acquire_one(document_controller, scan_hardware_source)
+            scan_hardware_source.drift_enabled = True
+            scan_hardware_source.drift_region = Geometry.FloatRect.from_tlhw(0.25, 0.25, 0.5, 0.5)
+            scan_hardware_source.drift_settings = STEMControllerModule.DriftCorrectionSettings(2, STEMControllerModule.DriftIntervalUnit.LINE, measure_asynchronously=True)
+            document_controller.periodic()
+            drift_tracker = scan_hardware_source.drift_tracker
+            submitted_waits = list()
+            submit_image = drift_tracker.submit_image
+
+            def record_submit_image(xdata, rotation, *, wait=False):
+                submitted_waits.append(wait)
+                submit_image(xdata, rotation, wait=wait)
+
+            drift_tracker.submit_image = record_submit_image
+            try:
+                scan_frame_parameters = scan_hardware_source.get_current_frame_parameters()
+                scan_frame_parameters.scan_id = uuid.uuid4()
+                scan_frame_parameters.size = Geometry.IntSize(8, 4)
+                camera_frame_parameters = camera_hardware_source.get_current_frame_parameters()
+                camera_frame_parameters.processing = "sum_project"
+                acquisition_device = scan_base.SynchronizedScanAcquisitionDevice(scan_hardware_source, scan_frame_parameters,
+                                                                                 camera_hardware_source, camera_frame_parameters,
+                                                                                 None, False, 2, 0,
+                                                                                 scan_hardware_source.drift_channel_id,
+                                                                                 scan_hardware_source.drift_region,
+                                                                                 scan_hardware_source.drift_rotation)
+                data_stream = acquisition_device.build_acquisition_device_data_stream(dict())
+                # run the acquisition in a thread so that periodic can be called to update the drift graphic.
+                t = threading.Thread(target=Acquisition.acquire_immediate, args=(data_stream,))
+                t.start()
+                while t.is_alive():
+                    document_controller.periodic()
+                    time.sleep(1/200)
+                t.join()
+                data_stream = None
+                self.assertTrue(drift_tracker.wait_for_pending_measurement(10.0))
+            finally:
+                del drift_tracker.submit_image
+            self.assertLess(1, len(submitted_waits))
+            self.assertFalse(any(submitted_waits))
+
+    def test_drift_tracker_does_not_hold_lock_while_registering(self):
+        y, x = numpy.mgrid[0:64, 0:64]
+        calibrations = [Calibration.Calibration(scale=1.0, units="nm"), Calibration.Calibration(scale=1.0, units="nm")]
+        start_time = datetime.datetime(2000, 1, 1)
+
+        def make_xdata(shift: int, seconds: int) -> DataAndMetadata.DataAndMetadata:
+            data = numpy.exp(-((y - 32) ** 2 + (x - 24 - shift) ** 2) / 32.0)
+            return DataAndMetadata.new_data_and_metadata(data, dimensional_calibrations=calibrations, timestamp=start_time + datetime.timedelta(seconds=seconds))
+
+        registering_event = threading.Event()
+        register = DriftTracker._RegistrationReference.register
+
+        def slow_register(registration_reference, xdata):
+            registering_event.set()
+            time.sleep(0.5)
+            return register(registration_reference, xdata)
+
+        drift_tracker = DriftTracker.DriftTracker()
+        DriftTracker._RegistrationReference.register = slow_register
+        try:
+            drift_tracker.submit_image(make_xdata(0, 0), 0.0)
+            t = threading.Thread(target=drift_tracker.submit_image, args=(make_xdata(2, 1), 0.0), kwargs={"wait": True})
+            t.start()
+            self.assertTrue(registering_event.wait(3.0))
+            # reading the drift and submitting another image do not wait for the registration.
+            start = time.perf_counter()
+            self.assertIsNone(drift_tracker.last_measurement_time)
+            self.assertEqual(0, drift_tracker.measurement_count)
+            drift_tracker.submit_image(make_xdata(4, 2), 0.0)
+            self.assertLess(time.perf_counter() - start, 0.25)
+            t.join()
+            self.assertTrue(drift_tracker.wait_for_pending_measurement(10.0))
+        finally:
+            DriftTracker._RegistrationReference.register = register
+            drift_tracker.close()
+        self.assertEqual(2, drift_tracker.measurement_count)
+        self.assertAlmostEqual(4.0, abs(drift_tracker.last_delta_nm.width), places=1)
+
     def test_drift_corrector_with_drift_sub_area_rotation(self):
         # for this test, drift should be in a constant direction
         with self.__test_context() as test_context:
@@ -72,7 +72,9 @@ class ScanAcquisitionController:
         self.__scan_drift_logger: typing.Optional[DriftTracker.DriftLogger] = None
         self.acquisition_state_changed_event = Event.Event()
 
-    def start(self, processing: ScanAcquisitionProcessing, scan_processing: ScanProcessing, *, section_height_override: typing.Optional[int] = None) -> None:
+    def start(self, processing: ScanAcquisitionProcessing, scan_processing: ScanProcessing, *,
+              section_height_override: typing.Optional[int] = None,
+              max_section_overhead_fraction: typing.Optional[float] = None) -> None:
         assert scan_processing.include_raw or scan_processing.include_summed
 
         document_window = self.__document_controller
@@ -125,7 +127,8 @@ class ScanAcquisitionController:
                 self.__scan_specifier.drift_interval_scans,
                 scan_hardware_source.drift_channel_id,
                 scan_hardware_source.drift_region,
-                scan_hardware_source.drift_rotation
+                scan_hardware_source.drift_rotation,
+                measure_asynchronously=scan_hardware_source.drift_settings.measure_asynchronously
             )
             if self.__scan_specifier.drift_interval_lines > 0:
                 section_height = self.__scan_specifier.drift_interval_lines
@@ -142,7 +145,8 @@ class ScanAcquisitionController:
             include_raw=scan_processing.include_raw,
             include_summed=scan_processing.include_summed,
             enable_drift_tracker=enable_drift_tracker,
-            drift_rotation=0.0
+            drift_rotation=0.0,
+            max_section_overhead_fraction=max_section_overhead_fraction
         )
         framer = Acquisition.Framer(data_item_data_channel)
         self.__synchronized_scan_data_stream = synchronized_scan_data_stream
@@ -210,7 +214,10 @@ def calculate_time_size(camera_hardware_source: camera_base.CameraHardwareSource
     else:
         storage_memory = storage_pixel_count * camera_height * camera_width * 4
     acquire_sequence_metrics = camera_hardware_source.get_acquire_sequence_metrics(camera_base.CameraFrameParameters(camera_frame_parameters))
-    acquisition_time = acquire_sequence_metrics.get("acquisition_time", exposure_time * acquire_pixel_count) * scan_count  # in seconds
+    # the default estimate includes the camera overhead learned from previous acquisitions.
+    camera_frame_parameters["exposure_ms"] = exposure_time * 1000
+    estimated_acquisition_time = camera_hardware_source.estimate_acquisition_time(camera_base.CameraFrameParameters(camera_frame_parameters), acquire_pixel_count)
+    acquisition_time = acquire_sequence_metrics.get("acquisition_time", estimated_acquisition_time) * scan_count  # in seconds
     acquisition_memory = acquire_sequence_metrics.get("acquisition_memory", acquire_pixel_count * camera_width * camera_height * 4)  # in bytes
     storage_memory = acquire_sequence_metrics.get("storage_memory", storage_memory)  # in bytes
     if acquisition_time > 3600: